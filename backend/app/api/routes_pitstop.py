@@ -10,7 +10,7 @@ from typing import Optional
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, UploadFile
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models import JobStatus
@@ -20,9 +20,12 @@ from app.schemas.pitstop import (
     PitstopJobListResponse,
     PitstopJobResponse,
     PitstopMetricsUpdate,
+    PitstopRezoneResponse,
     PitstopRunMetricsOut,
+    ZoneConfigIn,
 )
 from app.services import pitstop_persistence, pitstop_service
+from app.services.job_scheduler import QueueFullError
 from app.services.storage import get_storage
 from app.settings import ALLOWED_VIDEO_EXTENSIONS, MAX_FILE_SIZE_BYTES
 from app.utils.range_stream import (
@@ -34,6 +37,9 @@ from app.utils.range_stream import (
 
 router = APIRouter(prefix="/pitstop", tags=["pitstop"])
 
+# Seconds clients should wait before polling again for a video being rendered
+RENDER_RETRY_AFTER_S = 5
+
 
 @router.post("/jobs", response_model=PitstopJobResponse)
 async def create_job(
@@ -41,6 +47,7 @@ async def create_job(
     series: Optional[str] = Form(None),
     race: Optional[str] = Form(None),
     notes: Optional[str] = Form(None),
+    tracker: Optional[str] = Form(None),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -48,7 +55,11 @@ async def create_job(
     
     - Accepts video files: mp4, mov, mkv, avi, webm
     - Maximum file size: 5GB (configurable)
+    - Optional tracker for time-in-zone jobs: bytetrack or iou (default: PITSTOP_TRACKER)
     - Returns job_id for status polling
+    - 429 with Retry-After if the job's lane (interactive/batch, by estimated
+      cost) already has PITSTOP_MAX_QUEUE_DEPTH queued jobs; when every lane is
+      full, the upload is rejected before it is read
     
     The job will be processed in the background through stages:
     QUEUED -> DETECTING -> TRACKING -> RENDERING -> COMPLETE
@@ -62,6 +73,27 @@ async def create_job(
                 detail=f"Invalid file type '{ext}'. Allowed: {', '.join(sorted(ALLOWED_VIDEO_EXTENSIONS))}",
             )
     
+    # Validate tracker choice
+    if tracker:
+        from app.model.trackers import TRACKERS
+        
+        tracker = tracker.lower()
+        if tracker not in TRACKERS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid tracker '{tracker}'. Allowed: {', '.join(TRACKERS)}",
+            )
+    
+    # Reject before reading the upload when every lane's queue is already full
+    try:
+        await pitstop_service.check_queue_capacity(db)
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after_s)},
+        )
+    
     # Read file content
     content = await file.read()
     
@@ -80,18 +112,26 @@ async def create_job(
             detail="File is empty. Please upload a valid video file.",
         )
     
-    # Create job
-    job = await pitstop_service.create_job(
-        db=db,
-        file_content=content,
-        original_filename=file.filename or "video.mp4",
-        series=series,
-        race=race,
-        notes=notes,
-    )
+    # Create job (rejected with 429 when its lane's queue is full)
+    try:
+        job = await pitstop_service.create_job(
+            db=db,
+            file_content=content,
+            original_filename=file.filename or "video.mp4",
+            series=series,
+            race=race,
+            notes=notes,
+            tracker=tracker or None,
+        )
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after_s)},
+        )
     
-    # Enqueue for background processing
-    pitstop_service.enqueue_job(job.id)
+    # Enqueue for background processing in the job's lane
+    pitstop_service.enqueue_job(job.id, job.lane)
     
     return PitstopJobResponse.from_job(job)
 
@@ -217,6 +257,84 @@ async def update_job_metrics(
     return PitstopRunMetricsOut.from_summary(summary, job_id)
 
 
+@router.post("/jobs/{job_id}/rezone", response_model=PitstopRezoneResponse)
+async def rezone_job(
+    job_id: UUID,
+    zone_config: Optional[ZoneConfigIn] = None,
+    persist: bool = False,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Recompute zone timings of a time_in_zone job for new or edited zones.
+    
+    Timings are computed from the job's stored per-frame tracks, without
+    re-running YOLO. The body uses the zone config file format, in processed
+    frame coordinates; without a body the configured zones are used.
+    
+    With ?persist=true the new timings also replace the job's metrics.
+    
+    Returns:
+    - 400 if the job is not a time_in_zone job or the zones are invalid
+    - 409 if job is not complete
+    - 404 if the job has no stored tracks
+    """
+    job = await pitstop_service.get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    if job.mode != "time_in_zone":
+        raise HTTPException(status_code=400, detail="Re-zoning requires a time_in_zone job")
+    
+    if job.status != JobStatus.COMPLETE:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Job is not complete. Current status: {job.status.value}, stage: {job.stage}",
+        )
+    
+    try:
+        zone_summary = await pitstop_service.rezone_job(
+            job_id,
+            zone_config=zone_config.to_config() if zone_config else None,
+            persist=persist,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if zone_summary is None:
+        raise HTTPException(status_code=404, detail="No stored tracks for this job")
+    
+    return PitstopRezoneResponse.from_summary(zone_summary, job_id, persisted=persist)
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=PitstopJobResponse)
+async def cancel_job(
+    job_id: UUID,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Cancel a queued or processing job.
+    
+    Queued jobs are CANCELLED immediately. Processing jobs stop at their
+    next frame (ffmpeg is killed, the partial output removed) and then move
+    to CANCELLED; until then the response shows PROCESSING with
+    cancel_requested set. Cancelling a cancelled job is a no-op.
+    
+    Returns:
+    - 409 if the job already completed or failed
+    """
+    job = await pitstop_service.cancel_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    if job.status in (JobStatus.COMPLETE, JobStatus.FAILED):
+        raise HTTPException(
+            status_code=409,
+            detail=f"Job already finished. Current status: {job.status.value}",
+        )
+    
+    return PitstopJobResponse.from_job(job)
+
+
 # Backward compatibility alias
 @router.get("/runs/{run_id}/metrics", response_model=PitstopRunMetricsOut, include_in_schema=False)
 async def get_run_metrics_legacy(
@@ -240,7 +358,12 @@ async def get_job_output(
     - Without Range header: returns full file with Accept-Ranges: bytes
     - With Range header: returns 206 Partial Content with requested byte range
     
+    Jobs that completed analysis-only (PITSTOP_RENDER_MODE=background or
+    on_demand) render their annotated video on first request.
+    
     Returns:
+    - 202 with Retry-After while the video is being rendered
+    - 500 if rendering failed PITSTOP_RENDER_MAX_ATTEMPTS times
     - 409 if job is not complete
     - 404 if output file not found
     - 416 if Range cannot be satisfied
@@ -257,6 +380,20 @@ async def get_job_output(
             detail=f"Job is not complete. Current status: {job.status.value}, stage: {job.stage}",
         )
     
+    if pitstop_service.is_render_failed(job):
+        raise HTTPException(
+            status_code=500,
+            detail=f"Output video rendering failed after {job.render_attempts} attempts: {job.render_error}",
+        )
+    
+    if pitstop_service.is_render_pending(job):
+        pitstop_service.enqueue_render(job.id)
+        return JSONResponse(
+            status_code=202,
+            content={"detail": "Output video is being rendered", "job_id": str(job.id)},
+            headers={"Retry-After": str(RENDER_RETRY_AFTER_S)},
+        )
+    
     if not job.output_path:
         raise HTTPException(status_code=404, detail="Output file path not set")
     
@@ -329,6 +466,7 @@ async def delete_job(
     """
     Delete a job and its associated files.
     
+    - Stops the job's frame loop if it is processing in the API process
     - Removes job from database
     - Deletes input and output files from storage
     """
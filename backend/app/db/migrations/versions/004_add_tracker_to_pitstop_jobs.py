@@ -0,0 +1,29 @@
+"""Add tracker column to pitstop_jobs.
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-16
+
+Changes:
+- Add nullable 'tracker' column to pitstop_jobs (time-in-zone tracker chosen
+  per job; NULL uses PITSTOP_TRACKER)
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = "004"
+down_revision = "003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "pitstop_jobs",
+        sa.Column("tracker", sa.String(20), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("pitstop_jobs", "tracker")
@@ -0,0 +1,47 @@
+"""Add job queue lease columns to pitstop_jobs.
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-16
+
+Changes:
+- Add 'worker_id' and 'lease_expires_at' columns to pitstop_jobs (the worker
+  holding a PROCESSING job and until when; expired leases are re-queued)
+- Add 'attempts' column to pitstop_jobs (times the job was claimed)
+- Add (status, created_at) index for claiming the oldest QUEUED job
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = "005"
+down_revision = "004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "pitstop_jobs",
+        sa.Column("worker_id", sa.String(100), nullable=True),
+    )
+    op.add_column(
+        "pitstop_jobs",
+        sa.Column("lease_expires_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.add_column(
+        "pitstop_jobs",
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.create_index(
+        "ix_pitstop_jobs_status_created_at",
+        "pitstop_jobs",
+        ["status", "created_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_pitstop_jobs_status_created_at", table_name="pitstop_jobs")
+    op.drop_column("pitstop_jobs", "attempts")
+    op.drop_column("pitstop_jobs", "lease_expires_at")
+    op.drop_column("pitstop_jobs", "worker_id")
@@ -0,0 +1,43 @@
+"""Add cost and lane columns to pitstop_jobs.
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-16
+
+Changes:
+- Add nullable 'cost' column to pitstop_jobs (estimated processing cost in
+  1080p-frame equivalents, probed at upload)
+- Add 'lane' column to pitstop_jobs ('interactive' or 'batch'; existing jobs
+  are 'batch')
+- Add (status, lane, created_at) index for per-lane claiming and queue depth
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = "006"
+down_revision = "005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "pitstop_jobs",
+        sa.Column("cost", sa.Float(), nullable=True),
+    )
+    op.add_column(
+        "pitstop_jobs",
+        sa.Column("lane", sa.String(20), nullable=False, server_default="batch"),
+    )
+    op.create_index(
+        "ix_pitstop_jobs_status_lane_created_at",
+        "pitstop_jobs",
+        ["status", "lane", "created_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_pitstop_jobs_status_lane_created_at", table_name="pitstop_jobs")
+    op.drop_column("pitstop_jobs", "lane")
+    op.drop_column("pitstop_jobs", "cost")
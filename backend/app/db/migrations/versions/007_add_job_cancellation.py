@@ -0,0 +1,37 @@
+"""Add job cancellation to pitstop_jobs.
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-16
+
+Changes:
+- Add 'CANCELLED' value to the jobstatus enum
+- Add 'cancel_requested' column to pitstop_jobs (set by the cancel endpoint;
+  the process running the job stops it and marks it CANCELLED)
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = "007"
+down_revision = "006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # New enum values cannot be used in the transaction that adds them
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE jobstatus ADD VALUE IF NOT EXISTS 'CANCELLED'")
+    op.add_column(
+        "pitstop_jobs",
+        sa.Column("cancel_requested", sa.Boolean(), nullable=False, server_default="false"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("pitstop_jobs", "cancel_requested")
+    # Postgres cannot drop an enum value: keep it, but move cancelled jobs to FAILED
+    op.execute(
+        "UPDATE pitstop_jobs SET status = 'FAILED', stage = 'FAILED' WHERE status = 'CANCELLED'"
+    )
@@ -0,0 +1,29 @@
+"""Add motion_skip_ratio column to pitstop_jobs.
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-16
+
+Changes:
+- Add nullable 'motion_skip_ratio' column to pitstop_jobs (fraction of
+  detection frames the motion gate skipped; NULL if the gate was off)
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = "008"
+down_revision = "007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "pitstop_jobs",
+        sa.Column("motion_skip_ratio", sa.Float(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("pitstop_jobs", "motion_skip_ratio")
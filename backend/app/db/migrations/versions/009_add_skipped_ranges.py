@@ -0,0 +1,29 @@
+"""Add skipped_ranges column to pitstop_jobs.
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-16
+
+Changes:
+- Add nullable JSON 'skipped_ranges' column to pitstop_jobs (frame/time
+  ranges the shot gate skipped as other cameras; NULL if the gate was off)
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = "009"
+down_revision = "008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "pitstop_jobs",
+        sa.Column("skipped_ranges", sa.JSON(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("pitstop_jobs", "skipped_ranges")
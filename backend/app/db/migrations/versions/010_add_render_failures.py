@@ -0,0 +1,35 @@
+"""Add deferred render failure tracking to pitstop_jobs.
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-16
+
+Changes:
+- Add 'render_attempts' column to pitstop_jobs (failed deferred renders;
+  output requests stop starting renders after PITSTOP_RENDER_MAX_ATTEMPTS)
+- Add nullable 'render_error' column to pitstop_jobs (last render error)
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = "010"
+down_revision = "009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "pitstop_jobs",
+        sa.Column("render_attempts", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.add_column(
+        "pitstop_jobs",
+        sa.Column("render_error", sa.Text(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("pitstop_jobs", "render_error")
+    op.drop_column("pitstop_jobs", "render_attempts")
@@ -5,7 +5,20 @@ import uuid
 from datetime import datetime
 from typing import TYPE_CHECKING, List, Optional
 
-from sqlalchemy import BigInteger, DateTime, Enum, Float, ForeignKey, String, Text, func
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    Boolean,
+    DateTime,
+    Enum,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    func,
+)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -20,6 +33,7 @@ class JobStatus(str, enum.Enum):
     PROCESSING = "PROCESSING"
     COMPLETE = "COMPLETE"
     FAILED = "FAILED"
+    CANCELLED = "CANCELLED"
 
 
 class ProcessingMode(str, enum.Enum):
@@ -30,6 +44,12 @@ class ProcessingMode(str, enum.Enum):
 
 class PitstopJob(Base):
     __tablename__ = "pitstop_jobs"
+    __table_args__ = (
+        # Job queue: workers claim the oldest QUEUED job
+        Index("ix_pitstop_jobs_status_created_at", "status", "created_at"),
+        # Scheduling: per-lane claiming and queue depth
+        Index("ix_pitstop_jobs_status_lane_created_at", "status", "lane", "created_at"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
@@ -58,6 +78,18 @@ class PitstopJob(Base):
         default="classic",
         nullable=False,
     )
+    # Time-in-zone tracker ("bytetrack" or "iou"); NULL uses PITSTOP_TRACKER
+    tracker: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)
+
+    # Scheduling: estimated cost (1080p-frame equivalents; NULL if the upload could not be
+    # probed) and lane ("interactive" or "batch")
+    cost: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    lane: Mapped[str] = mapped_column(
+        String(20),
+        default="batch",
+        server_default="batch",
+        nullable=False,
+    )
 
     # Metadata
     series: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
@@ -77,9 +109,46 @@ class PitstopJob(Base):
     # Error message (populated on failure)
     error_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
 
+    # Fraction of detection frames skipped by the motion gate (NULL if the gate was off)
+    motion_skip_ratio: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    # Ranges the shot gate skipped as other cameras ({start_frame, end_frame, start_sec,
+    # end_sec} each; NULL if the gate was off)
+    skipped_ranges: Mapped[Optional[List[dict]]] = mapped_column(JSON, nullable=True)
+
+    # Deferred video rendering: failed render attempts and the last error
+    render_attempts: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        server_default="0",
+        nullable=False,
+    )
+    render_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
     # Logs stored in DB for simplicity
     logs: Mapped[str] = mapped_column(Text, default="", nullable=False)
 
+    # Job queue lease (PITSTOP_JOB_QUEUE=postgres): worker processing the job and until when
+    # its claim holds; heartbeats extend it, expired leases are re-queued
+    worker_id: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    lease_expires_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+    )
+    attempts: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        server_default="0",
+        nullable=False,
+    )
+
+    # Cancellation requested; the process running the job stops it and marks it CANCELLED
+    cancel_requested: Mapped[bool] = mapped_column(
+        Boolean,
+        default=False,
+        server_default="false",
+        nullable=False,
+    )
+
     # Timestamps
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
@@ -5,7 +5,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
 from app.api.routes_pitstop import router as pitstop_router
-from app.settings import API_PREFIX, CORS_ORIGINS
+from app.settings import API_PREFIX, CORS_ORIGINS, PITSTOP_EXECUTOR, PITSTOP_JOB_QUEUE
 
 
 @asynccontextmanager
@@ -13,8 +13,16 @@ async def lifespan(app: FastAPI):
     """Application lifespan handler."""
     # Startup
     print("🏎️  CodeFx API starting up...")
+    # This process runs jobs itself: spawn the job workers now so they preload the model
+    run_pool = PITSTOP_EXECUTOR == "process" and PITSTOP_JOB_QUEUE == "local"
+    if run_pool:
+        from app.model.job_process_pool import get_job_process_pool
+        get_job_process_pool()
     yield
     # Shutdown
+    if run_pool:
+        from app.model.job_process_pool import shutdown_job_process_pool
+        shutdown_job_process_pool()
     print("🏁 CodeFx API shutting down...")
 
 
@@ -0,0 +1,99 @@
+"""
+Pluggable detection engines.
+
+All engines return sv.Detections, so the runner and time-in-zone loop don't
+depend on Ultralytics directly. The engine is selected per deployment with
+PITSTOP_DETECTOR_ENGINE:
+
+- "ultralytics": PyTorch eager inference on best.pt (default)
+- "onnx": ONNX Runtime on a cached ONNX export
+- "onnx_int8": ONNX Runtime on a statically quantized INT8 export, used only
+  if it passes the zone-timing guardrail (falls back to "onnx" otherwise)
+- "openvino": OpenVINO on a cached IR export
+- "opencv": OpenCV DNN on a cached fixed-shape ONNX export
+"""
+from __future__ import annotations
+
+import logging
+from typing import Optional
+
+from app.model.detectors.base import Detector
+
+__all__ = ["Detector", "DETECTOR_ENGINES", "create_detector"]
+
+logger = logging.getLogger(__name__)
+
+DETECTOR_ENGINES = ("ultralytics", "onnx", "onnx_int8", "openvino", "opencv")
+
+
+def create_detector(
+    engine: str,
+    weights_path: str,
+    device: Optional[str] = None,
+) -> Detector:
+    """
+    Create a detector for the given engine, exporting best.pt first if needed.
+
+    Engine modules are imported lazily so optional runtimes (onnxruntime,
+    openvino) are only required when selected.
+    """
+    from app import settings
+
+    engine = (engine or "ultralytics").lower()
+    if engine not in DETECTOR_ENGINES:
+        raise ValueError(
+            f"Unknown detector engine '{engine}'. Choose from: {', '.join(DETECTOR_ENGINES)}"
+        )
+
+    if engine == "ultralytics":
+        from app.model.detectors.ultralytics_engine import UltralyticsDetector
+        return UltralyticsDetector(weights_path, device=device)
+
+    from app.model.detectors.export import export_model
+
+    imgsz = settings.PITSTOP_EXPORT_IMGSZ
+
+    if engine == "onnx_int8":
+        from app.model.detectors.onnx_engine import OnnxRuntimeDetector
+        from app.model.detectors.quantization import prepare_int8_model
+
+        try:
+            int8_path, names, manifest = prepare_int8_model(
+                weights_path,
+                imgsz,
+                settings.PITSTOP_EXPORT_DIR,
+                settings.INPUT_DIR,
+                settings.PITSTOP_INT8_CALIBRATION_FRAMES,
+                settings.PITSTOP_INT8_REFERENCE_CLIP,
+                settings.ZONE_CONFIG_PATH,
+                settings.PITSTOP_INT8_TOLERANCE_SEC,
+                target_size=(settings.PITSTOP_TARGET_WIDTH, settings.PITSTOP_TARGET_HEIGHT),
+            )
+        except ValueError as e:
+            logger.warning("INT8 model unavailable (%s); using FP32 ONNX instead", e)
+            int8_path = None
+        else:
+            if int8_path is None:
+                logger.warning(
+                    "INT8 model for %s failed the zone-timing guardrail (tolerance %.2fs); "
+                    "using FP32 ONNX instead",
+                    weights_path,
+                    manifest["guardrail"]["tolerance_sec"],
+                )
+
+        if int8_path is not None:
+            detector = OnnxRuntimeDetector(int8_path, names=names, imgsz=imgsz, device=device)
+            detector.engine = "onnx_int8"
+            return detector
+        engine = "onnx"
+    model_path, names = export_model(weights_path, engine, imgsz, settings.PITSTOP_EXPORT_DIR)
+
+    if engine == "onnx":
+        from app.model.detectors.onnx_engine import OnnxRuntimeDetector
+        return OnnxRuntimeDetector(model_path, names=names, imgsz=imgsz, device=device)
+    if engine == "openvino":
+        from app.model.detectors.openvino_engine import OpenVINODetector
+        return OpenVINODetector(model_path, names=names, imgsz=imgsz, device=device)
+
+    from app.model.detectors.opencv_engine import OpenCVDnnDetector
+    return OpenCVDnnDetector(model_path, names=names, imgsz=imgsz)
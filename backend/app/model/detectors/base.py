@@ -0,0 +1,196 @@
+"""
+Detector interface and shared YOLO pre/post-processing.
+
+Every inference engine implements Detector.detect(), which takes a batch of
+BGR frames and returns one sv.Detections per frame in frame coordinates.
+Exported-model engines (ONNX Runtime, OpenVINO, OpenCV DNN) share the
+letterbox preprocessing and YOLOv8 output decoding + NMS defined here, so
+they produce the same detections as Ultralytics up to numeric precision.
+"""
+from __future__ import annotations
+
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+import supervision as sv
+
+# Ultralytics predict() defaults
+DEFAULT_CONF = 0.25
+DEFAULT_IOU = 0.7
+MAX_DETECTIONS = 300
+
+# Letterbox padding value used by Ultralytics
+LETTERBOX_COLOR = (114, 114, 114)
+
+
+class Detector(ABC):
+    """
+    Abstract base class for detection engines.
+
+    Implementations:
+        - UltralyticsDetector: PyTorch eager inference via ultralytics.YOLO
+        - OnnxRuntimeDetector: ONNX Runtime (CPU or CUDA)
+        - OpenVINODetector: Intel OpenVINO (CPU)
+        - OpenCVDnnDetector: OpenCV DNN module (CPU, no extra dependency)
+    """
+
+    #: Engine name as used in PITSTOP_DETECTOR_ENGINE
+    engine: str = ""
+
+    def __init__(self, names: Dict[int, str], imgsz: int, source_path: str):
+        self.names = names
+        self.imgsz = int(imgsz)
+        self.source_path = source_path
+
+    @abstractmethod
+    def detect(
+        self,
+        frames: List[np.ndarray],
+        conf: float = DEFAULT_CONF,
+        iou: float = DEFAULT_IOU,
+        imgsz: Optional[int] = None,
+    ) -> List[sv.Detections]:
+        """
+        Run detection on a batch of frames.
+
+        Args:
+            frames: BGR frames (H, W, 3); sizes may differ between frames.
+            conf: Minimum confidence to keep a detection.
+            iou: IoU threshold for class-aware NMS.
+            imgsz: Optional inference size override (engines with a fixed
+                input size ignore it).
+
+        Returns:
+            One sv.Detections per frame, boxes in that frame's pixel coordinates,
+            with data["class_name"] populated from the model's class names.
+        """
+        pass
+
+    @property
+    def size_bytes(self) -> int:
+        """Estimated resident memory (used by the model registry's budget)."""
+        return os.path.getsize(self.source_path) * 2
+
+    def warmup(self) -> None:
+        """Run one dummy inference so the first real frame doesn't pay graph setup."""
+        self.detect([np.zeros((self.imgsz, self.imgsz, 3), dtype=np.uint8)])
+
+
+def letterbox(
+    frame: np.ndarray,
+    imgsz: int,
+) -> Tuple[np.ndarray, float, Tuple[float, float]]:
+    """
+    Resize with unchanged aspect ratio and pad to a square imgsz x imgsz image.
+
+    Returns:
+        (padded BGR image, scale ratio, (pad_x, pad_y))
+    """
+    height, width = frame.shape[:2]
+    ratio = min(imgsz / height, imgsz / width)
+    new_w, new_h = int(round(width * ratio)), int(round(height * ratio))
+    pad_x, pad_y = (imgsz - new_w) / 2, (imgsz - new_h) / 2
+
+    if (new_w, new_h) != (width, height):
+        frame = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+
+    top, bottom = int(round(pad_y - 0.1)), int(round(pad_y + 0.1))
+    left, right = int(round(pad_x - 0.1)), int(round(pad_x + 0.1))
+    padded = cv2.copyMakeBorder(
+        frame, top, bottom, left, right, cv2.BORDER_CONSTANT, value=LETTERBOX_COLOR
+    )
+    return padded, ratio, (left, top)
+
+
+def preprocess(
+    frames: List[np.ndarray],
+    imgsz: int,
+) -> Tuple[np.ndarray, List[Tuple[float, Tuple[float, float]]]]:
+    """
+    Letterbox a batch of BGR frames into an NCHW float32 RGB tensor in [0, 1].
+
+    Returns:
+        (tensor of shape (N, 3, imgsz, imgsz), per-frame (ratio, pad))
+    """
+    images = []
+    transforms = []
+    for frame in frames:
+        padded, ratio, pad = letterbox(frame, imgsz)
+        images.append(padded)
+        transforms.append((ratio, pad))
+
+    batch = np.stack(images)[..., ::-1]  # BGR -> RGB
+    batch = batch.transpose(0, 3, 1, 2).astype(np.float32) / 255.0
+    return np.ascontiguousarray(batch), transforms
+
+
+def postprocess(
+    output: np.ndarray,
+    frames: List[np.ndarray],
+    transforms: List[Tuple[float, Tuple[float, float]]],
+    names: Dict[int, str],
+    conf: float,
+    iou: float,
+) -> List[sv.Detections]:
+    """
+    Decode raw YOLOv8 output into sv.Detections per frame.
+
+    Args:
+        output: Model output of shape (N, 4 + num_classes, num_anchors),
+            boxes as (cx, cy, w, h) in letterboxed pixels.
+        frames: Original frames (for clipping to their size).
+        transforms: Per-frame (ratio, (pad_x, pad_y)) from preprocess().
+        names: Class id -> name mapping.
+        conf: Confidence threshold.
+        iou: NMS IoU threshold (class-aware).
+    """
+    results = []
+    for pred, frame, (ratio, (pad_x, pad_y)) in zip(output, frames, transforms):
+        pred = pred.T  # (num_anchors, 4 + num_classes)
+        class_scores = pred[:, 4:]
+        class_ids = class_scores.argmax(axis=1)
+        scores = class_scores[np.arange(len(class_ids)), class_ids]
+
+        keep = scores > conf
+        pred, class_ids, scores = pred[keep], class_ids[keep], scores[keep]
+        if len(scores) == 0:
+            results.append(_empty_detections())
+            continue
+
+        # (cx, cy, w, h) -> (x1, y1, x2, y2), undo letterbox
+        xyxy = np.empty((len(pred), 4), dtype=np.float32)
+        xyxy[:, 0] = pred[:, 0] - pred[:, 2] / 2
+        xyxy[:, 1] = pred[:, 1] - pred[:, 3] / 2
+        xyxy[:, 2] = pred[:, 0] + pred[:, 2] / 2
+        xyxy[:, 3] = pred[:, 1] + pred[:, 3] / 2
+        xyxy[:, [0, 2]] = (xyxy[:, [0, 2]] - pad_x) / ratio
+        xyxy[:, [1, 3]] = (xyxy[:, [1, 3]] - pad_y) / ratio
+
+        height, width = frame.shape[:2]
+        xyxy[:, [0, 2]] = xyxy[:, [0, 2]].clip(0, width)
+        xyxy[:, [1, 3]] = xyxy[:, [1, 3]].clip(0, height)
+
+        # Class-aware NMS
+        boxes_xywh = np.column_stack([xyxy[:, :2], xyxy[:, 2:] - xyxy[:, :2]])
+        kept = cv2.dnn.NMSBoxesBatched(
+            boxes_xywh.tolist(), scores.tolist(), class_ids.tolist(), conf, iou
+        )
+        kept = np.array(kept, dtype=int).reshape(-1)[:MAX_DETECTIONS]
+
+        class_ids = class_ids[kept].astype(int)
+        results.append(sv.Detections(
+            xyxy=xyxy[kept],
+            confidence=scores[kept].astype(np.float32),
+            class_id=class_ids,
+            data={"class_name": np.array([names.get(int(c), str(c)) for c in class_ids])},
+        ))
+    return results
+
+
+def _empty_detections() -> sv.Detections:
+    detections = sv.Detections.empty()
+    detections.data = {"class_name": np.array([], dtype=str)}
+    return detections
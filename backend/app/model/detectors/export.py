@@ -0,0 +1,112 @@
+"""
+One-time export of best.pt to optimized inference formats.
+
+Exports are cached under PITSTOP_EXPORT_DIR, keyed by the weights file's
+name and mtime, the engine and the input size, so a replaced best.pt is
+re-exported automatically and an unchanged one is exported only once per
+deployment. Each export directory holds a manifest.json with the exported
+model path, class names and input size.
+"""
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Tuple
+
+# engine -> (ultralytics export format, export kwargs)
+EXPORT_FORMATS = {
+    # Dynamic batch and input size so batching and ROI crops work
+    "onnx": ("onnx", {"dynamic": True, "simplify": True}),
+    "openvino": ("openvino", {"dynamic": True}),
+    # cv2.dnn needs a fixed input shape
+    "opencv": ("onnx", {"dynamic": False, "simplify": True, "batch": 1}),
+}
+
+_export_lock = threading.Lock()
+
+
+def _export_key(weights_path: str, engine: str, imgsz: int) -> str:
+    stem = Path(weights_path).stem
+    mtime_ns = os.stat(weights_path).st_mtime_ns
+    return f"{stem}-{mtime_ns}-{engine}-{imgsz}"
+
+
+def _load_manifest(export_path: Path) -> Tuple[str, Dict[int, str]]:
+    with open(export_path / "manifest.json", "r") as f:
+        manifest = json.load(f)
+    names = {int(k): v for k, v in manifest["names"].items()}
+    return str(export_path / manifest["model_file"]), names
+
+
+def export_model(
+    weights_path: str,
+    engine: str,
+    imgsz: int,
+    export_dir: Path,
+) -> Tuple[str, Dict[int, str]]:
+    """
+    Export weights for an engine, or reuse a cached export.
+
+    Args:
+        weights_path: Path to the Ultralytics .pt weights.
+        engine: One of EXPORT_FORMATS ("onnx", "openvino", "opencv").
+        imgsz: Export input size.
+        export_dir: Cache directory for exported models.
+
+    Returns:
+        (path to the exported model file, class names)
+    """
+    if engine not in EXPORT_FORMATS:
+        raise ValueError(f"No export format for engine '{engine}'")
+    if not os.path.exists(weights_path):
+        raise FileNotFoundError(f"YOLO weights not found at: {weights_path}")
+
+    export_dir = Path(export_dir)
+    export_dir.mkdir(parents=True, exist_ok=True)
+    export_path = export_dir / _export_key(weights_path, engine, imgsz)
+
+    with _export_lock:
+        if (export_path / "manifest.json").exists():
+            return _load_manifest(export_path)
+
+        from ultralytics import YOLO
+
+        # Export from a private copy so the artifacts land in our cache dir
+        work_dir = Path(tempfile.mkdtemp(prefix=".export-", dir=export_dir))
+        try:
+            work_weights = work_dir / "model.pt"
+            shutil.copy2(weights_path, work_weights)
+
+            fmt, kwargs = EXPORT_FORMATS[engine]
+            model = YOLO(str(work_weights))
+            exported = Path(model.export(format=fmt, imgsz=imgsz, **kwargs))
+
+            # OpenVINO exports a directory containing the .xml/.bin pair
+            if exported.is_dir():
+                exported = next(exported.glob("*.xml"))
+
+            manifest = {
+                "source": os.path.realpath(weights_path),
+                "engine": engine,
+                "imgsz": imgsz,
+                "model_file": str(exported.relative_to(work_dir)),
+                "names": {str(k): v for k, v in model.names.items()},
+            }
+            with open(work_dir / "manifest.json", "w") as f:
+                json.dump(manifest, f, indent=2)
+            work_weights.unlink()
+
+            # Publish atomically; another process may have won the race
+            try:
+                os.rename(work_dir, export_path)
+            except OSError:
+                shutil.rmtree(work_dir, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(work_dir, ignore_errors=True)
+            raise
+
+        return _load_manifest(export_path)
@@ -0,0 +1,58 @@
+"""ONNX Runtime detector engine."""
+from __future__ import annotations
+
+from typing import Dict, List, Optional
+
+import numpy as np
+import supervision as sv
+
+from app.model.detectors.base import (
+    DEFAULT_CONF,
+    DEFAULT_IOU,
+    Detector,
+    postprocess,
+    preprocess,
+)
+
+
+class OnnxRuntimeDetector(Detector):
+    """Runs an exported (dynamic-shape) YOLO ONNX model with ONNX Runtime."""
+
+    engine = "onnx"
+
+    def __init__(
+        self,
+        onnx_path: str,
+        names: Dict[int, str],
+        imgsz: int,
+        device: Optional[str] = None,
+    ):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise RuntimeError(
+                "onnxruntime is required for PITSTOP_DETECTOR_ENGINE=onnx. "
+                "Install it with: pip install onnxruntime"
+            ) from e
+
+        providers = ["CPUExecutionProvider"]
+        if device and device.startswith("cuda"):
+            providers.insert(0, "CUDAExecutionProvider")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(onnx_path, sess_options=options, providers=providers)
+        self.input_name = self.session.get_inputs()[0].name
+
+        super().__init__(names=names, imgsz=imgsz, source_path=onnx_path)
+
+    def detect(
+        self,
+        frames: List[np.ndarray],
+        conf: float = DEFAULT_CONF,
+        iou: float = DEFAULT_IOU,
+        imgsz: Optional[int] = None,
+    ) -> List[sv.Detections]:
+        batch, transforms = preprocess(frames, imgsz or self.imgsz)
+        output = self.session.run(None, {self.input_name: batch})[0]
+        return postprocess(output, frames, transforms, self.names, conf, iou)
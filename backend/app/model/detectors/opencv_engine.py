@@ -0,0 +1,50 @@
+"""OpenCV DNN detector engine."""
+from __future__ import annotations
+
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+import supervision as sv
+
+from app.model.detectors.base import (
+    DEFAULT_CONF,
+    DEFAULT_IOU,
+    Detector,
+    postprocess,
+    preprocess,
+)
+
+
+class OpenCVDnnDetector(Detector):
+    """
+    Runs an exported fixed-shape YOLO ONNX model with cv2.dnn on the CPU.
+
+    Needs no dependency beyond OpenCV. The network input is fixed at the
+    export size (batch 1), so frames are run one at a time and the imgsz
+    override is ignored.
+    """
+
+    engine = "opencv"
+
+    def __init__(self, onnx_path: str, names: Dict[int, str], imgsz: int):
+        self.net = cv2.dnn.readNetFromONNX(onnx_path)
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+
+        super().__init__(names=names, imgsz=imgsz, source_path=onnx_path)
+
+    def detect(
+        self,
+        frames: List[np.ndarray],
+        conf: float = DEFAULT_CONF,
+        iou: float = DEFAULT_IOU,
+        imgsz: Optional[int] = None,
+    ) -> List[sv.Detections]:
+        results = []
+        for frame in frames:
+            blob, transforms = preprocess([frame], self.imgsz)
+            self.net.setInput(blob)
+            output = self.net.forward()
+            results.extend(postprocess(output, [frame], transforms, self.names, conf, iou))
+        return results
@@ -0,0 +1,68 @@
+"""OpenVINO detector engine."""
+from __future__ import annotations
+
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import supervision as sv
+
+from app.model.detectors.base import (
+    DEFAULT_CONF,
+    DEFAULT_IOU,
+    Detector,
+    postprocess,
+    preprocess,
+)
+
+
+class OpenVINODetector(Detector):
+    """Runs an exported YOLO OpenVINO IR model on the CPU plugin."""
+
+    engine = "openvino"
+
+    def __init__(
+        self,
+        xml_path: str,
+        names: Dict[int, str],
+        imgsz: int,
+        device: Optional[str] = None,
+    ):
+        try:
+            import openvino as ov
+        except ImportError as e:
+            raise RuntimeError(
+                "openvino is required for PITSTOP_DETECTOR_ENGINE=openvino. "
+                "Install it with: pip install openvino"
+            ) from e
+
+        core = ov.Core()
+        model = core.read_model(xml_path)
+        # Throughput hint lets OpenVINO use all streams for batched inputs
+        self.compiled = core.compile_model(
+            model,
+            "CPU",
+            {"PERFORMANCE_HINT": "THROUGHPUT"},
+        )
+        self.output = self.compiled.output(0)
+
+        super().__init__(names=names, imgsz=imgsz, source_path=xml_path)
+
+    @property
+    def size_bytes(self) -> int:
+        # Weights live in the .bin next to the .xml
+        bin_path = os.path.splitext(self.source_path)[0] + ".bin"
+        if os.path.exists(bin_path):
+            return os.path.getsize(bin_path) * 2
+        return super().size_bytes
+
+    def detect(
+        self,
+        frames: List[np.ndarray],
+        conf: float = DEFAULT_CONF,
+        iou: float = DEFAULT_IOU,
+        imgsz: Optional[int] = None,
+    ) -> List[sv.Detections]:
+        batch, transforms = preprocess(frames, imgsz or self.imgsz)
+        output = self.compiled([batch])[self.output]
+        return postprocess(np.asarray(output), frames, transforms, self.names, conf, iou)
@@ -0,0 +1,375 @@
+"""
+INT8 post-training quantization of the ONNX export, with an accuracy guardrail.
+
+Static INT8 quantization roughly doubles CPU throughput, but can shift
+confidences enough to change what ByteTrack and the zone timers see. A
+quantized model is therefore only activated after a guardrail check:
+
+1. The FP32 ONNX export (see export.py) is quantized with ONNX Runtime's
+   static quantizer (QDQ, per-channel weights), calibrated on frames sampled
+   from uploaded videos in storage/input. The detection-head decode (box
+   distribution + concat) stays in FP32.
+2. run_time_in_zone() runs on a reference clip with the FP32 model and with
+   the INT8 model, and per-zone timings (max and total time) are compared.
+3. If every zone is within the tolerance, the export's manifest is marked
+   activated. Otherwise the INT8 model is kept for inspection but the
+   "onnx_int8" engine falls back to FP32 ONNX.
+
+Quantized exports are cached next to the other exports, keyed by weights
+file mtime, so a new best.pt is re-quantized and re-checked on first use.
+Run this module as a script to prepare (and check) the model ahead of a
+deployment instead of on the first job.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import random
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from app.model.detectors.base import preprocess
+from app.model.detectors.export import _export_key, _load_manifest, export_model
+
+logger = logging.getLogger(__name__)
+
+# Videos sampled for calibration (most recent uploads first)
+MAX_CALIBRATION_VIDEOS = 20
+
+_quantize_lock = threading.Lock()
+
+
+def sample_calibration_frames(
+    input_dir: Path,
+    num_frames: int,
+    extensions: Optional[set] = None,
+    seed: int = 0,
+) -> List[np.ndarray]:
+    """
+    Sample BGR frames evenly from the most recent videos in input_dir.
+
+    Args:
+        input_dir: Directory with uploaded videos (storage/input).
+        num_frames: Total number of frames to sample.
+        extensions: Video file extensions to consider.
+        seed: Seed for the per-video frame offsets (keeps calibration reproducible).
+    """
+    extensions = extensions or {".mp4", ".mov", ".mkv", ".avi", ".webm"}
+    videos = sorted(
+        (p for p in Path(input_dir).glob("*") if p.suffix.lower() in extensions),
+        key=lambda p: p.stat().st_mtime,
+        reverse=True,
+    )[:MAX_CALIBRATION_VIDEOS]
+    if not videos:
+        return []
+
+    rng = random.Random(seed)
+    per_video = max(1, int(np.ceil(num_frames / len(videos))))
+    frames: List[np.ndarray] = []
+
+    for video in videos:
+        cap = cv2.VideoCapture(str(video))
+        try:
+            total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            if total <= 0:
+                continue
+            step = max(1, total // per_video)
+            for index in range(rng.randrange(step), total, step):
+                cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+                ok, frame = cap.read()
+                if ok:
+                    frames.append(frame)
+                if len(frames) >= num_frames:
+                    return frames
+        finally:
+            cap.release()
+
+    return frames
+
+
+def _excluded_head_nodes(onnx_path: str) -> List[str]:
+    """
+    Names of detection-head decode nodes to keep in FP32.
+
+    The YOLOv8 head ends in a DFL softmax, anchor decode and a concat of box
+    coordinates (pixels) with class scores (0-1); quantizing those to a single
+    INT8 scale destroys box precision. Head convolutions are still quantized.
+    """
+    import onnx
+
+    model = onnx.load(onnx_path, load_external_data=False)
+    nodes = model.graph.node
+    if not nodes:
+        return []
+
+    last = nodes[-1].name
+    head_prefix = last.rsplit("/", 1)[0] + "/" if "/" in last else ""
+    if not head_prefix:
+        return []
+    return [n.name for n in nodes if n.name.startswith(head_prefix) and n.op_type != "Conv"]
+
+
+def quantize_onnx(
+    fp32_path: str,
+    int8_path: str,
+    calibration_frames: List[np.ndarray],
+    imgsz: int,
+) -> None:
+    """Statically quantize an ONNX model to INT8 (QDQ) using calibration frames."""
+    try:
+        from onnxruntime.quantization import (
+            CalibrationDataReader,
+            QuantFormat,
+            QuantType,
+            quantize_static,
+        )
+    except ImportError as e:
+        raise RuntimeError(
+            "onnxruntime is required for PITSTOP_DETECTOR_ENGINE=onnx_int8. "
+            "Install it with: pip install onnxruntime onnx"
+        ) from e
+
+    if not calibration_frames:
+        raise ValueError("No calibration frames available for INT8 quantization")
+
+    import onnxruntime as ort
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    # Fold constants and infer shapes first so every tensor gets calibrated ranges
+    prepared_path = str(Path(int8_path).with_suffix(".prep.onnx"))
+    quant_pre_process(fp32_path, prepared_path, skip_symbolic_shape=True)
+
+    input_name = ort.InferenceSession(
+        fp32_path, providers=["CPUExecutionProvider"]
+    ).get_inputs()[0].name
+
+    class _FrameReader(CalibrationDataReader):
+        def __init__(self) -> None:
+            self._frames = iter(calibration_frames)
+
+        def get_next(self) -> Optional[Dict[str, np.ndarray]]:
+            frame = next(self._frames, None)
+            if frame is None:
+                return None
+            batch, _ = preprocess([frame], imgsz)
+            return {input_name: batch}
+
+    quantize_static(
+        prepared_path,
+        int8_path,
+        _FrameReader(),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+        nodes_to_exclude=_excluded_head_nodes(prepared_path),
+    )
+    os.remove(prepared_path)
+
+
+def compare_zone_timings(
+    reference: dict,
+    candidate: dict,
+    tolerance_sec: float,
+) -> Tuple[bool, List[dict]]:
+    """
+    Compare two TimeInZoneResult.to_dict() outputs zone by zone.
+
+    Tracker ids differ between runs, so zones are compared on their longest
+    and total tracked time rather than per tracker.
+
+    Returns:
+        (all zones within tolerance, per-zone drift report)
+    """
+    candidate_zones = {z["zone_id"]: z for z in candidate.get("zones", [])}
+    report = []
+    passed = True
+
+    for zone in reference.get("zones", []):
+        other = candidate_zones.get(zone["zone_id"], {})
+        ref_total = sum(zone.get("tracker_times", {}).values())
+        cand_total = sum(other.get("tracker_times", {}).values())
+        max_drift = abs(zone.get("max_time_sec", 0.0) - other.get("max_time_sec", 0.0))
+        total_drift = abs(ref_total - cand_total)
+        within = max_drift <= tolerance_sec and total_drift <= tolerance_sec
+        passed = passed and within
+
+        report.append({
+            "zone_id": zone["zone_id"],
+            "zone_name": zone.get("zone_name"),
+            "max_time_drift_sec": round(max_drift, 2),
+            "total_time_drift_sec": round(total_drift, 2),
+            "fp32_trackers": zone.get("total_unique_trackers", 0),
+            "int8_trackers": other.get("total_unique_trackers", 0),
+            "within_tolerance": within,
+        })
+
+    return passed, report
+
+
+def run_guardrail(
+    weights_path: str,
+    int8_path: str,
+    names: Dict[int, str],
+    imgsz: int,
+    reference_clip: str,
+    zone_config_path: str,
+    tolerance_sec: float,
+    conf_threshold: float = 0.5,
+    iou_threshold: float = 0.5,
+    target_size: Optional[Tuple[int, int]] = None,
+) -> dict:
+    """
+    Compare FP32 and INT8 zone timings on a reference clip.
+
+    Returns:
+        Guardrail record: {"passed", "tolerance_sec", "reference_clip", "zones"}
+    """
+    from app.model.detectors.onnx_engine import OnnxRuntimeDetector
+    from app.model.zone_timing import run_time_in_zone
+
+    common = dict(
+        video_path=reference_clip,
+        zone_config_path=zone_config_path,
+        model_path=weights_path,
+        conf_threshold=conf_threshold,
+        iou_threshold=iou_threshold,
+        write_output_video=False,
+        target_size=target_size,
+    )
+
+    logger.info("INT8 guardrail: FP32 reference run on %s", reference_clip)
+    fp32 = run_time_in_zone(engine="onnx", **common).to_dict()
+
+    logger.info("INT8 guardrail: INT8 candidate run on %s", reference_clip)
+    candidate = OnnxRuntimeDetector(int8_path, names=names, imgsz=imgsz)
+    int8 = run_time_in_zone(detector=candidate, **common).to_dict()
+
+    passed, zones = compare_zone_timings(fp32, int8, tolerance_sec)
+    return {
+        "passed": passed,
+        "tolerance_sec": tolerance_sec,
+        "reference_clip": os.path.realpath(reference_clip),
+        "zones": zones,
+    }
+
+
+def prepare_int8_model(
+    weights_path: str,
+    imgsz: int,
+    export_dir: Path,
+    calibration_dir: Path,
+    num_calibration_frames: int,
+    reference_clip: Optional[str],
+    zone_config_path: str,
+    tolerance_sec: float,
+    target_size: Optional[Tuple[int, int]] = None,
+) -> Tuple[Optional[str], Dict[int, str], dict]:
+    """
+    Quantize best.pt to INT8 and run the guardrail, or reuse a cached result.
+
+    Returns:
+        (INT8 model path if activated else None, class names, manifest)
+    """
+    if not os.path.exists(weights_path):
+        raise FileNotFoundError(f"YOLO weights not found at: {weights_path}")
+
+    fp32_path, names = export_model(weights_path, "onnx", imgsz, export_dir)
+    export_dir = Path(export_dir)
+    export_path = export_dir / _export_key(weights_path, "onnx_int8", imgsz)
+
+    with _quantize_lock:
+        if not (export_path / "manifest.json").exists():
+            if not reference_clip or not os.path.exists(reference_clip):
+                raise ValueError(
+                    "INT8 guardrail needs a reference clip (PITSTOP_INT8_REFERENCE_CLIP); "
+                    f"got: {reference_clip or 'not set'}"
+                )
+
+            work_dir = Path(tempfile.mkdtemp(prefix=".quantize-", dir=export_dir))
+            try:
+                frames = sample_calibration_frames(calibration_dir, num_calibration_frames)
+                logger.info("Quantizing %s to INT8 with %d calibration frames", fp32_path, len(frames))
+                int8_path = work_dir / "model.int8.onnx"
+                quantize_onnx(fp32_path, str(int8_path), frames, imgsz)
+
+                guardrail = run_guardrail(
+                    weights_path, str(int8_path), names, imgsz,
+                    reference_clip, zone_config_path, tolerance_sec,
+                    target_size=target_size,
+                )
+
+                manifest = {
+                    "source": os.path.realpath(weights_path),
+                    "engine": "onnx_int8",
+                    "imgsz": imgsz,
+                    "model_file": int8_path.name,
+                    "names": {str(k): v for k, v in names.items()},
+                    "calibration_frames": len(frames),
+                    "activated": guardrail["passed"],
+                    "guardrail": guardrail,
+                }
+                with open(work_dir / "manifest.json", "w") as f:
+                    json.dump(manifest, f, indent=2)
+
+                try:
+                    os.rename(work_dir, export_path)
+                except OSError:
+                    shutil.rmtree(work_dir, ignore_errors=True)
+            except Exception:
+                shutil.rmtree(work_dir, ignore_errors=True)
+                raise
+
+        with open(export_path / "manifest.json", "r") as f:
+            manifest = json.load(f)
+
+    model_path, names = _load_manifest(export_path)
+    return (model_path if manifest.get("activated") else None), names, manifest
+
+
+def main():
+    """CLI entry point: quantize, run the guardrail and print the report."""
+    import argparse
+
+    from app import settings
+
+    parser = argparse.ArgumentParser(description="Prepare the INT8 pitstop detector")
+    parser.add_argument("--weights", default=settings.PITSTOP_YOLO_WEIGHTS_PATH, help="Path to best.pt")
+    parser.add_argument("--reference-clip", default=settings.PITSTOP_INT8_REFERENCE_CLIP,
+                        help="Clip used to compare FP32 and INT8 zone timings")
+    parser.add_argument("--zones", default=settings.ZONE_CONFIG_PATH, help="Zone config JSON")
+    parser.add_argument("--tolerance", type=float, default=settings.PITSTOP_INT8_TOLERANCE_SEC,
+                        help="Max allowed per-zone timing drift in seconds")
+    parser.add_argument("--calibration-frames", type=int,
+                        default=settings.PITSTOP_INT8_CALIBRATION_FRAMES)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    model_path, _, manifest = prepare_int8_model(
+        args.weights,
+        settings.PITSTOP_EXPORT_IMGSZ,
+        settings.PITSTOP_EXPORT_DIR,
+        settings.INPUT_DIR,
+        args.calibration_frames,
+        args.reference_clip,
+        args.zones,
+        args.tolerance,
+        target_size=(settings.PITSTOP_TARGET_WIDTH, settings.PITSTOP_TARGET_HEIGHT),
+    )
+
+    print(json.dumps(manifest["guardrail"], indent=2))
+    if model_path:
+        print(f"\nINT8 model activated: {model_path}")
+    else:
+        print("\nINT8 model NOT activated (zone timings drifted beyond tolerance)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Ultralytics (PyTorch eager) detector engine."""
+from __future__ import annotations
+
+from typing import List, Optional
+
+import numpy as np
+import supervision as sv
+from ultralytics import YOLO
+
+from app.model.detectors.base import DEFAULT_CONF, DEFAULT_IOU, Detector
+
+# Inference size assumed when the weights don't record one
+DEFAULT_IMGSZ = 640
+
+
+class UltralyticsDetector(Detector):
+    """Runs best.pt directly through ultralytics.YOLO."""
+
+    engine = "ultralytics"
+
+    def __init__(self, weights_path: str, device: Optional[str] = None):
+        self.model = YOLO(weights_path)
+        self.device = device or None
+
+        imgsz = getattr(self.model, "overrides", {}).get("imgsz") or DEFAULT_IMGSZ
+        if isinstance(imgsz, (list, tuple)):
+            imgsz = max(imgsz)
+
+        super().__init__(names=dict(self.model.names), imgsz=int(imgsz), source_path=weights_path)
+
+    @property
+    def size_bytes(self) -> int:
+        try:
+            param_bytes = sum(
+                p.numel() * p.element_size() for p in self.model.model.parameters()
+            )
+        except Exception:
+            return super().size_bytes
+        # Fused-layer copies, runtime buffers and warmup allocations
+        return int(param_bytes * 2)
+
+    def detect(
+        self,
+        frames: List[np.ndarray],
+        conf: float = DEFAULT_CONF,
+        iou: float = DEFAULT_IOU,
+        imgsz: Optional[int] = None,
+    ) -> List[sv.Detections]:
+        kwargs = {"imgsz": imgsz} if imgsz else {}
+        results = self.model(
+            frames,
+            verbose=False,
+            conf=conf,
+            iou=iou,
+            device=self.device,
+            **kwargs,
+        )
+        return [sv.Detections.from_ultralytics(r) for r in results]
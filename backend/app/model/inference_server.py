@@ -0,0 +1,305 @@
+"""
+In-process inference server shared by concurrently running jobs.
+
+Without it every running job leases its own detector instance from the
+model registry and runs it on single frames (time_in_zone) or small
+batches (classic), so N jobs mean N copies of the weights and N
+under-filled model calls competing for the same cores/GPU. The server
+instead owns one warm detector per model and runs it on one thread:
+
+- Jobs connect an InferenceClient, a Detector whose detect() enqueues the
+  frames and blocks until that request's detections are back, so it drops
+  into the existing detector= / checkout paths unchanged.
+- The server thread forms dynamic batches: it takes the first pending
+  request, then keeps collecting until the batch holds max_batch_size
+  frames or max_latency_ms has passed since the batch was opened.
+- Batches are filled round-robin over the connected jobs (one request per
+  job per round, rotating the starting job), so one job's large batches
+  cannot starve the others.
+- Requests are only batched together when they share conf/iou/imgsz.
+- The server stops and returns its detector to the registry when the last
+  client disconnects; the next job gets a new server on the still-warm model.
+
+Usage:
+    detector = connect_inference_server(weights_path, device, engine, name="job 1")
+    try:
+        detections = detector.detect([frame])[0]
+    finally:
+        detector.close()
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+import supervision as sv
+
+from app.model.detectors.base import DEFAULT_CONF, DEFAULT_IOU, Detector
+from app.model.model_registry import ModelKey, model_key, get_model_registry
+from app.utils.cpu_budget import get_cpu_budget, set_torch_threads
+
+# (conf, iou, imgsz): requests are only batched with identical settings
+BatchKey = Tuple[float, float, Optional[int]]
+
+
+class _Request:
+    """Frames from one detect() call, completed by the server thread."""
+
+    __slots__ = ("frames", "key", "result", "error", "done")
+
+    def __init__(self, frames: List[np.ndarray], key: BatchKey):
+        self.frames = frames
+        self.key = key
+        self.result: Optional[List[sv.Detections]] = None
+        self.error: Optional[BaseException] = None
+        self.done = threading.Event()
+
+
+class InferenceClient(Detector):
+    """A job's handle on an InferenceServer; behaves like the server's detector."""
+
+    def __init__(self, server: "InferenceServer", name: str):
+        detector = server.detector
+        super().__init__(names=detector.names, imgsz=detector.imgsz, source_path=detector.source_path)
+        self.engine = detector.engine
+        self.name = name
+        self._server = server
+
+    def detect(
+        self,
+        frames: List[np.ndarray],
+        conf: float = DEFAULT_CONF,
+        iou: float = DEFAULT_IOU,
+        imgsz: Optional[int] = None,
+    ) -> List[sv.Detections]:
+        if not frames:
+            return []
+        return self._server.submit(self, list(frames), (float(conf), float(iou), imgsz))
+
+    def warmup(self) -> None:
+        """The server's detector is already warm."""
+
+    def close(self) -> None:
+        """Disconnect from the server (stops it if this was the last client)."""
+        self._server.disconnect(self)
+
+
+class InferenceServer:
+    """Runs one detector on a background thread over dynamic cross-job batches."""
+
+    def __init__(
+        self,
+        weights_path: str,
+        device: Optional[str] = None,
+        engine: str = "ultralytics",
+        max_batch_size: int = 8,
+        max_latency_ms: float = 10.0,
+    ):
+        """
+        Args:
+            weights_path: YOLO weights (the detector is leased from the model registry).
+            device: Inference device; None lets the engine choose.
+            engine: Detector engine name.
+            max_batch_size: Maximum frames per model call.
+            max_latency_ms: Longest an opened batch waits for more requests.
+        """
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_latency_s = max(0.0, float(max_latency_ms)) / 1000.0
+        self.detector = get_model_registry().checkout(weights_path, device, engine)
+
+        self._cond = threading.Condition()
+        # Pending requests per connected client, in round-robin order
+        self._queues: "OrderedDict[int, Deque[_Request]]" = OrderedDict()
+        self._stopped = False
+        self.batches = 0
+        self.frames = 0
+
+        self._thread = threading.Thread(target=self._serve, name="inference-server", daemon=True)
+        self._thread.start()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stopped
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.frames / self.batches if self.batches else 0.0
+
+    def connect(self, name: str) -> Optional[InferenceClient]:
+        """Register a job. Returns None if the server is already shutting down."""
+        with self._cond:
+            if self._stopped:
+                return None
+            client = InferenceClient(self, name)
+            self._queues[id(client)] = deque()
+            return client
+
+    def disconnect(self, client: InferenceClient) -> None:
+        with self._cond:
+            if self._queues.pop(id(client), None) is None:
+                return
+            if not self._queues:
+                # Last job left: stop and give the detector back to the registry
+                self._stopped = True
+            self._cond.notify_all()
+
+    def submit(
+        self,
+        client: InferenceClient,
+        frames: List[np.ndarray],
+        key: BatchKey,
+    ) -> List[sv.Detections]:
+        """Queue frames for the next batch and wait for their detections."""
+        request = _Request(frames, key)
+        with self._cond:
+            queue = self._queues.get(id(client))
+            if queue is None or self._stopped:
+                raise RuntimeError(f"Inference client '{client.name}' is not connected")
+            queue.append(request)
+            self._cond.notify_all()
+
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _has_pending(self) -> bool:
+        return any(self._queues.values())
+
+    def _fill(self, batch: List[_Request]) -> int:
+        """
+        Move compatible pending requests into batch, one per job per round.
+
+        Caller holds the lock. Returns the number of frames in the batch.
+        """
+        frames = sum(len(r.frames) for r in batch)
+        key = batch[0].key if batch else None
+        took = True
+        while took and frames < self.max_batch_size:
+            took = False
+            for queue in self._queues.values():
+                if not queue or frames >= self.max_batch_size:
+                    continue
+                request = queue[0]
+                if key is not None and request.key != key:
+                    continue
+                # A request that doesn't fit waits for the next batch (unless it's alone)
+                if batch and frames + len(request.frames) > self.max_batch_size:
+                    continue
+                queue.popleft()
+                batch.append(request)
+                frames += len(request.frames)
+                key = request.key
+                took = True
+        return frames
+
+    def _next_batch(self) -> Optional[List[_Request]]:
+        """Wait for work and collect one batch; None once stopped and drained."""
+        with self._cond:
+            while not self._has_pending():
+                if self._stopped:
+                    return None
+                self._cond.wait()
+
+            batch: List[_Request] = []
+            frames = self._fill(batch)
+            deadline = time.monotonic() + self.max_latency_s
+            while frames < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._stopped:
+                    break
+                self._cond.wait(remaining)
+                frames = self._fill(batch)
+
+            # Next batch starts with the following job
+            if len(self._queues) > 1:
+                self._queues.move_to_end(next(iter(self._queues)))
+            return batch
+
+    def _serve(self) -> None:
+        # Model calls of all jobs run on this thread, so it gets the whole CPU budget
+        set_torch_threads(get_cpu_budget().cores)
+        try:
+            while True:
+                batch = self._next_batch()
+                if batch is None:
+                    return
+                self._run(batch)
+        finally:
+            get_model_registry().checkin(self.detector)
+
+    def _run(self, batch: List[_Request]) -> None:
+        conf, iou, imgsz = batch[0].key
+        try:
+            frames = [frame for request in batch for frame in request.frames]
+            results = self.detector.detect(frames, conf=conf, iou=iou, imgsz=imgsz)
+            self.batches += 1
+            self.frames += len(frames)
+
+            offset = 0
+            for request in batch:
+                request.result = results[offset:offset + len(request.frames)]
+                offset += len(request.frames)
+        except BaseException as e:  # re-raised in each waiting job
+            for request in batch:
+                request.error = e
+        finally:
+            for request in batch:
+                request.done.set()
+
+
+# Running servers, one per model key
+_servers: Dict[ModelKey, InferenceServer] = {}
+_servers_lock = threading.Lock()
+
+
+def connect_inference_server(
+    weights_path: str,
+    device: Optional[str] = None,
+    engine: str = "ultralytics",
+    name: str = "job",
+) -> InferenceClient:
+    """
+    Connect a job to the shared server for a model, starting it if needed.
+
+    The returned client must be closed when the job is done.
+    """
+    from app.settings import PITSTOP_SERVER_MAX_BATCH, PITSTOP_SERVER_MAX_LATENCY_MS
+
+    key = model_key(weights_path, device, engine)
+    with _servers_lock:
+        server = _servers.get(key)
+        client = server.connect(name) if server is not None else None
+        if client is None:
+            server = InferenceServer(
+                weights_path,
+                device=device,
+                engine=engine,
+                max_batch_size=PITSTOP_SERVER_MAX_BATCH,
+                max_latency_ms=PITSTOP_SERVER_MAX_LATENCY_MS,
+            )
+            _servers[key] = server
+            client = server.connect(name)
+
+        # Servers for replaced weights stop once their last job finishes
+        for stale_key in [k for k, s in _servers.items() if s.stopped]:
+            del _servers[stale_key]
+        return client
+
+
+def server_stats() -> List[dict]:
+    """Snapshot of running servers (for logs/diagnostics)."""
+    with _servers_lock:
+        return [
+            {
+                "weights_path": key[0],
+                "engine": key[3],
+                "batches": server.batches,
+                "frames": server.frames,
+                "mean_batch_size": round(server.mean_batch_size, 2),
+            }
+            for key, server in _servers.items()
+        ]
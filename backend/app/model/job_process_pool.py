@@ -0,0 +1,459 @@
+"""
+Process-pool executor for the YOLO pipeline (PITSTOP_EXECUTOR=process).
+
+With the default thread executor the frame loop's Python work (tracking,
+zone timing, annotation) runs in the API process and competes with request
+handling for the GIL, and a runaway job cannot be stopped. Here each job runs
+in a long-lived worker process instead:
+
+- Workers are spawned when the pool is created and preload the configured
+  model into their own model registry, so jobs start warm.
+- The job's thread in the parent only waits on the worker's pipe: logs and
+  progress come back as messages and are passed to the job's callbacks, and
+  CPU budget changes (threads, core pinning) are sent to the worker.
+- A job running longer than its timeout is killed with its worker
+  (SIGKILL); a worker that dies mid-job fails only that job.
+- Cancelling a job's CancelToken sets an Event shared with its worker, whose
+  frame loop stops within a frame; a worker that has not returned
+  CANCEL_GRACE_SECONDS later (e.g. stuck finalizing a video) is killed.
+- Workers are recycled (stopped and replaced on next use) after
+  max_jobs_per_worker jobs or once their RSS exceeds max_rss_mb, so leaked
+  memory and fragmentation don't accumulate.
+
+Worker processes are spawned, not forked (a forked copy of a process with
+loaded models and native thread pools is not safe), and are not daemonic so
+segment-parallel runs can start their own process pools. Each worker leads
+its own process group, and killing a worker kills the whole group, so those
+segment processes never outlive a killed job.
+"""
+from __future__ import annotations
+
+import atexit
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from multiprocessing.connection import Connection
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+from app.utils.cancellation import CancelToken, JobCancelledError
+from app.utils.cpu_budget import CpuLease, set_library_threads
+
+if TYPE_CHECKING:
+    from app.model.pitstop_yolo_runner import RunResult
+
+MP_START_METHOD = "spawn"
+
+# How often a waiting job checks its timeout and CPU share without worker messages
+POLL_INTERVAL_SECONDS = 1.0
+
+# Grace period for a worker to exit after a stop message before it is killed
+STOP_TIMEOUT_SECONDS = 5.0
+
+# Grace period for a cancelled job to return before its worker is killed
+CANCEL_GRACE_SECONDS = 10.0
+
+
+class JobTimeoutError(RuntimeError):
+    """A job exceeded its timeout and its worker process was killed."""
+
+
+class WorkerDiedError(RuntimeError):
+    """A worker process exited while running a job."""
+
+
+def _rss_bytes() -> Optional[int]:
+    """Current resident set size of this process (Linux), None if unknown."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def process_video_job(
+    runner_kwargs: Dict[str, Any],
+    process_kwargs: Dict[str, Any],
+    log_cb: Callable[[str], None],
+    progress_cb: Callable[[float], None],
+    cancel_token: Optional[CancelToken] = None,
+) -> "RunResult":
+    """
+    Run PitstopYoloRunner in a worker process.
+
+    Returns:
+        The runner's RunResult (picklable, sent back to the parent)
+    """
+    from app.model.pitstop_yolo_runner import PitstopYoloRunner
+
+    runner = PitstopYoloRunner(**runner_kwargs)
+    return runner.process_video(
+        log_cb=log_cb, progress_cb=progress_cb, cancel_token=cancel_token, **process_kwargs
+    )
+
+
+def _preload_model(weights_path: str, device: Optional[str], engine: str) -> None:
+    """Load a detector into this worker's model registry so jobs start warm."""
+    from app.model.model_registry import get_model_registry
+
+    if not os.path.exists(weights_path):
+        return
+    registry = get_model_registry()
+    registry.checkin(registry.checkout(weights_path, device, engine))
+
+
+def _worker_main(
+    conn: Connection,
+    cancel_event: Any,
+    preload: Optional[Tuple[str, Optional[str], str]],
+) -> None:
+    """Worker process loop: run jobs received over the pipe until stopped."""
+    # Own process group (POSIX), so killing the worker also kills the segment
+    # processes its jobs start
+    if hasattr(os, "setsid"):
+        os.setsid()
+    # Ctrl+C goes to the whole process group; the parent decides when workers stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    if preload:
+        try:
+            _preload_model(*preload)
+        except Exception as e:
+            print(f"Worker {os.getpid()}: model preload failed: {e}", flush=True)
+
+    def handle_control() -> None:
+        """Apply control messages the parent sent while a job runs."""
+        while conn.poll():
+            kind, value = conn.recv()
+            if kind == "threads":
+                set_library_threads(value)
+
+    def log_cb(msg: str) -> None:
+        conn.send(("log", msg))
+
+    def progress_cb(p: float) -> None:
+        handle_control()
+        conn.send(("progress", p))
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            return
+        kind = message[0]
+        if kind == "stop":
+            return
+        if kind == "threads":
+            # CPU share changed after the last job's final progress call
+            set_library_threads(message[1])
+            continue
+        if kind != "run":
+            continue
+
+        _, func, kwargs, threads = message
+        if threads:
+            set_library_threads(threads)
+        try:
+            result = func(
+                log_cb=log_cb,
+                progress_cb=progress_cb,
+                cancel_token=CancelToken(cancel_event),
+                **kwargs,
+            )
+            # Apply control messages sent after the last progress call
+            handle_control()
+            conn.send(("result", result, _rss_bytes()))
+        except Exception as e:
+            handle_control()
+            try:
+                conn.send(("error", e, _rss_bytes()))
+            except Exception:
+                # Exception not picklable: send its text
+                conn.send(("error", RuntimeError(f"{type(e).__name__}: {e}"), _rss_bytes()))
+
+
+class _Worker:
+    """Parent-side handle of one worker process."""
+
+    def __init__(self, ctx, preload: Optional[Tuple[str, Optional[str], str]]):
+        self.conn, child_conn = ctx.Pipe()
+        # Set by the parent to cancel the running job; cleared before each job
+        self.cancel_event = ctx.Event()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.cancel_event, preload),
+            name="pitstop-job-worker",
+            daemon=False,
+        )
+        self.process.start()
+        child_conn.close()
+        self.jobs_done = 0
+        self.rss_bytes: Optional[int] = None
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.process.pid
+
+    def stop(self) -> None:
+        """Ask the worker to exit; kill it if it doesn't."""
+        try:
+            self.conn.send(("stop",))
+        except (OSError, ValueError):
+            pass
+        self.process.join(STOP_TIMEOUT_SECONDS)
+        if self.process.is_alive():
+            self.kill()
+        self.conn.close()
+
+    def kill(self) -> None:
+        """Kill the worker and every process it started (its process group)."""
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except (AttributeError, OSError):
+            # No killpg (Windows), or the worker has not called setsid() yet
+            self.process.kill()
+        self.process.join()
+
+
+class JobProcessPool:
+    """Long-lived worker processes running one job each at a time."""
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        max_jobs_per_worker: int = 0,
+        max_rss_mb: int = 0,
+        preload: Optional[Tuple[str, Optional[str], str]] = None,
+    ):
+        """
+        Args:
+            max_workers: Worker processes (jobs run at once).
+            max_jobs_per_worker: Recycle a worker after this many jobs (0 = never).
+            max_rss_mb: Recycle a worker whose RSS exceeds this after a job (0 = no limit).
+            preload: (weights_path, device, engine) loaded by every new worker.
+        """
+        self.max_workers = max(1, int(max_workers))
+        self.max_jobs_per_worker = max(0, int(max_jobs_per_worker))
+        self.max_rss_bytes = max(0, int(max_rss_mb)) * 1024 * 1024
+        self.preload = preload
+        self._ctx = multiprocessing.get_context(MP_START_METHOD)
+        self._cond = threading.Condition()
+        self._idle: List[_Worker] = []
+        self._busy = 0
+        self._closed = False
+        self.workers_recycled = 0
+
+        # Start all workers now so they preload while the pool is idle
+        for _ in range(self.max_workers):
+            self._idle.append(_Worker(self._ctx, self.preload))
+
+    def _checkout(self) -> _Worker:
+        with self._cond:
+            while not self._closed and not self._idle and self._busy >= self.max_workers:
+                self._cond.wait()
+            if self._closed:
+                raise RuntimeError("Job process pool is shut down")
+            self._busy += 1
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.process.is_alive():
+                    return worker
+                worker.conn.close()
+        try:
+            return _Worker(self._ctx, self.preload)
+        except Exception:
+            with self._cond:
+                self._busy -= 1
+                self._cond.notify()
+            raise
+
+    def _checkin(self, worker: Optional[_Worker]) -> None:
+        """Return a worker after a job (None = it was killed); recycle if due."""
+        recycle = worker is not None and (
+            (self.max_jobs_per_worker and worker.jobs_done >= self.max_jobs_per_worker)
+            or (self.max_rss_bytes and worker.rss_bytes and worker.rss_bytes > self.max_rss_bytes)
+        )
+        if recycle:
+            worker.stop()
+            self.workers_recycled += 1
+        with self._cond:
+            self._busy -= 1
+            if worker is not None and not recycle:
+                if self._closed:
+                    worker.stop()
+                else:
+                    self._idle.append(worker)
+            self._cond.notify()
+
+    def run(
+        self,
+        func: Callable[..., Any],
+        kwargs: Dict[str, Any],
+        log_cb: Optional[Callable[[str], None]] = None,
+        progress_cb: Optional[Callable[[float], None]] = None,
+        timeout: Optional[float] = None,
+        cpu: Optional[CpuLease] = None,
+        cancel_token: Optional[CancelToken] = None,
+    ) -> Any:
+        """
+        Run func(log_cb=..., progress_cb=..., cancel_token=..., **kwargs) in a worker and wait for it.
+
+        Blocks the calling thread (cheaply: it only waits on the pipe).
+
+        Args:
+            func: Module-level (picklable) job function.
+            kwargs: Picklable keyword arguments for func.
+            log_cb: Called with each log line the job emits.
+            progress_cb: Called with each progress value the job emits.
+            timeout: Seconds before the job and its worker are killed (None = no limit).
+            cpu: The job's CPU budget lease; share changes are applied to the worker.
+            cancel_token: The job's cancel token; cancelling it cancels the
+                worker's token (and kills the worker after CANCEL_GRACE_SECONDS).
+
+        Returns:
+            func's return value
+
+        Raises:
+            JobTimeoutError: If the job exceeded timeout
+            JobCancelledError: If cancel_token was cancelled
+            WorkerDiedError: If the worker process exited mid-job
+            Exception: Whatever func raised
+        """
+        worker = self._checkout()
+        deadline = time.monotonic() + timeout if timeout else None
+        cancel_deadline: Optional[float] = None
+        finished = False
+        worker.cancel_event.clear()
+        stop_watching = cancel_token.on_cancel(worker.cancel_event.set) if cancel_token else None
+        try:
+            share = self._apply_share(worker, cpu, None)
+            worker.conn.send(("run", func, kwargs, share[0] if share else None))
+            while True:
+                if cancel_deadline is None and cancel_token is not None and cancel_token.cancelled:
+                    cancel_deadline = time.monotonic() + CANCEL_GRACE_SECONDS
+                wait = POLL_INTERVAL_SECONDS
+                for limit in (deadline, cancel_deadline):
+                    if limit is not None:
+                        wait = min(wait, max(0.0, limit - time.monotonic()))
+                if not worker.conn.poll(wait):
+                    if cancel_deadline is not None and time.monotonic() >= cancel_deadline:
+                        worker.kill()
+                        worker.conn.close()
+                        worker = None
+                        raise JobCancelledError("Job cancelled (worker killed after the grace period)")
+                    if deadline is not None and time.monotonic() >= deadline:
+                        worker.kill()
+                        worker.conn.close()
+                        worker = None
+                        raise JobTimeoutError(f"Job exceeded its {timeout:g}s timeout and was killed")
+                    share = self._apply_share(worker, cpu, share)
+                    continue
+
+                try:
+                    message = worker.conn.recv()
+                except (EOFError, OSError):
+                    worker.kill()
+                    exitcode = worker.process.exitcode
+                    worker.conn.close()
+                    worker = None
+                    raise WorkerDiedError(f"Worker process died (exit code {exitcode})")
+
+                kind = message[0]
+                if kind == "log":
+                    if log_cb:
+                        log_cb(message[1])
+                elif kind == "progress":
+                    if progress_cb:
+                        progress_cb(message[1])
+                    share = self._apply_share(worker, cpu, share)
+                else:
+                    finished = True
+                    worker.jobs_done += 1
+                    worker.rss_bytes = message[2]
+                    if kind == "error":
+                        raise message[1]
+                    return message[1]
+        finally:
+            if stop_watching:
+                stop_watching()
+            if worker is not None and not finished:
+                # Failed on this side mid-job (callback, pipe): the worker's state is unknown
+                worker.kill()
+                worker.conn.close()
+                worker = None
+            self._checkin(worker)
+
+    @staticmethod
+    def _apply_share(
+        worker: _Worker,
+        cpu: Optional[CpuLease],
+        applied: Optional[Tuple[int, Optional[List[int]]]],
+    ) -> Optional[Tuple[int, Optional[List[int]]]]:
+        """Send a changed CPU share to the worker and pin its cores; returns the share."""
+        if cpu is None:
+            return None
+        share = (cpu.threads, cpu.cpus)
+        if share == applied:
+            return applied
+        if applied is not None:
+            worker.conn.send(("threads", share[0]))
+        if share[1] is not None:
+            try:
+                os.sched_setaffinity(worker.pid, share[1])
+            except (AttributeError, OSError):
+                pass
+        return share
+
+    def stats(self) -> dict:
+        """Snapshot of the pool (for logs/diagnostics)."""
+        with self._cond:
+            return {
+                "workers": self.max_workers,
+                "busy": self._busy,
+                "idle": len(self._idle),
+                "recycled": self.workers_recycled,
+            }
+
+    def shutdown(self) -> None:
+        """Stop idle workers; busy ones stop when their job returns."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for worker in idle:
+            worker.stop()
+
+
+# Singleton pool instance
+_pool_instance: Optional[JobProcessPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_job_process_pool() -> JobProcessPool:
+    """Get the process-wide job process pool (workers spawned on first use)."""
+    global _pool_instance
+    with _pool_lock:
+        if _pool_instance is None:
+            from app import settings
+            _pool_instance = JobProcessPool(
+                max_workers=settings.PITSTOP_WORKER_CONCURRENCY,
+                max_jobs_per_worker=settings.PITSTOP_WORKER_MAX_JOBS,
+                max_rss_mb=settings.PITSTOP_WORKER_MAX_RSS_MB,
+                preload=(
+                    settings.PITSTOP_YOLO_WEIGHTS_PATH,
+                    settings.PITSTOP_DEVICE,
+                    settings.PITSTOP_DETECTOR_ENGINE,
+                ),
+            )
+            atexit.register(shutdown_job_process_pool)
+        return _pool_instance
+
+
+def shutdown_job_process_pool() -> None:
+    """Stop the pool's workers (no-op if the pool was never created)."""
+    global _pool_instance
+    with _pool_lock:
+        pool, _pool_instance = _pool_instance, None
+    if pool is not None:
+        pool.shutdown()
@@ -0,0 +1,93 @@
+"""
+Frame-stride inference helpers.
+
+With detect_every_n > 1, YOLO only runs on keyframes (every n-th frame).
+Between keyframes, boxes are carried forward so that per-frame consumers
+(zone timers, annotation) still see a detection set for every frame.
+
+- is_keyframe(): keyframe schedule shared by both processing modes
+- TrackExtrapolator: constant-velocity carry-forward of tracked boxes,
+  using the displacement of each tracker_id between its last two keyframes
+"""
+from __future__ import annotations
+
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import supervision as sv
+
+
+def is_keyframe(frame_index: int, detect_every_n: int) -> bool:
+    """Whether detection should run on this (0-based) frame."""
+    return detect_every_n <= 1 or frame_index % detect_every_n == 0
+
+
+class TrackExtrapolator:
+    """
+    Carries tracked detections forward between detection keyframes.
+
+    On each keyframe, update() records the tracked detections and estimates a
+    per-frame velocity for every tracker_id seen on the previous keyframe.
+    predict() returns the keyframe detections with boxes advanced by
+    velocity * frames-since-keyframe (clipped to the frame), so zone
+    membership follows objects that keep moving between detections.
+    """
+
+    def __init__(self, frame_size: Optional[Tuple[int, int]] = None):
+        """
+        Args:
+            frame_size: Optional (width, height) used to clip predicted boxes.
+        """
+        self.frame_size = frame_size
+        self._keyframe_index: Optional[int] = None
+        self._detections: sv.Detections = sv.Detections.empty()
+        self._velocities: np.ndarray = np.zeros((0, 4), dtype=np.float32)
+        self._last_boxes: Dict[int, np.ndarray] = {}
+
+    def update(self, detections: sv.Detections, frame_index: int) -> None:
+        """Record tracked detections from a keyframe."""
+        velocities = np.zeros((len(detections), 4), dtype=np.float32)
+        boxes: Dict[int, np.ndarray] = {}
+
+        if detections.tracker_id is not None and self._keyframe_index is not None:
+            gap = max(1, frame_index - self._keyframe_index)
+            for i, tid in enumerate(detections.tracker_id):
+                prev = self._last_boxes.get(int(tid))
+                if prev is not None:
+                    velocities[i] = (detections.xyxy[i] - prev) / gap
+
+        if detections.tracker_id is not None:
+            for i, tid in enumerate(detections.tracker_id):
+                boxes[int(tid)] = detections.xyxy[i].astype(np.float32)
+
+        self._keyframe_index = frame_index
+        self._detections = detections
+        self._velocities = velocities
+        self._last_boxes = boxes
+
+    def hold(self, detections: sv.Detections, frame_index: int) -> None:
+        """
+        Re-anchor on a keyframe whose detection was skipped as static (motion gate).
+
+        The carried detections become the new keyframe with zero velocity, so
+        boxes stay put until the next real detection instead of drifting on
+        the velocity of an ever older keyframe.
+        """
+        self.update(detections, frame_index)
+        self._velocities = np.zeros((len(detections), 4), dtype=np.float32)
+
+    def predict(self, frame_index: int) -> sv.Detections:
+        """Detections for a non-keyframe, extrapolated from the last keyframe."""
+        if self._keyframe_index is None or len(self._detections) == 0:
+            return self._detections
+
+        steps = frame_index - self._keyframe_index
+        predicted = self._detections[np.arange(len(self._detections))]
+        predicted.xyxy = self._detections.xyxy + self._velocities * steps
+
+        if self.frame_size is not None:
+            width, height = self.frame_size
+            predicted.xyxy[:, [0, 2]] = np.clip(predicted.xyxy[:, [0, 2]], 0, width)
+            predicted.xyxy[:, [1, 3]] = np.clip(predicted.xyxy[:, [1, 3]], 0, height)
+
+        return predicted
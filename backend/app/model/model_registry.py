@@ -0,0 +1,206 @@
+"""
+Process-wide YOLO model registry.
+
+Loading YOLO weights (and the first, graph-warming inference) takes seconds,
+which dominates job start latency for short clips. The registry keeps loaded
+detectors warm across jobs:
+
+- Detectors are keyed by (weights path, file mtime, device, engine), so
+  replacing best.pt on disk is picked up by the next job without restarting
+  the service.
+- Each detector instance is leased to one job at a time (Ultralytics
+  predictors are not thread-safe). Concurrent jobs on the same weights get
+  their own instance; instances return to the idle pool when the job finishes.
+- Idle instances are evicted least-recently-used when the estimated memory of
+  all loaded instances exceeds the configured budget.
+
+Usage:
+    with get_model_registry().acquire(weights_path, device, engine) as detector:
+        detections = detector.detect([frame])[0]
+"""
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.model.detectors import Detector, create_detector
+
+# (absolute weights path, mtime in ns, device, engine)
+ModelKey = Tuple[str, int, str, str]
+
+
+@dataclass
+class _Entry:
+    """A loaded detector instance and its bookkeeping."""
+    key: ModelKey
+    model: Detector
+    size_bytes: int
+    in_use: bool = False
+
+
+def model_key(weights_path: str, device: Optional[str], engine: str) -> ModelKey:
+    path = os.path.realpath(weights_path)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"YOLO weights not found at: {weights_path}")
+    return (path, os.stat(path).st_mtime_ns, device or "", engine or "ultralytics")
+
+
+class ModelRegistry:
+    """Thread-safe cache of warm detector instances with LRU eviction."""
+
+    def __init__(self, memory_budget_bytes: int):
+        self.memory_budget_bytes = int(memory_budget_bytes)
+        self._lock = threading.Lock()
+        # Idle and leased instances, least recently used first
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        # Serialize loads of the same key so concurrent jobs don't double-load.
+        # Per full key, not per path: loading one engine may check out another
+        # engine of the same weights (the onnx_int8 guardrail runs FP32 ONNX).
+        self._load_locks: Dict[ModelKey, threading.Lock] = {}
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(e.size_bytes for e in self._entries.values())
+
+    def _load(self, key: ModelKey) -> _Entry:
+        path, _, device, engine = key
+        detector = create_detector(engine, path, device=device or None)
+        # Warm up: the first call builds/fuses the graph and allocates buffers
+        detector.warmup()
+        return _Entry(key=key, model=detector, size_bytes=detector.size_bytes)
+
+    def _take_idle(self, key: ModelKey) -> Optional[_Entry]:
+        """Lease an idle instance for key (caller holds the lock)."""
+        for entry_id, entry in self._entries.items():
+            if entry.key == key and not entry.in_use:
+                entry.in_use = True
+                self._entries.move_to_end(entry_id)
+                return entry
+        return None
+
+    def _drop_stale(self, key: ModelKey) -> None:
+        """Drop idle instances of a weights file that has since been replaced on disk."""
+        path, mtime = key[0], key[1]
+        for entry_id, entry in list(self._entries.items()):
+            if entry.key[0] == path and entry.key[1] != mtime and not entry.in_use:
+                del self._entries[entry_id]
+        # Load locks of replaced weights are never used again
+        for lock_key in [k for k in self._load_locks if k[0] == path and k[1] != mtime]:
+            del self._load_locks[lock_key]
+
+    def _evict(self) -> None:
+        """Evict idle instances LRU-first until within budget (caller holds the lock)."""
+        for entry_id, entry in list(self._entries.items()):
+            if self.total_bytes <= self.memory_budget_bytes:
+                return
+            if not entry.in_use:
+                del self._entries[entry_id]
+
+    def checkout(
+        self,
+        weights_path: str,
+        device: Optional[str] = None,
+        engine: str = "ultralytics",
+    ) -> Detector:
+        """
+        Lease a warm detector for exclusive use, loading it if needed.
+
+        Every checkout must be paired with checkin(), or use acquire().
+        """
+        key = model_key(weights_path, device, engine)
+
+        with self._lock:
+            self._drop_stale(key)
+            entry = self._take_idle(key)
+            if entry is not None:
+                return entry.model
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        with load_lock:
+            # Another thread may have finished loading and returned an instance meanwhile
+            with self._lock:
+                entry = self._take_idle(key)
+                if entry is not None:
+                    return entry.model
+
+            entry = self._load(key)
+            entry.in_use = True
+
+            with self._lock:
+                self._entries[id(entry.model)] = entry
+                self._evict()
+            return entry.model
+
+    def checkin(self, model: Detector) -> None:
+        """Return a leased detector to the idle pool."""
+        with self._lock:
+            entry = self._entries.get(id(model))
+            if entry is None:
+                return
+            entry.in_use = False
+            self._entries.move_to_end(id(model))
+            self._evict()
+
+    @contextmanager
+    def acquire(
+        self,
+        weights_path: str,
+        device: Optional[str] = None,
+        engine: str = "ultralytics",
+    ) -> Iterator[Detector]:
+        """Context manager around checkout()/checkin()."""
+        model = self.checkout(weights_path, device, engine)
+        try:
+            yield model
+        finally:
+            self.checkin(model)
+
+    def clear(self) -> None:
+        """Drop all idle instances."""
+        with self._lock:
+            for entry_id, entry in list(self._entries.items()):
+                if not entry.in_use:
+                    del self._entries[entry_id]
+
+    def stats(self) -> List[dict]:
+        """Snapshot of loaded instances (for logs/diagnostics)."""
+        with self._lock:
+            return [
+                {
+                    "weights_path": e.key[0],
+                    "mtime_ns": e.key[1],
+                    "device": e.key[2] or "auto",
+                    "engine": e.key[3],
+                    "size_bytes": e.size_bytes,
+                    "in_use": e.in_use,
+                }
+                for e in self._entries.values()
+            ]
+
+
+# Singleton registry instance
+_registry_instance: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """Get the process-wide model registry (created on first use)."""
+    global _registry_instance
+    with _registry_lock:
+        if _registry_instance is None:
+            from app.settings import PITSTOP_MODEL_CACHE_MB
+            _registry_instance = ModelRegistry(
+                memory_budget_bytes=PITSTOP_MODEL_CACHE_MB * 1024 * 1024,
+            )
+        return _registry_instance
+
+
+def reset_model_registry() -> None:
+    """Reset the registry (useful for testing)."""
+    global _registry_instance
+    with _registry_lock:
+        _registry_instance = None
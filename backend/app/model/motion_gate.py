@@ -0,0 +1,99 @@
+"""
+Motion gate for skipping inference on static frames.
+
+Pit-lane footage has long idle stretches (empty box, stationary car). The gate
+compares a small, blurred grayscale copy of each frame against the last frame
+that went through the detector, optionally only inside the zone polygons. When
+the mean absolute difference stays under a threshold the scene is considered
+static and the caller reuses the previous detections instead of running YOLO.
+
+Comparing against the last *inferred* frame (not the previous frame) means
+slow drift still accumulates and eventually triggers inference, and
+max_skip_frames bounds how long detections can go stale.
+"""
+from __future__ import annotations
+
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+# Frames are downscaled to this width before differencing
+ANALYSIS_WIDTH = 160
+
+
+class MotionGate:
+    """Decides per frame whether the scene changed enough to need detection."""
+
+    def __init__(
+        self,
+        threshold: float = 2.0,
+        max_skip_frames: int = 30,
+        polygons: Optional[List[np.ndarray]] = None,
+    ):
+        """
+        Args:
+            threshold: Mean absolute gray-level difference (0-255) below which
+                a frame counts as static.
+            max_skip_frames: Force inference after this many consecutive skips.
+            polygons: Optional regions (in frame coordinates) to measure motion
+                in. If None or empty, the whole frame is used.
+        """
+        self.threshold = float(threshold)
+        self.max_skip_frames = int(max_skip_frames)
+        self.polygons = polygons or []
+        self.frames_checked = 0
+        self.frames_skipped = 0
+        self._reference: Optional[np.ndarray] = None
+        self._mask: Optional[np.ndarray] = None
+        self._skipped_in_row = 0
+
+    @property
+    def skip_ratio(self) -> float:
+        """Fraction of checked frames on which inference was skipped."""
+        if self.frames_checked == 0:
+            return 0.0
+        return self.frames_skipped / self.frames_checked
+
+    def _prepare(self, frame: np.ndarray) -> np.ndarray:
+        """Downscale, grayscale and blur a frame for differencing."""
+        height, width = frame.shape[:2]
+        scale = ANALYSIS_WIDTH / float(width)
+        small_size = (ANALYSIS_WIDTH, max(1, int(round(height * scale))))
+        small = cv2.resize(frame, small_size, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+        if self._mask is None and self.polygons:
+            mask = np.zeros(gray.shape, dtype=np.uint8)
+            scaled = [np.round(p * scale).astype(np.int32) for p in self.polygons]
+            cv2.fillPoly(mask, scaled, 255)
+            self._mask = mask if mask.any() else None
+
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def motion_energy(self, small: np.ndarray) -> float:
+        """Mean absolute difference against the reference frame (inside the mask)."""
+        diff = cv2.absdiff(small, self._reference)
+        return float(cv2.mean(diff, mask=self._mask)[0])
+
+    def should_skip(self, frame: np.ndarray) -> bool:
+        """
+        Check a frame that would otherwise run detection.
+
+        Returns True if the scene is static and previous detections can be reused.
+        """
+        self.frames_checked += 1
+        small = self._prepare(frame)
+
+        if (
+            self._reference is not None
+            and self._skipped_in_row < self.max_skip_frames
+            and self.motion_energy(small) < self.threshold
+        ):
+            self._skipped_in_row += 1
+            self.frames_skipped += 1
+            return True
+
+        self._reference = small
+        self._skipped_in_row = 0
+        return False
@@ -5,11 +5,12 @@ This module supports two processing modes:
 - MODE=time_in_zone: Supervision-based tracking with zone timing
 
 Both modes:
-- Load a YOLO model (Ultralytics)
-- Read an input video with OpenCV
-- Run inference per frame
-- Write an output MP4
-- Transcode to browser-compatible H.264 using ffmpeg
+- Lease a warm YOLO detector from the process-wide model registry
+  (Ultralytics, ONNX Runtime, OpenVINO or OpenCV DNN engine), or share one
+  through the cross-job batching inference server (shared_inference=True)
+- Decode the input video (threaded PyAV or OpenCV)
+- Run inference per frame (classic mode batches frames per model call)
+- Encode a browser-compatible H.264 MP4 by piping frames into ffmpeg
 
 Swap LocalStorage -> S3 later by changing the caller; this runner only needs file paths.
 """
@@ -23,16 +24,56 @@ from pathlib import Path
 from typing import Callable, Dict, List, Optional, Tuple, Any
 
 import cv2
-from ultralytics import YOLO
 
+from app.model.detectors import Detector
+from app.model.keyframes import is_keyframe
+from app.model.model_registry import get_model_registry
+from app.model.motion_gate import MotionGate
+from app.model.shot_gate import ShotGate, format_skipped_ranges, load_reference_frame
+from app.utils.cancellation import CancelToken, JobCancelledError
+from app.utils.video_decode import open_video
 from app.utils.video_transcode import (
-    ensure_browser_mp4,
+    H264PipeWriter,
     cleanup_temp_file,
 )
 
 LogCB = Optional[Callable[[str], None]]
 ProgressCB = Optional[Callable[[float], None]]
 
+# Bounds for automatic batch sizing in classic mode
+MAX_AUTO_BATCH_SIZE = 16
+# Fraction of currently available memory a single batch may occupy
+AUTO_BATCH_MEMORY_FRACTION = 0.25
+# Skipped shot ranges listed individually in the job log (the rest are summarized)
+MAX_LOGGED_SKIPPED_RANGES = 20
+# Rough per-frame working set on top of the decoded frame: the 640x640 float32
+# input tensor plus intermediate activations of a small YOLO model.
+PER_FRAME_MODEL_BYTES = 640 * 640 * 3 * 4 * 8
+
+
+def _available_memory_bytes() -> Optional[int]:
+    """Best-effort available physical memory (None if it cannot be determined)."""
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def auto_batch_size(frame_width: int, frame_height: int) -> int:
+    """
+    Pick a classic-mode batch size from available memory.
+    
+    Each batched frame costs its decoded BGR buffer plus the model's
+    per-image working set. The batch is sized to fit within a fraction
+    of available memory and clamped to [1, MAX_AUTO_BATCH_SIZE].
+    """
+    available = _available_memory_bytes()
+    if not available:
+        return 1
+    per_frame = frame_width * frame_height * 3 + PER_FRAME_MODEL_BYTES
+    budget = int(available * AUTO_BATCH_MEMORY_FRACTION)
+    return max(1, min(MAX_AUTO_BATCH_SIZE, budget // per_frame))
+
 
 class ProcessingMode(str, Enum):
     """Processing mode for the pitstop runner."""
@@ -42,14 +83,36 @@ class ProcessingMode(str, Enum):
 
 @dataclass
 class RunResult:
-    output_path: str
+    # None when the video was not rendered (analysis-only run)
+    output_path: Optional[str]
     frames_processed: int
     mode: str = "classic"
     zone_summary: Optional[Dict[str, Any]] = None
+    # Fraction of detection frames skipped by the motion gate (None if disabled)
+    motion_skip_ratio: Optional[float] = None
+    # Per-frame track store written for re-zoning (time_in_zone with tracks_path)
+    tracks_path: Optional[str] = None
+    # Frame ranges the shot gate skipped as other cameras (None if disabled)
+    skipped_ranges: Optional[List[Dict[str, Any]]] = None
+
+
+def _log_skipped_ranges(log: Callable[[str], None], skipped_ranges: List[Dict[str, Any]]) -> None:
+    """Log the shot ranges skipped as not from the pit camera."""
+    skipped_frames = sum(r["end_frame"] - r["start_frame"] for r in skipped_ranges)
+    log(f"Shot gate skipped {skipped_frames} frames in {len(skipped_ranges)} non-pit-camera ranges")
+    for r in skipped_ranges[:MAX_LOGGED_SKIPPED_RANGES]:
+        log(f"  Skipped {r['start_sec']:.2f}s-{r['end_sec']:.2f}s (frames {r['start_frame']}-{r['end_frame']})")
+    if len(skipped_ranges) > MAX_LOGGED_SKIPPED_RANGES:
+        log(f"  ... and {len(skipped_ranges) - MAX_LOGGED_SKIPPED_RANGES} more ranges")
 
 
 class PitstopYoloRunner:
-    """Loads YOLO weights once and can process videos multiple times."""
+    """
+    Processes videos with YOLO weights leased from the model registry.
+    
+    Models stay warm in the registry across runners and jobs, so creating
+    a runner per job does not reload the weights.
+    """
 
     def __init__(
         self,
@@ -59,7 +122,78 @@ class PitstopYoloRunner:
         zone_config_path: Optional[str] = None,
         iou_threshold: float = 0.5,
         target_size: Optional[Tuple[int, int]] = None,
+        batch_size: Optional[int] = None,
+        device: Optional[str] = None,
+        engine: str = "ultralytics",
+        detect_every_n: int = 1,
+        motion_threshold: Optional[float] = None,
+        motion_max_skip_frames: int = 30,
+        roi_crop: bool = False,
+        roi_padding: int = 32,
+        segment_workers: int = 1,
+        segment_overlap_frames: int = 60,
+        min_segment_seconds: float = 30.0,
+        decoder: str = "auto",
+        decoder_threads: int = 0,
+        encoder_threads: int = 0,
+        cpu_threads: Optional[int] = None,
+        shared_inference: bool = False,
+        event_windowing: bool = False,
+        scan_fps: float = 2.0,
+        scan_width: int = 480,
+        event_padding_seconds: float = 3.0,
+        shot_filter: bool = False,
+        shot_reference: Optional[str] = None,
+        shot_match_threshold: float = 0.4,
+        tracker: str = "bytetrack",
     ):
+        """
+        Args:
+            batch_size: Frames per model call in classic mode.
+                None or 0 sizes the batch automatically from available memory.
+            device: Inference device (e.g. "cpu", "cuda:0"); None lets Ultralytics choose.
+            engine: Detector engine ("ultralytics", "onnx", "onnx_int8", "openvino", "opencv").
+            detect_every_n: Run detection on every n-th frame only. Classic mode
+                holds the last keyframe's boxes; time_in_zone extrapolates tracks.
+            motion_threshold: Enable the motion gate; frames whose mean gray-level
+                change (inside the zones in time_in_zone mode) is below this reuse
+                the previous detections. None disables the gate.
+            motion_max_skip_frames: Force inference after this many gated frames in a row.
+            roi_crop: time_in_zone only: detect on the padded union of the zone
+                polygons instead of the full frame.
+            roi_padding: Pixels of context around the zone union for roi_crop.
+            segment_workers: time_in_zone only: split long videos into this many
+                segments processed in parallel worker processes (1 = serial).
+            segment_overlap_frames: Frames re-processed before each segment to
+                warm up tracking and stitch tracks across segment boundaries.
+            min_segment_seconds: Use fewer segments rather than shorter ones.
+            decoder: Video decoder backend ("auto", "pyav", "opencv"); PyAV
+                decodes threaded and scales to target_size inside the decoder.
+            decoder_threads: PyAV decoder threads (0 = FFmpeg default).
+            encoder_threads: ffmpeg H.264 encoder threads (0 = one per core).
+            cpu_threads: Cores this run may use (its CPU budget share); caps
+                segment-parallel workers. None means all cores.
+            shared_inference: Send frames to the process-wide inference server,
+                which batches frames of all running jobs on one warm model,
+                instead of leasing a detector for this run. Segment-parallel
+                workers run in their own processes and keep their own models.
+            event_windowing: time_in_zone only: scan the video at scan_fps and
+                scan_width for cars in the pit_box zone, then run full-rate
+                detection, tracking and timing only on those windows (padded
+                by event_padding_seconds). Takes precedence over segment_workers.
+            scan_fps: Sampled frames per second of video in the scan.
+            scan_width: Width frames are decoded at for the scan.
+            event_padding_seconds: Video processed before and after each event.
+            shot_filter: Skip inference on broadcast shots that do not match
+                the pit camera reference frame (track cameras, graphics,
+                replays). Skipped ranges are logged and returned.
+            shot_reference: Pit camera reference image. Required for classic
+                mode; time_in_zone defaults to the zone config's "reference_frame".
+            shot_match_threshold: Largest histogram distance (0-1) to the
+                reference frame for a shot to count as the pit camera.
+            tracker: time_in_zone only: multi-object tracker ("bytetrack" or
+                the lighter "iou" tracker for fixed-camera pit-box scenes).
+        """
         if not os.path.exists(weights_path):
             raise FileNotFoundError(
                 f"YOLO weights not found at: {weights_path}. "
@@ -71,12 +205,30 @@ class PitstopYoloRunner:
         self.mode = ProcessingMode(mode.lower())
         self.zone_config_path = zone_config_path
         self.target_size = target_size
-        
-        # Only load model for classic mode (time_in_zone loads its own)
-        if self.mode == ProcessingMode.CLASSIC:
-            self._model = YOLO(weights_path)
-        else:
-            self._model = None
+        self.batch_size = int(batch_size) if batch_size else None
+        self.device = device or None
+        self.engine = engine or "ultralytics"
+        self.detect_every_n = max(1, int(detect_every_n))
+        self.motion_threshold = motion_threshold
+        self.motion_max_skip_frames = int(motion_max_skip_frames)
+        self.roi_crop = bool(roi_crop)
+        self.roi_padding = int(roi_padding)
+        self.segment_workers = max(1, int(segment_workers))
+        self.segment_overlap_frames = max(0, int(segment_overlap_frames))
+        self.min_segment_seconds = float(min_segment_seconds)
+        self.decoder = decoder or "auto"
+        self.decoder_threads = max(0, int(decoder_threads))
+        self.encoder_threads = max(0, int(encoder_threads))
+        self.cpu_threads = int(cpu_threads) if cpu_threads else None
+        self.shared_inference = bool(shared_inference)
+        self.event_windowing = bool(event_windowing)
+        self.scan_fps = float(scan_fps)
+        self.scan_width = int(scan_width)
+        self.event_padding_seconds = float(event_padding_seconds)
+        self.shot_filter = bool(shot_filter)
+        self.shot_reference = shot_reference or None
+        self.shot_match_threshold = float(shot_match_threshold)
+        self.tracker = tracker or "bytetrack"
         
         # Validate zone config for time_in_zone mode
         if self.mode == ProcessingMode.TIME_IN_ZONE:
@@ -84,6 +236,22 @@ class PitstopYoloRunner:
                 raise ValueError("zone_config_path required for time_in_zone mode")
             if not os.path.exists(zone_config_path):
                 raise FileNotFoundError(f"Zone config not found: {zone_config_path}")
+        elif self.shot_filter and not self.shot_reference:
+            raise ValueError("shot_reference required for shot_filter in classic mode")
+
+    def _checkout_detector(self, name: str) -> Detector:
+        """Lease a warm detector, or connect to the shared inference server."""
+        if self.shared_inference:
+            from app.model.inference_server import connect_inference_server
+            return connect_inference_server(self.weights_path, self.device, self.engine, name=name)
+        return get_model_registry().checkout(self.weights_path, self.device, self.engine)
+
+    def _checkin_detector(self, detector: Detector) -> None:
+        """Release a detector from _checkout_detector()."""
+        if self.shared_inference:
+            detector.close()
+        else:
+            get_model_registry().checkin(detector)
 
     def process_video(
         self,
@@ -92,11 +260,22 @@ class PitstopYoloRunner:
         log_cb: LogCB = None,
         progress_cb: ProgressCB = None,
         class_name_map: Optional[dict[int, str]] = None,
+        render_video: bool = True,
+        tracks_path: Optional[str] = None,
+        cancel_token: Optional[CancelToken] = None,
     ) -> RunResult:
         """
         Run video processing based on configured mode.
         
-        The output is transcoded to browser-compatible H.264 using ffmpeg.
+        The output is encoded to browser-compatible H.264 by piping the
+        rendered frames into ffmpeg (single pass, no intermediate file).
+        With render_video=False (time_in_zone only) just the zone timings are
+        computed; no video is written and RunResult.output_path is None.
+        With tracks_path (time_in_zone only) the per-frame tracks are saved
+        there, so timings can be recomputed for edited zones without inference.
+        With cancel_token, the frame loops stop within a frame of the token
+        being cancelled, ffmpeg is killed, the partial output is removed and
+        JobCancelledError is raised.
         """
         def log(msg: str) -> None:
             """Safe logging wrapper."""
@@ -110,11 +289,12 @@ class PitstopYoloRunner:
         
         if self.mode == ProcessingMode.TIME_IN_ZONE:
             return self._process_time_in_zone(
-                input_path, output_path, log_cb, progress_cb
+                input_path, output_path, log_cb, progress_cb, render_video, tracks_path,
+                cancel_token,
             )
         else:
             return self._process_classic(
-                input_path, output_path, log_cb, progress_cb, class_name_map
+                input_path, output_path, log_cb, progress_cb, class_name_map, cancel_token
             )
 
     def _process_time_in_zone(
@@ -123,6 +303,9 @@ class PitstopYoloRunner:
         output_path: str,
         log_cb: LogCB = None,
         progress_cb: ProgressCB = None,
+        render_video: bool = True,
+        tracks_path: Optional[str] = None,
+        cancel_token: Optional[CancelToken] = None,
     ) -> RunResult:
         """
         Process video using supervision-based time-in-zone tracking.
@@ -136,6 +319,8 @@ class PitstopYoloRunner:
                     pass
 
         # Import here to avoid circular imports and lazy loading
+        from app.model.zone_timing.event_windows import SCAN_ZONE, run_time_in_zone_windowed
+        from app.model.zone_timing.segments import run_time_in_zone_segmented
         from app.model.zone_timing.time_in_zone import run_time_in_zone
 
         if not os.path.exists(input_path):
@@ -143,17 +328,30 @@ class PitstopYoloRunner:
 
         os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
 
-        # Write to temp file first, then transcode
-        temp_output_path = output_path.replace(".mp4", "_raw.mp4")
-        if temp_output_path == output_path:
-            temp_output_path = output_path + "_raw"
-
         log(f"MODE: time_in_zone (supervision-based tracking)")
         log(f"Zone config: {os.path.basename(self.zone_config_path)}")
-        log(f"Temp output path: {os.path.basename(temp_output_path)}")
+        if render_video:
+            log(f"Output path: {os.path.basename(output_path)} (H.264 via ffmpeg pipe)")
+        else:
+            log("Analysis only: annotated video rendering deferred")
         
         if self.target_size:
             log(f"Target size: {self.target_size[0]}x{self.target_size[1]}")
+        log(f"Tracker: {self.tracker}")
+        if self.roi_crop:
+            log(f"Detecting on zone ROI only (padding {self.roi_padding}px)")
+        if self.event_windowing:
+            log(
+                f"Event windowing: scanning '{SCAN_ZONE}' at {self.scan_fps:g} fps, "
+                f"{self.scan_width}px wide ({self.event_padding_seconds:g}s padding)"
+            )
+        elif self.segment_workers > 1:
+            log(
+                f"Segment-parallel: up to {self.segment_workers} workers, "
+                f"{self.segment_overlap_frames} overlap frames"
+            )
+        if self.shared_inference and (self.event_windowing or self.segment_workers == 1):
+            log("Inference: shared cross-job batching server")
 
         # Create a progress wrapper that maps to 0-90%
         def zone_progress_cb(pct: float) -> None:
@@ -162,22 +360,83 @@ class PitstopYoloRunner:
                 progress_cb(min(0.9, pct * 0.9))
 
         try:
-            # Run time-in-zone analysis
-            result = run_time_in_zone(
+            options = dict(
                 video_path=input_path,
                 zone_config_path=self.zone_config_path,
                 model_path=self.weights_path,
                 conf_threshold=self.threshold,
                 iou_threshold=self.iou_threshold,
                 classes=None,  # Use all classes
-                write_output_video=True,
-                output_path=temp_output_path,
+                write_output_video=render_video,
+                output_path=output_path if render_video else None,
                 target_size=self.target_size,
                 max_frames=None,  # Process all frames
+                device=self.device,
+                engine=self.engine,
+                detect_every_n=self.detect_every_n,
+                motion_threshold=self.motion_threshold,
+                motion_max_skip_frames=self.motion_max_skip_frames,
+                roi_crop=self.roi_crop,
+                roi_padding=self.roi_padding,
+                record_tracks=tracks_path is not None,
+                decoder=self.decoder,
+                decoder_threads=self.decoder_threads,
+                encoder_threads=self.encoder_threads,
+                shot_filter=self.shot_filter,
+                shot_reference=self.shot_reference,
+                shot_match_threshold=self.shot_match_threshold,
+                tracker=self.tracker,
+                cancel_token=cancel_token,
             )
             
+            # Run time-in-zone analysis (only on scanned event windows, or split
+            # across worker processes for long videos)
+            windowed = None
+            if self.event_windowing:
+                detector = self._checkout_detector(os.path.basename(input_path))
+                try:
+                    windowed = run_time_in_zone_windowed(
+                        scan_fps=self.scan_fps,
+                        scan_width=self.scan_width,
+                        padding_seconds=self.event_padding_seconds,
+                        detector=detector,
+                        progress_cb=zone_progress_cb,
+                        **options,
+                    )
+                finally:
+                    self._checkin_detector(detector)
+                result = windowed.merged()
+            elif self.segment_workers > 1:
+                result = run_time_in_zone_segmented(
+                    workers=self.segment_workers,
+                    overlap_frames=self.segment_overlap_frames,
+                    min_segment_seconds=self.min_segment_seconds,
+                    cpu_threads=self.cpu_threads,
+                    progress_cb=zone_progress_cb,
+                    **options,
+                )
+            elif self.shared_inference:
+                detector = self._checkout_detector(os.path.basename(input_path))
+                try:
+                    result = run_time_in_zone(progress_cb=zone_progress_cb, detector=detector, **options)
+                finally:
+                    self._checkin_detector(detector)
+            else:
+                result = run_time_in_zone(progress_cb=zone_progress_cb, **options)
+            
             frames = result.total_frames
-            zone_summary = result.to_dict()
+            zone_summary = windowed.to_dict() if windowed else result.to_dict()
+            
+            if windowed:
+                if windowed.fallback:
+                    log(f"Scan found no '{SCAN_ZONE}' event: processed the whole video")
+                log(
+                    f"Event windows: {len(windowed.windows)} "
+                    f"({windowed.processed_frames}/{windowed.video_frames} frames at full rate, "
+                    f"{windowed.scan_frames} scanned)"
+                )
+                for window in windowed.windows:
+                    log(f"  Window {window.start / result.fps:.1f}s-{window.end / result.fps:.1f}s")
             
             # Log zone statistics
             log(f"Loaded zones: {len(result.zones)}")
@@ -192,37 +451,43 @@ class PitstopYoloRunner:
             # Log per-zone summary
             for zone in result.zones:
                 log(f"  Zone '{zone.zone_name}': {zone.total_unique_trackers} trackers, max {zone.max_time_sec:.2f}s")
-
+            
+            if result.motion_skip_ratio is not None:
+                log(f"Motion gate skipped {result.motion_skip_ratio:.1%} of detection frames")
+            
+            skipped_ranges = zone_summary.get("skipped_ranges")
+            if skipped_ranges is not None:
+                _log_skipped_ranges(log, skipped_ranges)
+            
+            if tracks_path and result.tracks is not None:
+                result.tracks.save(tracks_path)
+                log(f"Track store saved: {len(result.tracks):,} rows ({os.path.basename(tracks_path)})")
+
+        except JobCancelledError:
+            log("Time-in-zone processing cancelled")
+            if render_video:
+                cleanup_temp_file(output_path, log_cb=log_cb)
+            raise
         except Exception as e:
             log(f"Time-in-zone processing error: {type(e).__name__}: {e}")
-            cleanup_temp_file(temp_output_path, log_cb=log_cb)
+            if render_video:
+                cleanup_temp_file(output_path, log_cb=log_cb)
             raise
 
-        # Verify temp file was created
-        if not os.path.exists(temp_output_path):
-            raise RuntimeError(f"Time-in-zone did not produce temp output file: {temp_output_path}")
-        
-        temp_size = os.path.getsize(temp_output_path)
-        log(f"Temp file created: {temp_size:,} bytes")
-
-        # Transcode to browser-compatible H.264
-        log("Finalizing output (H.264 encoding)...")
-        
-        if progress_cb:
-            progress_cb(0.92)
-
-        try:
-            ensure_browser_mp4(temp_output_path, output_path, log_cb=log_cb)
-            log("Transcoding successful")
-        except Exception as e:
-            log(f"Transcoding error: {type(e).__name__}: {e}")
-            cleanup_temp_file(temp_output_path, log_cb=log_cb)
-            raise RuntimeError(f"Video transcoding failed: {e}")
-
-        # Clean up temp file on success
-        cleanup_temp_file(temp_output_path, log_cb=log_cb)
+        if not render_video:
+            if progress_cb:
+                progress_cb(1.0)
+            return RunResult(
+                output_path=None,
+                frames_processed=frames,
+                mode="time_in_zone",
+                zone_summary=zone_summary,
+                motion_skip_ratio=result.motion_skip_ratio,
+                tracks_path=tracks_path,
+                skipped_ranges=skipped_ranges,
+            )
 
-        # Verify final output
+        # Verify final output (encoded while frames were rendered)
         if not os.path.exists(output_path):
             raise RuntimeError(f"Final output file not found: {output_path}")
 
@@ -238,6 +503,9 @@ class PitstopYoloRunner:
             frames_processed=frames,
             mode="time_in_zone",
             zone_summary=zone_summary,
+            motion_skip_ratio=result.motion_skip_ratio,
+            tracks_path=tracks_path,
+            skipped_ranges=skipped_ranges,
         )
 
     def _process_classic(
@@ -247,6 +515,7 @@ class PitstopYoloRunner:
         log_cb: LogCB = None,
         progress_cb: ProgressCB = None,
         class_name_map: Optional[dict[int, str]] = None,
+        cancel_token: Optional[CancelToken] = None,
     ) -> RunResult:
         """
         Original classic mode: YOLO inference with bounding box annotations.
@@ -267,112 +536,171 @@ class PitstopYoloRunner:
 
         os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
 
-        # Write OpenCV output to a temp file, then transcode
-        temp_output_path = output_path.replace(".mp4", "_raw.mp4")
-        if temp_output_path == output_path:
-            temp_output_path = output_path + "_raw"
-
         log(f"MODE: classic (bbox annotate)")
-        log(f"Temp output path: {os.path.basename(temp_output_path)}")
+        log(f"Output path: {os.path.basename(output_path)} (H.264 via ffmpeg pipe)")
 
-        cap = cv2.VideoCapture(input_path)
-        if not cap.isOpened():
-            raise RuntimeError(f"Could not open input video: {input_path}")
+        video = open_video(input_path, backend=self.decoder, threads=self.decoder_threads)
 
-        fps = cap.get(cv2.CAP_PROP_FPS) or 0
-        if fps <= 1e-6:
-            fps = 30.0
-            log("FPS not detected; defaulting to 30 FPS")
+        fps = video.info.fps
+        if not video.info.fps_detected:
+            log(f"FPS not detected; defaulting to {fps:.0f} FPS")
 
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH) or 0)
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT) or 0)
+        width, height = video.frame_size
         if width <= 0 or height <= 0:
+            video.close()
             raise RuntimeError("Could not read video dimensions")
 
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        total_frames = video.info.frame_count
+        log(f"Decoder: {video.backend} ({total_frames} frames, {video.info.duration_s:.1f}s)")
+
+        batch_size = self.batch_size or auto_batch_size(width, height)
+        log(f"Inference batch size: {batch_size}")
+        if self.detect_every_n > 1:
+            log(f"Detecting every {self.detect_every_n} frames")
+
+        motion_gate = None
+        if self.motion_threshold is not None:
+            motion_gate = MotionGate(
+                threshold=self.motion_threshold,
+                max_skip_frames=self.motion_max_skip_frames,
+            )
+            log(f"Motion gate enabled (threshold {self.motion_threshold})")
+
+        shot_gate = None
+        if self.shot_filter:
+            try:
+                reference = load_reference_frame(self.shot_reference)
+            except Exception:
+                video.close()
+                raise
+            shot_gate = ShotGate(reference, match_threshold=self.shot_match_threshold)
+            log(
+                f"Shot gate enabled (reference {os.path.basename(self.shot_reference)}, "
+                f"threshold {self.shot_match_threshold})"
+            )
 
-        fourcc = cv2.VideoWriter_fourcc(*"mp4v")
-        out = cv2.VideoWriter(temp_output_path, fourcc, fps, (width, height))
-        if not out.isOpened():
-            raise RuntimeError(f"Could not open output writer for: {temp_output_path}")
+        # Lease a warm detector (loads weights only on first use or after best.pt changes)
+        log(f"Detector engine: {self.engine}")
+        if self.shared_inference:
+            log("Inference: shared cross-job batching server")
+        detector = self._checkout_detector(os.path.basename(input_path))
+
+        # Annotated frames are piped straight into one H.264 encode
+        try:
+            out = H264PipeWriter(
+                output_path,
+                fps,
+                (width, height),
+                log_cb=log_cb,
+                threads=self.encoder_threads,
+                cancel_token=cancel_token,
+            )
+        except Exception:
+            self._checkin_detector(detector)
+            video.close()
+            raise
 
         frames = 0
         try:
             log(f"Starting YOLO inference: {os.path.basename(input_path)}")
+            batch: List[Any] = []
+            needs_detection: List[bool] = []
+            pit_shots: List[bool] = []
+            was_pit_shot = True
+            last_results: Any = None
+            frame_iter = video.read_frames()
             while True:
-                ok, frame = cap.read()
-                if not ok:
-                    break
-
-                results = self._model(frame, verbose=False)[0]
-
-                # results.boxes.data: [x1,y1,x2,y2,score,class]
-                for row in results.boxes.data.tolist() if results.boxes is not None else []:
-                    if len(row) < 6:
-                        continue
-                    x1, y1, x2, y2, score, class_id = row[:6]
-                    if float(score) < self.threshold:
-                        continue
-
-                    x1i, y1i, x2i, y2i = map(lambda v: int(max(0, v)), (x1, y1, x2, y2))
-                    cls = int(class_id)
-                    label = class_name_map.get(cls, f"cls_{cls}")
-
-                    cv2.rectangle(frame, (x1i, y1i), (x2i, y2i), (0, 255, 0), 2)
-                    cv2.putText(
-                        frame,
-                        f"{label} {float(score):.2f}",
-                        (x1i, max(0, y1i - 8)),
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        0.6,
-                        (0, 255, 0),
-                        2,
+                if cancel_token is not None:
+                    cancel_token.check()
+                frame = next(frame_iter, None)
+                ok = frame is not None
+                if ok:
+                    frame_index = frames + len(batch)
+                    # Other cameras skip inference; the first frame back on the pit camera
+                    # is always detected, and keyframes on a static scene reuse detections
+                    pit_shot = shot_gate is None or shot_gate.check(frame, frame_index)
+                    resumed = pit_shot and not was_pit_shot
+                    was_pit_shot = pit_shot
+                    needs_detection.append(
+                        pit_shot
+                        and (
+                            resumed
+                            or (
+                                is_keyframe(frame_index, self.detect_every_n)
+                                and not (motion_gate is not None and motion_gate.should_skip(frame))
+                            )
+                        )
                     )
+                    pit_shots.append(pit_shot)
+                    batch.append(frame)
+
+                # Run the model once per full batch (or on the final partial batch)
+                if batch and (not ok or len(batch) >= batch_size):
+                    # Only keyframes with motion go through the model
+                    key_positions = [i for i, needed in enumerate(needs_detection) if needed]
+                    key_results = (
+                        detector.detect([batch[i] for i in key_positions])
+                        if key_positions
+                        else []
+                    )
+                    results_by_position = dict(zip(key_positions, key_results))
+
+                    # Annotate and write in decode order; other frames reuse the last detected boxes
+                    for i, batch_frame in enumerate(batch):
+                        last_results = results_by_position.get(i, last_results)
+                        if not pit_shots[i]:
+                            # Boxes from the pit camera don't belong on other shots
+                            last_results = None
+                        if last_results is not None:
+                            self._annotate_classic(batch_frame, last_results, class_name_map)
+                        out.write(batch_frame)
+                        frames += 1
+
+                        # Progress for YOLO inference: 0-90%
+                        if progress_cb and total_frames > 0 and frames % 10 == 0:
+                            progress_cb(min(0.9, (frames / total_frames) * 0.9))
+
+                        if frames % 150 == 0:
+                            if total_frames > 0:
+                                log(f"Processed {frames}/{total_frames} frames")
+                            else:
+                                log(f"Processed {frames} frames")
+                    batch = []
+                    needs_detection = []
+                    pit_shots = []
 
-                out.write(frame)
-                frames += 1
-
-                # Progress for YOLO inference: 0-90%
-                if progress_cb and total_frames > 0 and frames % 10 == 0:
-                    progress_cb(min(0.9, (frames / total_frames) * 0.9))
-
-                if frames % 150 == 0:
-                    if total_frames > 0:
-                        log(f"Processed {frames}/{total_frames} frames")
-                    else:
-                        log(f"Processed {frames} frames")
+                if not ok:
+                    break
 
             log(f"YOLO inference complete: {frames} frames")
+            if motion_gate is not None:
+                log(
+                    f"Motion gate skipped {motion_gate.frames_skipped}/{motion_gate.frames_checked} "
+                    f"detection frames ({motion_gate.skip_ratio:.1%})"
+                )
+            skipped_ranges = None
+            if shot_gate is not None:
+                skipped_ranges = format_skipped_ranges(shot_gate.skipped_ranges(), fps)
+                _log_skipped_ranges(log, skipped_ranges)
+
+            # Flush the encoder and finalize the MP4
+            log("Finalizing output (H.264 encoding)...")
+            if progress_cb:
+                progress_cb(0.92)
+            try:
+                out.close()
+            except JobCancelledError:
+                raise
+            except Exception as e:
+                log(f"Encoding error: {type(e).__name__}: {e}")
+                raise RuntimeError(f"Video encoding failed: {e}")
 
         finally:
-            cap.release()
+            self._checkin_detector(detector)
+            video.close()
+            # No-op after close(); otherwise stops ffmpeg and removes the partial file
             out.release()
 
-        # Verify temp file was created
-        if not os.path.exists(temp_output_path):
-            raise RuntimeError(f"OpenCV did not produce temp output file: {temp_output_path}")
-        
-        temp_size = os.path.getsize(temp_output_path)
-        log(f"Temp file created: {temp_size:,} bytes")
-
-        # Transcode to browser-compatible H.264
-        log("Finalizing output (H.264 encoding)...")
-        
-        if progress_cb:
-            progress_cb(0.92)
-
-        try:
-            ensure_browser_mp4(temp_output_path, output_path, log_cb=log_cb)
-            log("Transcoding successful")
-        except Exception as e:
-            # Clean up temp file on ANY error
-            log(f"Transcoding error: {type(e).__name__}: {e}")
-            cleanup_temp_file(temp_output_path, log_cb=log_cb)
-            raise RuntimeError(f"Video transcoding failed: {e}")
-
-        # Clean up temp file on success
-        cleanup_temp_file(temp_output_path, log_cb=log_cb)
-
         # Verify final output
         if not os.path.exists(output_path):
             raise RuntimeError(f"Final output file not found: {output_path}")
@@ -388,8 +716,40 @@ class PitstopYoloRunner:
             output_path=output_path,
             frames_processed=frames,
             mode="classic",
+            motion_skip_ratio=motion_gate.skip_ratio if motion_gate is not None else None,
+            skipped_ranges=skipped_ranges,
         )
 
+    def _annotate_classic(
+        self,
+        frame: Any,
+        detections: Any,
+        class_name_map: dict[int, str],
+    ) -> None:
+        """Draw thresholded bounding boxes and labels onto frame in place."""
+        for (x1, y1, x2, y2), score, class_id in zip(
+            detections.xyxy.tolist(),
+            detections.confidence.tolist() if detections.confidence is not None else [],
+            detections.class_id.tolist() if detections.class_id is not None else [],
+        ):
+            if float(score) < self.threshold:
+                continue
+
+            x1i, y1i, x2i, y2i = map(lambda v: int(max(0, v)), (x1, y1, x2, y2))
+            cls = int(class_id)
+            label = class_name_map.get(cls, f"cls_{cls}")
+
+            cv2.rectangle(frame, (x1i, y1i), (x2i, y2i), (0, 255, 0), 2)
+            cv2.putText(
+                frame,
+                f"{label} {float(score):.2f}",
+                (x1i, max(0, y1i - 8)),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                0.6,
+                (0, 255, 0),
+                2,
+            )
+
 
 if __name__ == "__main__":
     # Minimal manual test:
@@ -403,6 +763,16 @@ if __name__ == "__main__":
     ap.add_argument("--mode", choices=["classic", "time_in_zone"], default="classic")
     ap.add_argument("--zones", help="Zone config path (required for time_in_zone mode)")
     ap.add_argument("--target-size", help="Target size as WxH (e.g., 1020x500)")
+    ap.add_argument("--batch-size", type=int, default=0, help="Classic mode batch size (0 = auto)")
+    ap.add_argument("--detect-every-n", type=int, default=1, help="Run detection on every n-th frame")
+    ap.add_argument("--motion-threshold", type=float, default=None, help="Enable motion gate with this threshold")
+    ap.add_argument("--roi-crop", action="store_true", help="time_in_zone: detect on the zone ROI only")
+    ap.add_argument("--segment-workers", type=int, default=1, help="time_in_zone: parallel segment workers")
+    ap.add_argument("--engine", default="ultralytics", help="Detector engine (ultralytics, onnx, onnx_int8, openvino, opencv)")
+    ap.add_argument("--decoder", default="auto", help="Video decoder (auto, pyav, opencv)")
+    ap.add_argument("--tracker", default="bytetrack", help="time_in_zone: tracker (bytetrack, iou)")
+    ap.add_argument("--shot-reference", help="Skip shots not matching this pit camera frame (image path)")
+    ap.add_argument("--event-windowing", action="store_true", help="time_in_zone: process pit_box event windows only")
     args = ap.parse_args()
 
     target_size = None
@@ -416,6 +786,17 @@ if __name__ == "__main__":
         mode=args.mode,
         zone_config_path=args.zones,
         target_size=target_size,
+        batch_size=args.batch_size,
+        detect_every_n=args.detect_every_n,
+        motion_threshold=args.motion_threshold,
+        roi_crop=args.roi_crop,
+        engine=args.engine,
+        segment_workers=args.segment_workers,
+        decoder=args.decoder,
+        event_windowing=args.event_windowing,
+        shot_filter=bool(args.shot_reference),
+        shot_reference=args.shot_reference,
+        tracker=args.tracker,
     )
     result = runner.process_video(
         args.input,
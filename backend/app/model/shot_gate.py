@@ -0,0 +1,172 @@
+"""
+Shot gate for skipping inference on broadcast shots from other cameras.
+
+Broadcast feeds cut between track cameras, the pit lane, graphics and
+replays; only shots from the pit camera the zones were drawn for can
+contain a timed stop. The gate looks at a tiny thumbnail of every frame:
+
+- Shot boundaries: the coarse color histogram of consecutive frames is
+  compared (Bhattacharyya distance). A hard cut changes it abruptly.
+- Shot classification: at every cut, and every recheck_frames inside a shot
+  (so dissolves and fades settle), the frame is compared with a reference
+  frame of the pit camera: its histogram must be close and its coarse
+  grayscale layout must correlate. Matching shots run detection, all other
+  frames are skipped.
+
+Skipped frames are collected as [start, end) frame ranges for reporting.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+# Thumbnail size for histograms, and the smaller one for layout correlation
+ANALYSIS_SIZE = (96, 54)
+LAYOUT_SIZE = (32, 18)
+
+# Bins per BGR channel. Coarse on purpose: hue of near-gray pixels (asphalt,
+# pit wall) is compression noise, and a reference grabbed as PNG/JPEG must
+# still match the decoded video.
+HIST_BINS = [4, 4, 4]
+
+# Minimum correlation of the grayscale layout with the reference frame
+MIN_LAYOUT_CORRELATION = 0.5
+
+
+def load_reference_frame(path: Union[str, Path]) -> np.ndarray:
+    """
+    Read a pit camera reference frame (any image format OpenCV reads).
+
+    Raises:
+        FileNotFoundError: If the image does not exist or cannot be decoded
+    """
+    frame = cv2.imread(str(path), cv2.IMREAD_COLOR)
+    if frame is None:
+        raise FileNotFoundError(f"Shot reference frame not found or unreadable: {path}")
+    return frame
+
+
+class ShotGate:
+    """Decides per frame whether it belongs to a shot from the pit camera."""
+
+    def __init__(
+        self,
+        reference: np.ndarray,
+        match_threshold: float = 0.4,
+        cut_threshold: float = 0.35,
+        recheck_frames: int = 15,
+    ):
+        """
+        Args:
+            reference: BGR frame of the pit camera (e.g. the frame the zones
+                were drawn on). Its size does not need to match the video.
+            match_threshold: Largest histogram distance (0-1) to the reference
+                for a shot to count as the pit camera.
+            cut_threshold: Histogram distance (0-1) between consecutive frames
+                that counts as a shot boundary.
+            recheck_frames: Re-classify the current shot this often.
+        """
+        self.match_threshold = float(match_threshold)
+        self.cut_threshold = float(cut_threshold)
+        self.recheck_frames = max(1, int(recheck_frames))
+        self._ref_hist, self._ref_layout = self._features(reference)
+
+        self.frames_checked = 0
+        self.frames_skipped = 0
+        self.shots = 0
+        self._prev_hist: Optional[np.ndarray] = None
+        self._since_check = 0
+        self._matching = False
+        self._ranges: List[List[int]] = []
+
+    @property
+    def skip_ratio(self) -> float:
+        """Fraction of checked frames on which inference was skipped."""
+        if self.frames_checked == 0:
+            return 0.0
+        return self.frames_skipped / self.frames_checked
+
+    @staticmethod
+    def _features(frame: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Normalized color histogram and unit-norm zero-mean grayscale layout."""
+        small = cv2.resize(frame, ANALYSIS_SIZE, interpolation=cv2.INTER_AREA)
+        hist = cv2.calcHist([small], [0, 1, 2], None, HIST_BINS, [0, 256, 0, 256, 0, 256])
+        cv2.normalize(hist, hist, 1.0, 0.0, cv2.NORM_L1)
+
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        layout = cv2.resize(gray, LAYOUT_SIZE, interpolation=cv2.INTER_AREA).astype(np.float32)
+        layout -= layout.mean()
+        norm = float(np.linalg.norm(layout))
+        return hist, (layout / norm if norm > 1e-6 else layout)
+
+    def _matches_reference(self, hist: np.ndarray, layout: np.ndarray) -> bool:
+        distance = cv2.compareHist(self._ref_hist, hist, cv2.HISTCMP_BHATTACHARYYA)
+        correlation = float(np.sum(layout * self._ref_layout))
+        return distance <= self.match_threshold and correlation >= MIN_LAYOUT_CORRELATION
+
+    def check(self, frame: np.ndarray, frame_index: int) -> bool:
+        """
+        Check a frame (call for every frame in order, detected or not).
+
+        Returns True if the frame is from the pit camera and should run detection.
+        """
+        self.frames_checked += 1
+        hist, layout = self._features(frame)
+
+        cut = (
+            self._prev_hist is None
+            or cv2.compareHist(self._prev_hist, hist, cv2.HISTCMP_BHATTACHARYYA) > self.cut_threshold
+        )
+        self._prev_hist = hist
+        if cut:
+            self.shots += 1
+
+        self._since_check += 1
+        if cut or self._since_check >= self.recheck_frames:
+            self._matching = self._matches_reference(hist, layout)
+            self._since_check = 0
+
+        if self._matching:
+            return True
+
+        self.frames_skipped += 1
+        if self._ranges and self._ranges[-1][1] == frame_index:
+            self._ranges[-1][1] = frame_index + 1
+        else:
+            self._ranges.append([frame_index, frame_index + 1])
+        return False
+
+    def skipped_ranges(self, start_frame: int = 0) -> List[Tuple[int, int]]:
+        """Skipped [start, end) frame ranges, clipped to start at start_frame."""
+        return [
+            (max(start, start_frame), end)
+            for start, end in self._ranges
+            if end > start_frame
+        ]
+
+
+def join_ranges(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Sort [start, end) ranges and join touching or overlapping ones (e.g. across segments)."""
+    joined: List[Tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if joined and start <= joined[-1][1]:
+            joined[-1] = (joined[-1][0], max(joined[-1][1], end))
+        else:
+            joined.append((start, end))
+    return joined
+
+
+def format_skipped_ranges(ranges: List[Tuple[int, int]], fps: float) -> List[dict]:
+    """Skipped frame ranges as JSON-serializable dicts (frames and seconds)."""
+    return [
+        {
+            "start_frame": start,
+            "end_frame": end,
+            "start_sec": round(start / fps, 2),
+            "end_sec": round(end / fps, 2),
+        }
+        for start, end in ranges
+    ]
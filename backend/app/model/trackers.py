@@ -0,0 +1,221 @@
+"""
+Pluggable multi-object trackers for time-in-zone runs.
+
+The tracker assigns a persistent tracker_id to each detection; zone timers
+count frames per id, so any tracker that keeps ids stable through a stop
+gives the same timings. Selected per job (PITSTOP_TRACKER or the job's
+tracker field):
+
+- "bytetrack": supervision's ByteTrack (default). Kalman-filtered motion and
+  a second association pass for low-confidence boxes; robust to crossing
+  objects and occlusion.
+- "iou": greedy IoU matching against each track's last box, with a
+  centroid-distance pass for boxes that moved too far to overlap (detection
+  strides). No motion model. In fixed-camera pit-box scenes, where cars and
+  crew barely move between frames, it keeps the same ids at a fraction of
+  ByteTrack's per-frame cost.
+"""
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import Tuple
+
+import numpy as np
+import supervision as sv
+
+TRACKERS = ("bytetrack", "iou")
+
+# ByteTrack settings used for time-in-zone since the first version
+BYTETRACK_ACTIVATION_THRESHOLD = 0.25
+BYTETRACK_LOST_TRACK_BUFFER = 30
+BYTETRACK_MATCHING_THRESHOLD = 0.8
+
+
+class Tracker(ABC):
+    """
+    Assigns tracker ids to per-frame detections.
+
+    Implementations:
+        - ByteTrackTracker: supervision's ByteTrack
+        - IoUTracker: greedy NumPy IoU/centroid matching
+    """
+
+    #: Tracker name as used in PITSTOP_TRACKER
+    name: str = ""
+
+    @abstractmethod
+    def update(self, detections: sv.Detections) -> sv.Detections:
+        """Track one frame; returns the tracked detections with tracker_id set."""
+
+    @abstractmethod
+    def reset(self) -> None:
+        """Forget all tracks (ids keep increasing)."""
+
+
+class ByteTrackTracker(Tracker):
+    """supervision ByteTrack with the time-in-zone settings."""
+
+    name = "bytetrack"
+
+    def __init__(self, frame_rate: int = 30):
+        """
+        Args:
+            frame_rate: Rate update() is called at (keyframe rate), so the
+                lost-track buffer stays constant in seconds.
+        """
+        self._tracker = sv.ByteTrack(
+            track_activation_threshold=BYTETRACK_ACTIVATION_THRESHOLD,
+            lost_track_buffer=BYTETRACK_LOST_TRACK_BUFFER,
+            minimum_matching_threshold=BYTETRACK_MATCHING_THRESHOLD,
+            frame_rate=max(1, int(frame_rate)),
+        )
+
+    def update(self, detections: sv.Detections) -> sv.Detections:
+        return self._tracker.update_with_detections(detections)
+
+    def reset(self) -> None:
+        self._tracker.reset()
+
+
+def _greedy_match(score: np.ndarray, min_score: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    One-to-one (row, col) matches from the highest score down.
+
+    Only pairs scoring at least min_score are considered; ties keep the
+    lower row/col first.
+    """
+    rows, cols = np.nonzero(score >= min_score)
+    if len(rows) == 0:
+        return rows, cols
+    order = np.argsort(-score[rows, cols], kind="stable")
+    used_rows = np.zeros(score.shape[0], dtype=bool)
+    used_cols = np.zeros(score.shape[1], dtype=bool)
+    keep = []
+    for k in order:
+        r, c = rows[k], cols[k]
+        if used_rows[r] or used_cols[c]:
+            continue
+        used_rows[r] = used_cols[c] = True
+        keep.append(k)
+    keep = np.asarray(keep, dtype=np.int64)
+    return rows[keep], cols[keep]
+
+
+class IoUTracker(Tracker):
+    """Greedy IoU tracker with a centroid fallback, vectorized over tracks and detections."""
+
+    name = "iou"
+
+    def __init__(
+        self,
+        frame_rate: int = 30,
+        iou_threshold: float = 0.3,
+        max_centroid_distance: float = 0.5,
+        activation_threshold: float = BYTETRACK_ACTIVATION_THRESHOLD,
+        lost_track_buffer: int = BYTETRACK_LOST_TRACK_BUFFER,
+    ):
+        """
+        Args:
+            frame_rate: Rate update() is called at; scales lost_track_buffer
+                like ByteTrack's (it is given in frames at 30 fps).
+            iou_threshold: Minimum IoU between a track's last box and a detection.
+            max_centroid_distance: Fallback match for boxes that no longer
+                overlap: centroid distance at most this fraction of the
+                track box's diagonal.
+            activation_threshold: Minimum confidence for a detection to start a track.
+            lost_track_buffer: Frames (at 30 fps) an unmatched track is kept.
+        """
+        self.iou_threshold = float(iou_threshold)
+        self.max_centroid_distance = float(max_centroid_distance)
+        self.activation_threshold = float(activation_threshold)
+        self.max_lost = max(1, int(round(lost_track_buffer * max(1, int(frame_rate)) / 30.0)))
+        self._next_id = 1
+        self.reset()
+
+    def reset(self) -> None:
+        self._boxes = np.empty((0, 4), dtype=np.float32)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._lost = np.empty(0, dtype=np.int32)
+
+    def _centroid_scores(self, det_boxes: np.ndarray) -> np.ndarray:
+        """Negative centroid distance, in units of each track box's diagonal."""
+        track_centers = (self._boxes[:, :2] + self._boxes[:, 2:]) / 2
+        det_centers = (det_boxes[:, :2] + det_boxes[:, 2:]) / 2
+        diagonals = np.maximum(np.hypot(*(self._boxes[:, 2:] - self._boxes[:, :2]).T), 1.0)
+        distances = np.linalg.norm(track_centers[:, None, :] - det_centers[None, :, :], axis=2)
+        return -(distances / diagonals[:, None])
+
+    def update(self, detections: sv.Detections) -> sv.Detections:
+        det_boxes = detections.xyxy.astype(np.float32)
+        num_tracks, num_dets = len(self._ids), len(detections)
+        # Track row of each detection (-1 = unmatched)
+        det_track = np.full(num_dets, -1, dtype=np.int64)
+
+        if num_tracks and num_dets:
+            rows, cols = _greedy_match(sv.box_iou_batch(self._boxes, det_boxes), self.iou_threshold)
+            det_track[cols] = rows
+
+            free_tracks = np.setdiff1d(np.arange(num_tracks), rows)
+            free_dets = np.nonzero(det_track < 0)[0]
+            if len(free_tracks) and len(free_dets):
+                scores = self._centroid_scores(det_boxes[free_dets])[free_tracks]
+                rows, cols = _greedy_match(scores, -self.max_centroid_distance)
+                det_track[free_dets[cols]] = free_tracks[rows]
+
+        matched = det_track >= 0
+        self._boxes[det_track[matched]] = det_boxes[matched]
+        self._lost += 1
+        self._lost[det_track[matched]] = 0
+
+        # Unmatched, confident detections start new tracks
+        confidence = detections.confidence
+        new = ~matched
+        if confidence is not None:
+            new &= confidence >= self.activation_threshold
+        new_rows = np.arange(num_tracks, num_tracks + int(new.sum()))
+        det_track[new] = new_rows
+        self._boxes = np.concatenate([self._boxes, det_boxes[new]])
+        self._ids = np.concatenate([
+            self._ids, np.arange(self._next_id, self._next_id + len(new_rows), dtype=np.int64)
+        ])
+        self._lost = np.concatenate([self._lost, np.zeros(len(new_rows), dtype=np.int32)])
+        self._next_id += len(new_rows)
+
+        tracked = det_track >= 0
+        result = detections[tracked]
+        result.tracker_id = self._ids[det_track[tracked]]
+
+        # Drop tracks unmatched for longer than the buffer
+        alive = self._lost <= self.max_lost
+        if not alive.all():
+            self._boxes, self._ids, self._lost = self._boxes[alive], self._ids[alive], self._lost[alive]
+        return result
+
+
+def tracker_name(name: str) -> str:
+    """
+    Normalize a tracker name (empty = "bytetrack").
+
+    Raises:
+        ValueError: If the tracker name is unknown
+    """
+    name = (name or "bytetrack").lower()
+    if name not in TRACKERS:
+        raise ValueError(f"Unknown tracker '{name}'. Choose from: {', '.join(TRACKERS)}")
+    return name
+
+
+def create_tracker(name: str = "bytetrack", frame_rate: int = 30) -> Tracker:
+    """
+    Create a tracker by name.
+
+    Args:
+        name: "bytetrack" or "iou".
+        frame_rate: Rate the tracker is updated at (keyframes per second).
+
+    Raises:
+        ValueError: If the tracker name is unknown
+    """
+    if tracker_name(name) == "iou":
+        return IoUTracker(frame_rate=frame_rate)
+    return ByteTrackTracker(frame_rate=frame_rate)
@@ -1,12 +1,32 @@
 """Zone timing module for pitstop analysis."""
-from .zones import load_polygons, draw_zones
-from .time_in_zone import run_time_in_zone, FPSBasedTimer, TimeInZoneResult
+from .zones import ZoneMask, load_polygons, polygons_from_config, draw_zones, zones_roi
+from .time_in_zone import (
+    run_time_in_zone,
+    render_time_in_zone,
+    FPSBasedTimer,
+    ZoneTimerBank,
+    TimeInZoneResult,
+)
+from .segments import run_time_in_zone_segmented
+from .event_windows import run_time_in_zone_windowed, WindowedResult, EventWindow
+from .track_store import TrackTable, rezone_tracks
 
 __all__ = [
     "load_polygons",
+    "polygons_from_config",
     "draw_zones",
+    "zones_roi",
+    "ZoneMask",
     "run_time_in_zone",
+    "render_time_in_zone",
+    "run_time_in_zone_segmented",
+    "run_time_in_zone_windowed",
+    "WindowedResult",
+    "EventWindow",
     "FPSBasedTimer",
+    "ZoneTimerBank",
     "TimeInZoneResult",
+    "TrackTable",
+    "rezone_tracks",
 ]
 
@@ -0,0 +1,492 @@
+"""
+Two-phase time-in-zone processing: cheap occupancy scan, then full-rate windows.
+
+A broadcast or onboard recording is mostly racing; the pit stop itself is a
+few seconds of it. Running detection, tracking and timing on every frame
+spends almost all of the work on frames where nothing is timed. Instead:
+
+1. Scan: decode every n-th frame (scan_fps) at a small width and detect at a
+   small inference size. A sample is occupied when a detection's anchor is
+   inside the scan zone (pit_box). Frames between samples are decoded but
+   never scaled, converted or detected.
+2. Plan: occupied samples closer than max_gap_seconds form one event; events
+   shorter than min_event_seconds (cars driving through the box) are dropped.
+   Each event is padded by padding_seconds on both sides, and overlapping
+   windows are merged.
+3. Windows: each window runs through run_time_in_zone() at full frame rate
+   and resolution with its own tracker and timers, and keeps its own
+   TimeInZoneResult. Per-window H.264 videos are joined without re-encoding.
+
+If the scan finds no event, the whole video is processed as one window, so a
+missed scan costs time but never drops a stop.
+"""
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from app.model.detectors import Detector
+from app.model.model_registry import get_model_registry
+from app.model.shot_gate import join_ranges
+from app.utils.cancellation import CancelToken
+from app.utils.video_decode import open_video
+from app.utils.video_transcode import cleanup_temp_file, concat_videos
+
+from .time_in_zone import TimeInZoneResult, ZoneSummary, load_zone_names, run_time_in_zone
+from .track_store import TrackTable
+from .zones import ZoneMask, load_polygons
+
+# Zone whose occupancy marks a pit stop
+SCAN_ZONE = "pit_box"
+
+# Share of the job progress spent on the scan (the windows get the rest)
+SCAN_PROGRESS_SHARE = 0.2
+
+
+@dataclass
+class EventWindow:
+    """A frame range [start, end) processed at full rate."""
+    start: int
+    end: int
+    # First and last+1 sampled frame with the scan zone occupied (padding excluded)
+    event_start: int
+    event_end: int
+
+    @property
+    def num_frames(self) -> int:
+        return self.end - self.start
+
+    def to_dict(self, fps: float) -> dict:
+        return {
+            "start_frame": self.start,
+            "end_frame": self.end,
+            "start_sec": round(self.start / fps, 2),
+            "end_sec": round(self.end / fps, 2),
+            "event_start_sec": round(self.event_start / fps, 2),
+            "event_end_sec": round(self.event_end / fps, 2),
+        }
+
+
+@dataclass
+class OccupancyScan:
+    """Sampled frames of the scan and whether the scan zone was occupied."""
+    fps: float
+    total_frames: int
+    step: int
+    frames: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    occupied: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=bool))
+
+
+@dataclass
+class WindowedResult:
+    """Per-window results of a two-phase run."""
+    zone_names: List[str]
+    fps: float
+    # Frames in the video (or the max_frames limit) and frames sampled by the scan
+    video_frames: int
+    scan_frames: int
+    windows: List[EventWindow]
+    results: List[TimeInZoneResult]
+    # True if the scan found no event and the whole video was processed
+    fallback: bool = False
+    output_path: Optional[str] = None
+
+    @property
+    def processed_frames(self) -> int:
+        return sum(w.num_frames for w in self.windows)
+
+    def merged(self) -> TimeInZoneResult:
+        """
+        All windows as one TimeInZoneResult.
+
+        Windows have independent trackers, so their ids are renumbered in
+        order of first appearance; a car stopping twice gets two ids.
+        Zone max_time_sec is the longest time of any window.
+        """
+        next_id = 1
+        id_maps: List[Dict[int, int]] = []
+        for result in self.results:
+            local_ids = set()
+            for zone in result.zones:
+                local_ids.update(zone.tracker_times.keys())
+            if result.tracks is not None:
+                local_ids.update(int(t) for t in np.unique(result.tracks.tracker_id))
+            id_map = {local_id: next_id + i for i, local_id in enumerate(sorted(local_ids))}
+            next_id += len(id_map)
+            id_maps.append(id_map)
+
+        zone_summaries = []
+        for zone_idx, name in enumerate(self.zone_names):
+            times: Dict[int, float] = {}
+            for result, id_map in zip(self.results, id_maps):
+                for local_id, seconds in result.zones[zone_idx].tracker_times.items():
+                    times[id_map[local_id]] = seconds
+            active = []
+            if self.results:
+                last, last_map = self.results[-1], id_maps[-1]
+                active = [last_map[t] for t in last.zones[zone_idx].active_tracker_ids]
+            zone_summaries.append(ZoneSummary(
+                zone_id=zone_idx,
+                zone_name=name,
+                active_tracker_ids=active,
+                tracker_times=times,
+                max_time_sec=max(times.values()) if times else 0.0,
+                total_unique_trackers=len(times),
+            ))
+
+        total_frames = sum(r.total_frames for r in self.results)
+        motion_skip_ratio = None
+        if self.results and self.results[0].motion_skip_ratio is not None and total_frames:
+            motion_skip_ratio = sum(
+                (r.motion_skip_ratio or 0.0) * r.total_frames for r in self.results
+            ) / total_frames
+
+        skipped_ranges = None
+        if self.results and self.results[0].skipped_ranges is not None:
+            skipped_ranges = join_ranges([rng for r in self.results for rng in (r.skipped_ranges or [])])
+
+        tracks = None
+        if self.results and all(r.tracks is not None for r in self.results):
+            tracks = TrackTable.concatenate([
+                r.tracks.remap_ids(id_map) for r, id_map in zip(self.results, id_maps)
+            ])
+
+        return TimeInZoneResult(
+            zones=zone_summaries,
+            total_frames=total_frames,
+            fps=self.fps,
+            output_path=self.output_path,
+            motion_skip_ratio=motion_skip_ratio,
+            skipped_ranges=skipped_ranges,
+            tracks=tracks,
+        )
+
+    def to_dict(self) -> dict:
+        """Merged summary plus the windows and each window's own summary."""
+        summary = self.merged().to_dict()
+        summary["event_windows"] = [
+            {**window.to_dict(self.fps), "result": result.to_dict()}
+            for window, result in zip(self.windows, self.results)
+        ]
+        summary["scan"] = {
+            "video_frames": self.video_frames,
+            "scan_frames": self.scan_frames,
+            "processed_frames": self.processed_frames,
+            "fallback": self.fallback,
+        }
+        return summary
+
+
+def scan_occupancy(
+    video_path: Union[str, Path],
+    polygons: List[np.ndarray],
+    zone_idx: int,
+    detector: Detector,
+    target_size: Optional[Tuple[int, int]] = None,
+    scan_fps: float = 2.0,
+    scan_width: int = 480,
+    scan_imgsz: int = 320,
+    conf_threshold: float = 0.5,
+    iou_threshold: float = 0.5,
+    classes: Optional[List[int]] = None,
+    max_frames: Optional[int] = None,
+    decoder: str = "auto",
+    decoder_threads: int = 0,
+    progress_cb: Optional[Callable[[float], None]] = None,
+    cancel_token: Optional[CancelToken] = None,
+) -> OccupancyScan:
+    """
+    Sample the video at low rate and resolution for occupancy of one zone.
+
+    Args:
+        video_path: Path to input video.
+        polygons: Zone polygons in processed-frame coordinates (target_size).
+        zone_idx: Index of the zone to test.
+        detector: Detector to run on the sampled frames.
+        target_size: (width, height) the polygons are defined for (None = source size).
+        scan_fps: Sampled frames per second of video.
+        scan_width: Width the sampled frames are decoded at (aspect kept).
+        scan_imgsz: Inference size for the sampled frames.
+        conf_threshold: Confidence threshold for detections.
+        iou_threshold: IoU threshold for NMS.
+        classes: Optional list of class IDs counted as occupying the zone.
+        max_frames: Optional max frames to scan.
+        decoder: Video decoder backend ("auto", "pyav", "opencv").
+        decoder_threads: PyAV decoder threads (0 = FFmpeg default).
+        progress_cb: Optional callback with the fraction of the video scanned.
+        cancel_token: Optional job cancel token, checked every sampled frame.
+
+    Returns:
+        OccupancyScan with the sampled frame indices and their occupancy.
+
+    Raises:
+        JobCancelledError: If cancel_token is cancelled during the scan
+    """
+    with open_video(video_path, backend=decoder) as probe:
+        fps = probe.info.fps
+        total_frames = probe.info.frame_count
+        frame_width, frame_height = target_size or (probe.info.width, probe.info.height)
+    if max_frames:
+        total_frames = min(total_frames, int(max_frames))
+
+    # Scan frames keep the processed aspect ratio, so polygons only need scaling
+    scale = min(1.0, scan_width / float(frame_width))
+    scan_size = (max(1, int(round(frame_width * scale))), max(1, int(round(frame_height * scale))))
+    zone_mask = ZoneMask([polygon * scale for polygon in polygons], scan_size)
+    step = max(1, int(round(fps / scan_fps))) if scan_fps > 0 else 1
+
+    frames: List[int] = []
+    occupied: List[bool] = []
+    video = open_video(video_path, scan_size, backend=decoder, threads=decoder_threads)
+    try:
+        for i, frame in enumerate(video.read_frames(total_frames, step=step)):
+            if cancel_token is not None:
+                cancel_token.check()
+            detections = detector.detect(
+                [frame],
+                conf=conf_threshold,
+                iou=iou_threshold,
+                imgsz=scan_imgsz,
+            )[0]
+            if classes and len(detections) > 0:
+                detections = detections[np.isin(detections.class_id, classes)]
+
+            frame_index = i * step
+            frames.append(frame_index)
+            occupied.append(bool(zone_mask.membership(detections)[:, zone_idx].any()))
+
+            if progress_cb and total_frames > 0 and i % 10 == 0:
+                progress_cb(min(1.0, frame_index / total_frames))
+    finally:
+        video.close()
+
+    return OccupancyScan(
+        fps=fps,
+        total_frames=total_frames,
+        step=step,
+        frames=np.asarray(frames, dtype=np.int64),
+        occupied=np.asarray(occupied, dtype=bool),
+    )
+
+
+def plan_windows(
+    scan: OccupancyScan,
+    padding_seconds: float = 3.0,
+    max_gap_seconds: float = 2.0,
+    min_event_seconds: float = 1.0,
+) -> List[EventWindow]:
+    """
+    Turn occupied scan samples into padded, non-overlapping frame windows.
+
+    Args:
+        scan: Result of scan_occupancy().
+        padding_seconds: Frames added before and after each event.
+        max_gap_seconds: Unoccupied gaps up to this long do not split an event
+            (missed detections, crew blocking the view).
+        min_event_seconds: Drop events shorter than this.
+
+    Returns:
+        Windows in frame order.
+    """
+    fps = scan.fps
+    padding = int(round(padding_seconds * fps))
+    max_gap = max(scan.step, int(round(max_gap_seconds * fps)))
+    min_event = int(round(min_event_seconds * fps))
+
+    # Occupied samples -> [first sample, last sample + step) events
+    events: List[Tuple[int, int]] = []
+    for frame_index in scan.frames[scan.occupied]:
+        frame_index = int(frame_index)
+        if events and frame_index - (events[-1][1] - scan.step) <= max_gap:
+            events[-1] = (events[-1][0], frame_index + scan.step)
+        else:
+            events.append((frame_index, frame_index + scan.step))
+
+    windows: List[EventWindow] = []
+    for event_start, event_end in events:
+        event_end = min(event_end, scan.total_frames)
+        if event_end - event_start < min_event:
+            continue
+        start = max(0, event_start - padding)
+        end = min(scan.total_frames, event_end + padding)
+        if windows and start <= windows[-1].end:
+            windows[-1].end = max(windows[-1].end, end)
+            windows[-1].event_end = event_end
+        else:
+            windows.append(EventWindow(start, end, event_start, event_end))
+    return windows
+
+
+def run_time_in_zone_windowed(
+    video_path: Union[str, Path],
+    zone_config_path: Union[str, Path],
+    model_path: Union[str, Path],
+    scan_zone: str = SCAN_ZONE,
+    scan_fps: float = 2.0,
+    scan_width: int = 480,
+    scan_imgsz: int = 320,
+    padding_seconds: float = 3.0,
+    max_gap_seconds: float = 2.0,
+    min_event_seconds: float = 1.0,
+    write_output_video: bool = True,
+    output_path: Optional[Union[str, Path]] = None,
+    detector: Optional[Detector] = None,
+    progress_cb: Optional[Callable[[float], None]] = None,
+    **options: Any,
+) -> WindowedResult:
+    """
+    Run time-in-zone analysis only on the windows where the scan zone is occupied.
+
+    Args:
+        video_path: Path to input video.
+        zone_config_path: Path to zone configuration JSON.
+        model_path: Path to YOLO model weights.
+        scan_zone: Name of the zone whose occupancy marks an event.
+        scan_fps: Sampled frames per second of video in the scan.
+        scan_width: Width the scan decodes frames at.
+        scan_imgsz: Inference size for the scan.
+        padding_seconds: Video processed before and after each event.
+        max_gap_seconds: Unoccupied gaps up to this long do not split an event.
+        min_event_seconds: Ignore shorter occupancies (drive-throughs).
+        write_output_video: Whether to write the annotated output video
+            (the windows only, joined in order).
+        output_path: Path for output video. Required if write_output_video=True.
+        detector: Optional detector used for the scan and every window instead
+            of leasing one from the model registry (the caller owns it).
+        progress_cb: Optional callback with the fraction of the work done.
+        **options: Other run_time_in_zone() arguments (thresholds, target_size,
+            engine, detect_every_n, ...), applied to every window.
+
+    Returns:
+        WindowedResult with one TimeInZoneResult per window.
+
+    Raises:
+        ValueError: If scan_zone is not in the zone config
+    """
+    if write_output_video and output_path is None:
+        raise ValueError("output_path required when write_output_video=True")
+
+    polygons = load_polygons(zone_config_path)
+    zone_names = load_zone_names(zone_config_path)
+    if scan_zone not in zone_names:
+        raise ValueError(
+            f"Scan zone '{scan_zone}' not in zone config (zones: {', '.join(zone_names)})"
+        )
+
+    max_frames = options.pop("max_frames", None)
+    options.pop("start_frame", None)
+    options.pop("warmup_frames", None)
+
+    leased = detector is None
+    if leased:
+        detector = get_model_registry().checkout(
+            str(model_path), options.get("device"), options.get("engine", "ultralytics")
+        )
+
+    part_paths: List[str] = []
+    try:
+        def scan_progress(pct: float) -> None:
+            if progress_cb:
+                progress_cb(pct * SCAN_PROGRESS_SHARE)
+
+        scan = scan_occupancy(
+            video_path,
+            polygons,
+            zone_names.index(scan_zone),
+            detector,
+            target_size=options.get("target_size"),
+            scan_fps=scan_fps,
+            scan_width=scan_width,
+            scan_imgsz=scan_imgsz,
+            conf_threshold=options.get("conf_threshold", 0.5),
+            iou_threshold=options.get("iou_threshold", 0.5),
+            classes=options.get("classes"),
+            max_frames=max_frames,
+            decoder=options.get("decoder", "auto"),
+            decoder_threads=options.get("decoder_threads", 0),
+            progress_cb=scan_progress,
+            cancel_token=options.get("cancel_token"),
+        )
+        windows = plan_windows(scan, padding_seconds, max_gap_seconds, min_event_seconds)
+        fallback = not windows
+        if fallback:
+            print(f"Scan found no '{scan_zone}' event; processing the whole video")
+            windows = [EventWindow(0, scan.total_frames, 0, scan.total_frames)]
+
+        planned = sum(w.num_frames for w in windows)
+        print(
+            f"Scanned {len(scan.frames)} frames (every {scan.step}): {len(windows)} window(s), "
+            f"{planned}/{scan.total_frames} frames to process"
+        )
+
+        if write_output_video:
+            output_path = Path(output_path)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            part_paths = [
+                str(output_path.with_name(f"{output_path.stem}.window{i:03d}{output_path.suffix}"))
+                for i in range(len(windows))
+            ]
+
+        results: List[TimeInZoneResult] = []
+        done = 0
+        for i, window in enumerate(windows):
+            print(f"\nWindow {i + 1}/{len(windows)}: frames {window.start}-{window.end}")
+
+            def window_progress(pct: float, done: int = done, length: int = window.num_frames) -> None:
+                if progress_cb and planned:
+                    share = (done + pct * length) / planned
+                    progress_cb(SCAN_PROGRESS_SHARE + share * (1.0 - SCAN_PROGRESS_SHARE))
+
+            results.append(run_time_in_zone(
+                video_path=video_path,
+                zone_config_path=zone_config_path,
+                model_path=model_path,
+                start_frame=window.start,
+                max_frames=window.num_frames,
+                write_output_video=write_output_video,
+                output_path=part_paths[i] if write_output_video else None,
+                detector=detector,
+                progress_cb=window_progress,
+                **options,
+            ))
+            done += window.num_frames
+
+        if write_output_video:
+            if len(part_paths) == 1:
+                os.replace(part_paths[0], str(output_path))
+            else:
+                concat_videos(
+                    part_paths, str(output_path), cancel_token=options.get("cancel_token")
+                )
+            # Window parts are gone; only the joined video remains
+            for window_result in results:
+                window_result.output_path = None
+    finally:
+        if leased:
+            get_model_registry().checkin(detector)
+        for path in part_paths:
+            cleanup_temp_file(path)
+
+    result = WindowedResult(
+        zone_names=zone_names,
+        fps=scan.fps,
+        video_frames=scan.total_frames,
+        scan_frames=len(scan.frames),
+        windows=windows,
+        results=results,
+        fallback=fallback,
+        output_path=str(output_path) if write_output_video else None,
+    )
+
+    print("\n=== Event Window Summary ===")
+    for window, window_result in zip(result.windows, result.results):
+        pit_box = window_result.zones[zone_names.index(scan_zone)]
+        print(
+            f"  {window.start / scan.fps:.1f}s-{window.end / scan.fps:.1f}s: "
+            f"'{scan_zone}' max time {pit_box.max_time_sec:.2f}s"
+        )
+    return result
@@ -0,0 +1,479 @@
+"""
+Segment-parallel time-in-zone processing for long videos.
+
+A single run_time_in_zone() call is serial: one decode thread, one model,
+one tracker. For long onboard/broadcast files the video is instead split
+into time segments that run in a process pool:
+
+- Segment boundaries are snapped to codec keyframes (via ffprobe when
+  available), so each worker's seek lands on a keyframe.
+- Each segment (except the first) starts `overlap_frames` early. Those
+  warmup frames are detected and tracked, but not timed or rendered, so
+  ByteTrack has established tracks by the time the segment's own range starts.
+- Across each boundary, tracks are stitched by box IoU over the overlap
+  window. The previous segment's last frames and the next segment's warmup
+  frames are the same frames, seen by two independent trackers.
+- Per-zone tracker times are summed under the stitched ids into one
+  TimeInZoneResult. Per-segment H.264 videos (same encoder settings) are
+  joined with ffmpeg without re-encoding.
+- Recorded per-frame tracks (record_tracks=True) are joined the same way,
+  under the stitched ids.
+
+Labels drawn into the per-segment videos use that segment's tracker ids and
+times; the stitched ids and totals are only in the returned result.
+
+A job's cancel token is mirrored into a multiprocessing Event shared with
+the workers, so cancelling stops every segment's frame loop. Each worker
+writes its segment's progress into a shared array, which the parent polls
+while it waits and reports through progress_cb.
+"""
+from __future__ import annotations
+
+import multiprocessing
+import os
+import shutil
+import subprocess
+from collections import defaultdict
+from concurrent.futures import FIRST_EXCEPTION, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+import supervision as sv
+
+from app.model.shot_gate import join_ranges
+from app.utils.cancellation import CancelToken
+from app.utils.video_decode import open_video
+from app.utils.video_transcode import cleanup_temp_file, concat_videos
+
+from .time_in_zone import TimeInZoneResult, ZoneSummary, run_time_in_zone
+from .track_store import TrackTable
+
+# Minimum mean IoU over the overlap window for two tracks to be the same object
+STITCH_IOU_THRESHOLD = 0.5
+
+# Worker processes are spawned: forking a process that already holds a
+# loaded model and native thread pools is not safe
+MP_START_METHOD = "spawn"
+
+# Seconds between progress reports while the segments run
+PROGRESS_POLL_SECONDS = 1.0
+
+# Worker process: cancel event and per-segment progress array shared with the
+# parent (set by _init_worker)
+_cancel_event: Optional[Any] = None
+_segment_progress: Optional[Any] = None
+
+# frame index -> (tracker ids, xyxy boxes)
+TrackWindow = Dict[int, Tuple[np.ndarray, np.ndarray]]
+
+
+@dataclass
+class SegmentResult:
+    """Output of one segment worker."""
+    index: int
+    start: int
+    end: int
+    result: TimeInZoneResult
+    # Tracks in the warmup window before `start`
+    head: TrackWindow = field(default_factory=dict)
+    # Tracks in the last overlap window before `end`
+    tail: TrackWindow = field(default_factory=dict)
+    output_path: Optional[str] = None
+
+
+def probe_keyframes(video_path: Union[str, Path], fps: float) -> List[int]:
+    """
+    Frame indices of the video's codec keyframes.
+
+    Returns an empty list if ffprobe is not available or fails; callers
+    then split on exact frame counts (seeks still work, just slower).
+    """
+    if shutil.which("ffprobe") is None:
+        return []
+
+    cmd = [
+        "ffprobe",
+        "-v", "error",
+        "-select_streams", "v:0",
+        "-skip_frame", "nokey",
+        "-show_entries", "frame=pts_time",
+        "-of", "csv=p=0",
+        str(video_path),
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+    except (OSError, subprocess.TimeoutExpired):
+        return []
+    if result.returncode != 0:
+        return []
+
+    keyframes = set()
+    for line in result.stdout.splitlines():
+        value = line.strip().rstrip(",")
+        try:
+            keyframes.add(int(round(float(value) * fps)))
+        except ValueError:
+            continue
+    return sorted(keyframes)
+
+
+def plan_segments(
+    total_frames: int,
+    num_segments: int,
+    min_segment_frames: int,
+    keyframes: Optional[List[int]] = None,
+) -> List[Tuple[int, int]]:
+    """
+    Split [0, total_frames) into up to num_segments (start, end) ranges.
+
+    Boundaries are placed evenly, then moved to the nearest keyframe if
+    keyframes are given. Segments shorter than min_segment_frames are
+    avoided by using fewer segments.
+    """
+    count = max(1, min(num_segments, total_frames // max(1, min_segment_frames)))
+    if count == 1:
+        return [(0, total_frames)]
+
+    keyframes = np.asarray(sorted(keyframes or []), dtype=np.int64)
+    boundaries = []
+    for i in range(1, count):
+        boundary = int(round(total_frames * i / count))
+        if len(keyframes):
+            boundary = int(keyframes[np.abs(keyframes - boundary).argmin()])
+        if 0 < boundary < total_frames:
+            boundaries.append(boundary)
+
+    edges = [0] + sorted(set(boundaries)) + [total_frames]
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def match_tracks(
+    previous: TrackWindow,
+    following: TrackWindow,
+    iou_threshold: float = STITCH_IOU_THRESHOLD,
+) -> Dict[int, int]:
+    """
+    Match tracker ids of the following segment to ids of the previous one.
+
+    Scores every id pair by their IoU summed over the shared frames, divided
+    by the number of frames the following id is present, then matches
+    one-to-one greedily from the best score down.
+
+    Returns:
+        Mapping of following-segment id -> previous-segment id.
+    """
+    iou_sums: Dict[Tuple[int, int], float] = defaultdict(float)
+    presence: Dict[int, int] = defaultdict(int)
+
+    for frame_index, (ids_b, boxes_b) in following.items():
+        for tid in ids_b:
+            presence[int(tid)] += 1
+        if frame_index not in previous or len(ids_b) == 0:
+            continue
+        ids_a, boxes_a = previous[frame_index]
+        if len(ids_a) == 0:
+            continue
+
+        iou = sv.box_iou_batch(boxes_a, boxes_b)
+        for i, j in zip(*np.nonzero(iou)):
+            iou_sums[(int(ids_a[i]), int(ids_b[j]))] += float(iou[i, j])
+
+    candidates = sorted(
+        ((total / presence[b], a, b) for (a, b), total in iou_sums.items()),
+        reverse=True,
+    )
+
+    matches: Dict[int, int] = {}
+    used = set()
+    for score, a, b in candidates:
+        if score < iou_threshold:
+            break
+        if b in matches or a in used:
+            continue
+        matches[b] = a
+        used.add(a)
+    return matches
+
+
+def merge_segment_results(
+    segments: List[SegmentResult],
+    iou_threshold: float = STITCH_IOU_THRESHOLD,
+) -> TimeInZoneResult:
+    """
+    Stitch tracker ids across segments and merge per-zone times.
+
+    Global ids are assigned in order of first appearance; a track matched
+    across a boundary keeps the id it had in the previous segment.
+    """
+    segments = sorted(segments, key=lambda s: s.index)
+    next_id = 1
+    previous_map: Dict[int, int] = {}
+    id_maps: List[Dict[int, int]] = []
+
+    for i, segment in enumerate(segments):
+        matches = match_tracks(segments[i - 1].tail, segment.head, iou_threshold) if i else {}
+        local_ids = set()
+        for zone in segment.result.zones:
+            local_ids.update(zone.tracker_times.keys())
+        for window in (segment.head, segment.tail):
+            for ids, _ in window.values():
+                local_ids.update(int(t) for t in ids)
+        if segment.result.tracks is not None:
+            local_ids.update(int(t) for t in np.unique(segment.result.tracks.tracker_id))
+
+        id_map: Dict[int, int] = {}
+        for local_id in sorted(local_ids):
+            matched = matches.get(local_id)
+            if matched is not None and matched in previous_map:
+                id_map[local_id] = previous_map[matched]
+            else:
+                id_map[local_id] = next_id
+                next_id += 1
+        id_maps.append(id_map)
+        previous_map = id_map
+
+    first = segments[0].result
+    zone_times: List[Dict[int, float]] = [defaultdict(float) for _ in first.zones]
+    for segment, id_map in zip(segments, id_maps):
+        for zone_idx, zone in enumerate(segment.result.zones):
+            for local_id, seconds in zone.tracker_times.items():
+                zone_times[zone_idx][id_map[local_id]] += seconds
+
+    last, last_map = segments[-1].result, id_maps[-1]
+    zone_summaries = []
+    for zone_idx, zone in enumerate(first.zones):
+        times = dict(zone_times[zone_idx])
+        zone_summaries.append(ZoneSummary(
+            zone_id=zone.zone_id,
+            zone_name=zone.zone_name,
+            active_tracker_ids=[last_map[t] for t in last.zones[zone_idx].active_tracker_ids],
+            tracker_times=times,
+            max_time_sec=max(times.values()) if times else 0.0,
+            total_unique_trackers=len(times),
+        ))
+
+    total_frames = sum(s.result.total_frames for s in segments)
+    motion_skip_ratio = None
+    if first.motion_skip_ratio is not None and total_frames:
+        motion_skip_ratio = sum(
+            (s.result.motion_skip_ratio or 0.0) * s.result.total_frames for s in segments
+        ) / total_frames
+
+    skipped_ranges = None
+    if first.skipped_ranges is not None:
+        skipped_ranges = join_ranges([r for s in segments for r in (s.result.skipped_ranges or [])])
+
+    tracks = None
+    if all(s.result.tracks is not None for s in segments):
+        tracks = TrackTable.concatenate([
+            s.result.tracks.remap_ids(id_map) for s, id_map in zip(segments, id_maps)
+        ])
+
+    return TimeInZoneResult(
+        zones=zone_summaries,
+        total_frames=total_frames,
+        fps=first.fps,
+        motion_skip_ratio=motion_skip_ratio,
+        skipped_ranges=skipped_ranges,
+        tracks=tracks,
+    )
+
+
+def _init_worker(
+    num_threads: int,
+    cancel_event: Optional[Any] = None,
+    segment_progress: Optional[Any] = None,
+) -> None:
+    """Split the cores between worker processes instead of oversubscribing."""
+    global _cancel_event, _segment_progress
+    _cancel_event = cancel_event
+    _segment_progress = segment_progress
+    cv2.setNumThreads(num_threads)
+    try:
+        import torch
+        torch.set_num_threads(num_threads)
+    except ImportError:
+        pass
+
+
+def _run_segment(
+    index: int,
+    start: int,
+    end: int,
+    overlap_frames: int,
+    output_path: Optional[str],
+    options: Dict[str, Any],
+) -> SegmentResult:
+    """Worker: run time-in-zone on [start - warmup, end) and record boundary tracks."""
+    warmup = min(overlap_frames, start)
+    head: TrackWindow = {}
+    tail: TrackWindow = {}
+
+    def report(pct: float) -> None:
+        if _segment_progress is not None:
+            _segment_progress[index] = pct
+
+    def record(frame_index: int, detections: sv.Detections, _zones: List[sv.Detections]) -> None:
+        if detections.tracker_id is None:
+            return
+        entry = (detections.tracker_id.astype(int), detections.xyxy.astype(np.float32))
+        if frame_index < start:
+            head[frame_index] = entry
+        if frame_index >= end - overlap_frames:
+            tail[frame_index] = entry
+
+    result = run_time_in_zone(
+        start_frame=start - warmup,
+        warmup_frames=warmup,
+        max_frames=end - (start - warmup),
+        write_output_video=output_path is not None,
+        output_path=output_path,
+        frame_callback=record,
+        progress_cb=report,
+        cancel_token=CancelToken(_cancel_event) if _cancel_event is not None else None,
+        **options,
+    )
+    return SegmentResult(
+        index=index,
+        start=start,
+        end=end,
+        result=result,
+        head=head,
+        tail=tail,
+        output_path=output_path,
+    )
+
+
+def run_time_in_zone_segmented(
+    video_path: Union[str, Path],
+    zone_config_path: Union[str, Path],
+    model_path: Union[str, Path],
+    workers: int,
+    overlap_frames: int = 60,
+    min_segment_seconds: float = 30.0,
+    write_output_video: bool = True,
+    output_path: Optional[Union[str, Path]] = None,
+    cpu_threads: Optional[int] = None,
+    progress_cb: Optional[Callable[[float], None]] = None,
+    **options: Any,
+) -> TimeInZoneResult:
+    """
+    Run time-in-zone analysis on a video split into segments across processes.
+
+    Args:
+        video_path: Path to input video.
+        zone_config_path: Path to zone configuration JSON.
+        model_path: Path to YOLO model weights.
+        workers: Number of worker processes (and segments).
+        overlap_frames: Frames each segment re-processes before its start to
+            warm up tracking and stitch tracks with the previous segment.
+        min_segment_seconds: Use fewer segments rather than shorter ones.
+        write_output_video: Whether to write the annotated output video.
+        output_path: Path for output video. Required if write_output_video=True.
+        cpu_threads: Cores to split between the worker processes (default: all).
+        progress_cb: Optional callback with the fraction of frames processed
+            over all segments (0.0-1.0), called from the calling thread.
+        **options: Other run_time_in_zone() arguments (thresholds, target_size,
+            engine, detect_every_n, ...), applied to every segment.
+
+    Returns:
+        TimeInZoneResult with tracker ids stitched across segments.
+    """
+    if write_output_video and output_path is None:
+        raise ValueError("output_path required when write_output_video=True")
+
+    with open_video(video_path, backend=options.get("decoder", "auto")) as video:
+        fps = video.info.fps
+        total_frames = video.info.frame_count
+
+    max_frames = options.pop("max_frames", None)
+    if max_frames:
+        total_frames = min(total_frames, int(max_frames))
+    cancel_token: Optional[CancelToken] = options.pop("cancel_token", None)
+
+    common = dict(
+        video_path=video_path,
+        zone_config_path=zone_config_path,
+        model_path=model_path,
+        **options,
+    )
+
+    plan = plan_segments(
+        total_frames,
+        workers,
+        int(min_segment_seconds * fps),
+        keyframes=probe_keyframes(video_path, fps),
+    )
+    if len(plan) == 1:
+        return run_time_in_zone(
+            write_output_video=write_output_video,
+            output_path=output_path,
+            max_frames=max_frames,
+            cancel_token=cancel_token,
+            progress_cb=progress_cb,
+            **common,
+        )
+
+    print(f"Processing {total_frames} frames in {len(plan)} segments: {plan}")
+
+    part_paths: List[Optional[str]] = [None] * len(plan)
+    if write_output_video:
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        part_paths = [
+            str(output_path.with_name(f"{output_path.stem}.part{i:03d}{output_path.suffix}"))
+            for i in range(len(plan))
+        ]
+
+    threads = max(1, (cpu_threads or os.cpu_count() or 1) // len(plan))
+    # ffmpeg decoders/encoders get the same per-worker share of the cores
+    for key in ("decoder_threads", "encoder_threads"):
+        if not common.get(key):
+            common[key] = threads
+
+    mp_context = multiprocessing.get_context(MP_START_METHOD)
+    cancel_event = mp_context.Event()
+    # Fraction of each segment's frames processed, written by its worker
+    segment_progress = mp_context.Array("d", len(plan), lock=False)
+    segment_frames = np.array([end - start for start, end in plan], dtype=np.float64)
+    stop_watching = cancel_token.on_cancel(cancel_event.set) if cancel_token else None
+    try:
+        with ProcessPoolExecutor(
+            max_workers=len(plan),
+            mp_context=mp_context,
+            initializer=_init_worker,
+            initargs=(threads, cancel_event, segment_progress),
+        ) as pool:
+            futures = [
+                pool.submit(_run_segment, i, start, end, overlap_frames, part_paths[i], common)
+                for i, (start, end) in enumerate(plan)
+            ]
+            while True:
+                done, pending = wait(futures, timeout=PROGRESS_POLL_SECONDS, return_when=FIRST_EXCEPTION)
+                if progress_cb:
+                    fractions = np.array(segment_progress[:], dtype=np.float64)
+                    progress_cb(float(np.dot(fractions, segment_frames) / segment_frames.sum()))
+                if not pending or any(f.exception() is not None for f in done):
+                    break
+            segments = [f.result() for f in futures]
+
+        result = merge_segment_results(segments)
+
+        if write_output_video:
+            concat_videos(part_paths, str(output_path), cancel_token=cancel_token)
+            result.output_path = str(output_path)
+    finally:
+        if stop_watching:
+            stop_watching()
+        for path in part_paths:
+            if path:
+                cleanup_temp_file(path)
+
+    print("\n=== Stitched Zone Summary ===")
+    for z in result.zones:
+        print(f"  {z.zone_name}: {z.total_unique_trackers} unique trackers, max time {z.max_time_sec:.2f}s")
+
+    return result
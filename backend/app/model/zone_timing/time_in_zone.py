@@ -1,25 +1,53 @@
 """Time-in-zone tracking using Supervision and YOLO.
 
 This module implements Roboflow-style time-in-zone tracking:
-- YOLO detection per frame
-- ByteTrack for object tracking
-- FPSBasedTimer for timing objects in each zone
-- Optional annotated video output with zone polygons and time labels
+- YOLO detection per frame (through a pluggable detector engine)
+- ByteTrack (or a lightweight IoU tracker) for object tracking
+- ZoneTimerBank for timing objects in all zones at once
+- Optional annotated video output with zone polygons and time labels,
+  encoded to browser-compatible H.264 in a single pass
 """
 from __future__ import annotations
 
 import json
+import math
 import os
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Tuple, Union
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
 
-import cv2
 import numpy as np
 import supervision as sv
-from ultralytics import YOLO
 
-from .zones import load_polygons
+from app.model.detectors import Detector
+from app.model.keyframes import TrackExtrapolator, is_keyframe
+from app.model.model_registry import get_model_registry
+from app.model.motion_gate import MotionGate
+from app.model.shot_gate import ShotGate, format_skipped_ranges, load_reference_frame
+from app.model.trackers import create_tracker, tracker_name
+from app.utils.cancellation import CancelToken
+from app.utils.pipeline import BackgroundWorker, prefetch
+from app.utils.video_decode import open_video
+from app.utils.video_transcode import H264PipeWriter
+
+from .track_store import TrackRecorder, TrackTable
+from .zones import ZoneMask, ZoneOverlay, load_polygons, reference_frame_path, zones_roi
+
+# Max frames buffered between pipeline stages (decode -> inference -> render)
+PIPELINE_QUEUE_SIZE = 8
+
+# frame_callback(frame_index, tracked detections, detections in each zone)
+FrameCallback = Callable[[int, sv.Detections, List[sv.Detections]], None]
+
+# Zone outline colors, by zone index
+ZONE_COLORS = [
+    sv.Color(255, 100, 100),   # Light blue
+    sv.Color(100, 255, 100),   # Light green
+    sv.Color(100, 100, 255),   # Light red
+    sv.Color(255, 255, 100),   # Cyan
+    sv.Color(255, 100, 255),   # Magenta
+    sv.Color(100, 255, 255),   # Yellow
+]
 
 
 @dataclass
@@ -81,6 +109,100 @@ class FPSBasedTimer:
             self._active_ids.clear()
 
 
+class ZoneTimerBank:
+    """
+    Frame counts of every tracker in every zone, in one (trackers x zones) array.
+    
+    Array-backed replacement for one FPSBasedTimer per zone: tracker ids are
+    mapped to dense row indices, and each frame updates all zones with one
+    vectorized add instead of a Python loop per zone and detection. Per-zone
+    get_time / get_all_times give the same values as FPSBasedTimer.
+    """
+    
+    def __init__(self, fps: float, num_zones: int, initial_capacity: int = 64):
+        self.fps = fps
+        self.num_zones = num_zones
+        self._counts = np.zeros((max(1, initial_capacity), num_zones), dtype=np.int32)
+        # Row -> tracker id, and tracker ids sorted for lookup with their rows
+        self._row_ids = np.empty(0, dtype=np.int64)
+        self._sorted_ids = np.empty(0, dtype=np.int64)
+        self._sorted_rows = np.empty(0, dtype=np.int64)
+        # Last tick: rows and zone membership of the detections
+        self._active_rows = np.empty(0, dtype=np.int64)
+        self._active_membership = np.zeros((0, num_zones), dtype=bool)
+    
+    def _lookup(self, tracker_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows of tracker_ids, and a mask of which ids are known."""
+        if len(self._sorted_ids) == 0:
+            return np.zeros(len(tracker_ids), dtype=np.int64), np.zeros(len(tracker_ids), dtype=bool)
+        pos = np.minimum(np.searchsorted(self._sorted_ids, tracker_ids), len(self._sorted_ids) - 1)
+        return self._sorted_rows[pos], self._sorted_ids[pos] == tracker_ids
+    
+    def _rows(self, tracker_ids: np.ndarray) -> np.ndarray:
+        """Dense rows for tracker_ids, adding rows for ids seen for the first time."""
+        rows, known = self._lookup(tracker_ids)
+        if known.all():
+            return rows
+        
+        new_ids = np.unique(tracker_ids[~known])
+        first_row = len(self._row_ids)
+        needed = first_row + len(new_ids)
+        if needed > len(self._counts):
+            grown = np.zeros((max(needed, 2 * len(self._counts)), self.num_zones), dtype=np.int32)
+            grown[:first_row] = self._counts[:first_row]
+            self._counts = grown
+        
+        self._row_ids = np.concatenate([self._row_ids, new_ids])
+        order = np.argsort(self._row_ids, kind="stable")
+        self._sorted_ids = self._row_ids[order]
+        self._sorted_rows = order
+        return self._lookup(tracker_ids)[0]
+    
+    def tick(self, tracker_ids: Optional[np.ndarray], membership: np.ndarray) -> np.ndarray:
+        """
+        Count one frame for each tracker in each zone it is in.
+        
+        Args:
+            tracker_ids: (n,) tracker ids of the frame's detections (None if untracked).
+            membership: (n, num_zones) boolean zone membership of the detections.
+            
+        Returns:
+            (n, num_zones) accumulated seconds of each detection's tracker per zone.
+        """
+        if tracker_ids is None or len(tracker_ids) == 0:
+            self._active_rows = np.empty(0, dtype=np.int64)
+            self._active_membership = np.zeros((0, self.num_zones), dtype=bool)
+            return np.zeros((0, self.num_zones))
+        
+        rows = self._rows(np.asarray(tracker_ids, dtype=np.int64))
+        np.add.at(self._counts, rows, membership.astype(np.int32))
+        self._active_rows = rows
+        self._active_membership = membership
+        return self._counts[rows] / self.fps
+    
+    def get_time(self, tracker_id: int, zone_idx: int) -> float:
+        """Get accumulated time for a tracker_id in a zone."""
+        rows, known = self._lookup(np.array([tracker_id], dtype=np.int64))
+        if not known[0]:
+            return 0.0
+        return self._counts[rows[0], zone_idx] / self.fps
+    
+    def get_all_times(self, zone_idx: int) -> Dict[int, float]:
+        """Get all accumulated times in a zone (trackers that were in it)."""
+        counts = self._counts[:len(self._row_ids), zone_idx]
+        present = np.nonzero(counts)[0]
+        return {int(self._row_ids[r]): counts[r] / self.fps for r in present}
+    
+    def active_ids(self, zone_idx: int) -> List[int]:
+        """Tracker ids in the zone on the last tick."""
+        rows = self._active_rows[self._active_membership[:, zone_idx]]
+        return [int(t) for t in self._row_ids[rows]]
+    
+    def reset(self) -> None:
+        """Reset all timers."""
+        self.__init__(self.fps, self.num_zones)
+
+
 @dataclass
 class ZoneSummary:
     """Summary statistics for a single zone."""
@@ -99,6 +221,11 @@ class TimeInZoneResult:
     total_frames: int
     fps: float
     output_path: Optional[str] = None
+    motion_skip_ratio: Optional[float] = None
+    # [start, end) frame ranges skipped by the shot gate (None if disabled)
+    skipped_ranges: Optional[List[Tuple[int, int]]] = None
+    # Per-frame tracks (only with record_tracks=True; not part of to_dict)
+    tracks: Optional[TrackTable] = None
     
     def to_dict(self) -> dict:
         """Convert to dictionary for JSON serialization."""
@@ -117,6 +244,14 @@ class TimeInZoneResult:
             "total_frames": self.total_frames,
             "fps": self.fps,
             "output_path": self.output_path,
+            "motion_skip_ratio": (
+                round(self.motion_skip_ratio, 4) if self.motion_skip_ratio is not None else None
+            ),
+            "skipped_ranges": (
+                format_skipped_ranges(self.skipped_ranges, self.fps)
+                if self.skipped_ranges is not None
+                else None
+            ),
         }
 
 
@@ -124,7 +259,11 @@ def load_zone_names(zone_configuration_path: Union[str, Path]) -> List[str]:
     """Load zone names from configuration file."""
     with open(zone_configuration_path, "r") as f:
         config = json.load(f)
-    
+    return zone_names_from_config(config)
+
+
+def zone_names_from_config(config: dict) -> List[str]:
+    """Zone names from a parsed zone configuration (default "zone_<i>")."""
     names = []
     for i, zone in enumerate(config.get("zones", [])):
         names.append(zone.get("name", f"zone_{i}"))
@@ -138,6 +277,91 @@ def format_time_label(tracker_id: int, seconds: float) -> str:
     return f"#{tracker_id} {minutes:02d}:{secs:02d}"
 
 
+def time_labels(
+    detections: sv.Detections,
+    membership: np.ndarray,
+    times: np.ndarray,
+) -> Tuple[np.ndarray, List[str]]:
+    """
+    One time label per (zone, detection in zone), zone by zone.
+    
+    Returns:
+        Detection rows of the labels and the label texts.
+    """
+    zone_ids, label_rows = np.nonzero(membership.T)
+    if detections.tracker_id is None:
+        return label_rows[:0], []
+    labels = [
+        format_time_label(int(detections.tracker_id[row]), times[row, zone_idx])
+        for zone_idx, row in zip(zone_ids, label_rows)
+    ]
+    return label_rows, labels
+
+
+class ZoneFrameRenderer:
+    """Render stage: draws boxes, zones and time labels on frames and encodes them."""
+    
+    def __init__(
+        self,
+        out: H264PipeWriter,
+        polygons: List[np.ndarray],
+        zone_names: List[str],
+        frame_size: Tuple[int, int],
+    ):
+        self.out = out
+        self.box_annotator = sv.BoxAnnotator(
+            thickness=2,
+        )
+        self.label_annotator = sv.LabelAnnotator(
+            text_scale=0.5,
+            text_thickness=1,
+            text_padding=5,
+        )
+        # Zone outlines and names are static: render them once
+        self.zone_overlay = ZoneOverlay(polygons, zone_names, frame_size, ZONE_COLORS)
+    
+    def __call__(self, item: Tuple[np.ndarray, sv.Detections, np.ndarray, List[str], bool]) -> None:
+        frame, detections, label_rows, labels, pit_shot = item
+        
+        # Frames from other cameras are encoded as they are
+        if not pit_shot:
+            self.out.write(frame)
+            return
+        
+        # Annotate in place: the decoded frame is not used after this stage
+        frame = self.box_annotator.annotate(scene=frame, detections=detections)
+        frame = self.zone_overlay.apply(frame)
+        
+        # Time labels of all zones in one pass
+        if labels:
+            frame = self.label_annotator.annotate(
+                scene=frame,
+                detections=detections[label_rows],
+                labels=labels,
+            )
+        
+        self.out.write(frame)
+
+
+def roi_imgsz(
+    roi: Tuple[int, int, int, int],
+    frame_size: Tuple[int, int],
+    base_imgsz: int = 640,
+) -> int:
+    """
+    Inference size for an ROI crop that keeps the full-frame detection scale.
+    
+    The full frame is letterboxed to base_imgsz on its long side. Shrinking
+    imgsz by the same factor as the crop keeps objects at the same pixel
+    size in the model input, so only the pixels outside the ROI are saved.
+    Rounded up to the model stride (32).
+    """
+    x1, y1, x2, y2 = roi
+    width, height = frame_size
+    scale = max(x2 - x1, y2 - y1) / float(max(width, height))
+    return max(32, int(math.ceil(base_imgsz * scale / 32)) * 32)
+
+
 def run_time_in_zone(
     video_path: Union[str, Path],
     zone_config_path: Union[str, Path],
@@ -149,6 +373,27 @@ def run_time_in_zone(
     output_path: Optional[Union[str, Path]] = None,
     target_size: Optional[Tuple[int, int]] = None,
     max_frames: Optional[int] = None,
+    device: Optional[str] = None,
+    engine: str = "ultralytics",
+    detect_every_n: int = 1,
+    motion_threshold: Optional[float] = None,
+    motion_max_skip_frames: int = 30,
+    roi_crop: bool = False,
+    roi_padding: int = 32,
+    detector: Optional[Detector] = None,
+    start_frame: int = 0,
+    warmup_frames: int = 0,
+    frame_callback: Optional[FrameCallback] = None,
+    record_tracks: bool = False,
+    decoder: str = "auto",
+    decoder_threads: int = 0,
+    encoder_threads: int = 0,
+    progress_cb: Optional[Callable[[float], None]] = None,
+    shot_filter: bool = False,
+    shot_reference: Optional[Union[str, Path]] = None,
+    shot_match_threshold: float = 0.4,
+    tracker: str = "bytetrack",
+    cancel_token: Optional[CancelToken] = None,
 ) -> TimeInZoneResult:
     """
     Run time-in-zone analysis on a video.
@@ -156,10 +401,13 @@ def run_time_in_zone(
     This function:
     - Loads polygon zones from JSON config
     - Runs YOLO inference per frame
-    - Tracks objects using ByteTrack
+    - Tracks objects using ByteTrack (or the IoU tracker)
     - Times how long each tracked object stays in each zone
     - Optionally writes annotated output video
     
+    Decoding and rendering/encoding run on their own threads, connected to
+    the inference/tracking loop by bounded queues; frame order is preserved.
+    
     Args:
         video_path: Path to input video.
         zone_config_path: Path to zone configuration JSON.
@@ -168,12 +416,57 @@ def run_time_in_zone(
         iou_threshold: IoU threshold for NMS.
         classes: Optional list of class IDs to filter. If None or empty, all classes.
         write_output_video: Whether to write annotated output video.
-        output_path: Path for output video. Required if write_output_video=True.
+        output_path: Path for the output video (browser-compatible H.264 MP4).
+            Required if write_output_video=True.
         target_size: Optional (width, height) to resize frames.
         max_frames: Optional max frames to process (for testing).
+        device: Inference device (e.g. "cpu", "cuda:0"); None lets Ultralytics choose.
+        engine: Detector engine ("ultralytics", "onnx", "onnx_int8", "openvino", "opencv").
+        detect_every_n: Run YOLO + ByteTrack only on every n-th frame. Boxes on
+            frames in between are extrapolated from the last keyframes; zone
+            timers still tick every frame so times stay in real seconds.
+        motion_threshold: Enable the motion gate: if the mean gray-level change
+            inside the zone polygons since the last inferred frame is below this,
+            the previous frame's detections are reused instead of running YOLO.
+            None disables the gate.
+        motion_max_skip_frames: Force inference after this many gated frames in a row.
+        roi_crop: Run detection only on the padded bounding box of the union of
+            the zone polygons; boxes are mapped back to frame coordinates.
+        roi_padding: Pixels of context added around the zone union for roi_crop.
+        detector: Optional detector instance to use instead of leasing one for
+            model_path/device/engine from the model registry (the caller owns it).
+        start_frame: First frame to process (0-based); max_frames counts from here.
+        warmup_frames: Number of leading frames that are detected and tracked
+            but neither timed nor written, so tracks are established before
+            the timed range starts (used by segment-parallel processing).
+        frame_callback: Optional hook called for every frame (warmup included)
+            with the absolute frame index, the tracked detections and the
+            detections inside each zone.
+        record_tracks: Keep the tracked detections of every timed frame in
+            TimeInZoneResult.tracks, so timings can be recomputed for other
+            zones without re-running detection (see track_store).
+        decoder: Video decoder backend ("auto", "pyav", "opencv"). PyAV decodes
+            on several threads and scales to target_size inside the decoder.
+        decoder_threads: PyAV decoder threads (0 = FFmpeg default).
+        encoder_threads: ffmpeg H.264 encoder threads (0 = one per core).
+        progress_cb: Optional callback with the fraction of frames processed
+            (0.0-1.0), called from the calling thread every 30 frames.
+        shot_filter: Enable the shot gate: frames from shots that do not match
+            the pit camera reference frame (track cameras, graphics, replays)
+            skip detection and are neither timed nor annotated.
+        shot_reference: Pit camera reference image for shot_filter; defaults
+            to the zone config's "reference_frame".
+        shot_match_threshold: Largest histogram distance (0-1) to the
+            reference frame for a shot to count as the pit camera.
+        tracker: Multi-object tracker ("bytetrack" or "iou"; see app.model.trackers).
+        cancel_token: Optional job cancel token, checked every frame; cancelling
+            also kills the output encoder.
         
     Returns:
         TimeInZoneResult with zone summaries and statistics.
+    
+    Raises:
+        JobCancelledError: If cancel_token is cancelled during the run
     """
     video_path = Path(video_path)
     zone_config_path = Path(zone_config_path)
@@ -195,195 +488,259 @@ def run_time_in_zone(
     
     print(f"Loaded {len(polygons)} zones: {zone_names}")
     
-    # Open video
-    cap = cv2.VideoCapture(str(video_path))
-    if not cap.isOpened():
-        raise RuntimeError(f"Could not open video: {video_path}")
+    tracker = tracker_name(tracker)
     
-    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
-    original_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    original_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    
-    if target_size:
-        frame_width, frame_height = target_size
-    else:
-        frame_width, frame_height = original_width, original_height
+    # Shot gate compares every frame with a reference frame of the pit camera
+    shot_gate = None
+    if shot_filter:
+        reference = Path(shot_reference) if shot_reference else reference_frame_path(zone_config_path)
+        if reference is None:
+            raise ValueError(
+                "shot_filter needs a pit camera reference frame: set \"reference_frame\" "
+                "in the zone config or pass shot_reference"
+            )
+        shot_gate = ShotGate(load_reference_frame(reference), match_threshold=shot_match_threshold)
+        print(f"Shot gate enabled (reference {reference.name}, threshold {shot_match_threshold})")
     
-    print(f"Video: {original_width}x{original_height} @ {fps:.1f}fps, {total_frames} frames")
-    if target_size:
-        print(f"Resizing to: {frame_width}x{frame_height}")
+    # Open video (frames come out of the decoder already at target_size)
+    video = open_video(video_path, target_size, backend=decoder, threads=decoder_threads)
     
-    # Initialize YOLO model
-    print(f"Loading YOLO model: {model_path}")
-    model = YOLO(str(model_path))
+    fps = video.info.fps
+    original_width, original_height = video.info.width, video.info.height
+    total_frames = video.info.frame_count
+    frame_width, frame_height = video.frame_size
     
-    # Initialize tracker
-    tracker = sv.ByteTrack(
-        track_activation_threshold=0.25,
-        lost_track_buffer=30,
-        minimum_matching_threshold=0.8,
-        frame_rate=int(fps),
+    print(
+        f"Video: {original_width}x{original_height} @ {fps:.1f}fps, {total_frames} frames "
+        f"({video.info.duration_s:.1f}s, {video.backend} decoder)"
     )
     
-    # Create PolygonZones
-    zones = [sv.PolygonZone(polygon=poly) for poly in polygons]
+    start_frame = max(0, int(start_frame))
+    if start_frame:
+        video.seek(start_frame)
+        print(f"Starting at frame {start_frame} ({warmup_frames} warmup frames)")
+    if target_size:
+        print(f"Resizing to: {frame_width}x{frame_height}")
     
-    # Create timers for each zone
-    timers = [FPSBasedTimer(fps=fps) for _ in zones]
+    detect_every_n = max(1, int(detect_every_n))
+    if detect_every_n > 1:
+        print(f"Detecting every {detect_every_n} frames (boxes extrapolated in between)")
+    
+    # Initialize tracker. It only sees keyframes, so give it the keyframe rate
+    # to keep its lost-track buffer constant in seconds.
+    object_tracker = create_tracker(tracker, frame_rate=max(1, int(fps / detect_every_n)))
+    print(f"Tracker: {object_tracker.name}")
+    extrapolator = TrackExtrapolator(frame_size=(frame_width, frame_height))
+    
+    # Detection region: the padded union of the zones, or the whole frame
+    roi = (0, 0, frame_width, frame_height)
+    if roi_crop:
+        roi = zones_roi(polygons, (frame_width, frame_height), padding=roi_padding)
+        roi_area = (roi[2] - roi[0]) * (roi[3] - roi[1])
+        print(f"ROI crop: {roi} ({roi_area / float(frame_width * frame_height):.0%} of frame)")
+    roi_x1, roi_y1, roi_x2, roi_y2 = roi
+    
+    # Motion gate measures change inside the zones only
+    motion_gate = None
+    if motion_threshold is not None:
+        motion_gate = MotionGate(
+            threshold=motion_threshold,
+            max_skip_frames=motion_max_skip_frames,
+            polygons=polygons,
+        )
+        print(f"Motion gate enabled (threshold {motion_threshold})")
+    
+    # Tracks of the timed frames (warmup frames are not recorded)
+    recorder = None
+    if record_tracks:
+        recorder = TrackRecorder(
+            fps=fps,
+            frame_size=(frame_width, frame_height),
+            start_frame=start_frame + warmup_frames,
+        )
     
-    # Define colors for zones
-    zone_colors = [
-        sv.Color(255, 100, 100),   # Light blue
-        sv.Color(100, 255, 100),   # Light green
-        sv.Color(100, 100, 255),   # Light red
-        sv.Color(255, 255, 100),   # Cyan
-        sv.Color(255, 100, 255),   # Magenta
-        sv.Color(100, 255, 255),   # Yellow
-    ]
+    # Rasterize the zones once; membership of all detections in all zones is
+    # then one lookup per frame
+    zone_mask = ZoneMask(polygons, (frame_width, frame_height))
     
-    # Setup annotators
-    box_annotator = sv.BoxAnnotator(
-        thickness=2,
-    )
-    label_annotator = sv.LabelAnnotator(
-        text_scale=0.5,
-        text_thickness=1,
-        text_padding=5,
-    )
+    # Timers for all zones
+    timers = ZoneTimerBank(fps=fps, num_zones=len(polygons))
     
     # Setup video writer
     out = None
     if write_output_video:
         output_path = Path(output_path)
         output_path.parent.mkdir(parents=True, exist_ok=True)
-        fourcc = cv2.VideoWriter_fourcc(*"mp4v")
-        out = cv2.VideoWriter(
+        # Rendered frames are piped straight into one H.264 encode
+        out = H264PipeWriter(
             str(output_path),
-            fourcc,
             fps,
             (frame_width, frame_height),
+            threads=encoder_threads,
+            cancel_token=cancel_token,
         )
-        if not out.isOpened():
-            raise RuntimeError(f"Could not create output video: {output_path}")
     
     # Process frames
     frames_processed = 0
-    frames_to_process = total_frames
+    frames_to_process = max(0, total_frames - start_frame)
     if max_frames:
-        frames_to_process = min(max_frames, total_frames)
+        frames_to_process = min(max_frames, frames_to_process)
     
     print(f"\nProcessing {frames_to_process} frames...")
     
+    # Staged pipeline: decode thread -> inference/tracking/timing (this thread)
+    # -> render/encode thread. Bounded queues keep memory flat and frame order.
+    frame_source = prefetch(
+        video.read_frames(frames_to_process),
+        maxsize=PIPELINE_QUEUE_SIZE,
+        name="tiz-decode",
+    )
+    renderer = (
+        BackgroundWorker(
+            ZoneFrameRenderer(out, polygons, zone_names, (frame_width, frame_height)),
+            maxsize=PIPELINE_QUEUE_SIZE,
+            name="tiz-render",
+        )
+        if out
+        else None
+    )
+    
+    # Lease a warm detector (loads weights only on first use or after the file changes)
+    leased = detector is None
+    if leased:
+        print(f"Acquiring YOLO model: {model_path} (engine: {engine})")
+        detector = get_model_registry().checkout(str(model_path), device, engine)
+    
+    # ROI crops get a proportionally smaller inference size (same object scale)
+    imgsz = None
+    if roi_crop:
+        imgsz = roi_imgsz(roi, (frame_width, frame_height), detector.imgsz)
+        print(f"ROI inference size: {imgsz} (full frame: {detector.imgsz})")
+    
+    detections = sv.Detections.empty()
+    was_pit_shot = True
+    
     try:
-        while frames_processed < frames_to_process:
-            ok, frame = cap.read()
-            if not ok:
-                break
-            
-            # Resize if needed
-            if target_size:
-                frame = cv2.resize(frame, target_size)
-            
-            # Run YOLO inference
-            results = model(
-                frame,
-                verbose=False,
-                conf=conf_threshold,
-                iou=iou_threshold,
-            )[0]
-            
-            # Convert to supervision Detections
-            detections = sv.Detections.from_ultralytics(results)
-            
-            # Filter by classes if specified
-            if classes and len(classes) > 0 and len(detections) > 0:
-                class_mask = np.isin(detections.class_id, classes)
-                detections = detections[class_mask]
-            
-            # Update tracker
-            detections = tracker.update_with_detections(detections)
-            
-            # Annotate frame
-            annotated_frame = frame.copy()
-            
-            # Draw boxes
-            annotated_frame = box_annotator.annotate(
-                scene=annotated_frame,
-                detections=detections,
+        for frame in frame_source:
+            if cancel_token is not None:
+                cancel_token.check()
+            # Absolute index keeps the keyframe schedule aligned across segments
+            frame_index = start_frame + frames_processed
+            warmup = frames_processed < warmup_frames
+            # Frames from other cameras skip inference; the first frame back
+            # on the pit camera is always detected
+            pit_shot = shot_gate is None or shot_gate.check(frame, frame_index)
+            resumed = pit_shot and not was_pit_shot
+            was_pit_shot = pit_shot
+            run_detection = pit_shot and (resumed or is_keyframe(frame_index, detect_every_n))
+            static_frame = (
+                run_detection
+                and not resumed
+                and motion_gate is not None
+                and motion_gate.should_skip(frame)
             )
             
-            # Process each zone
-            for zone_idx, (zone, timer) in enumerate(zip(zones, timers)):
-                color = zone_colors[zone_idx % len(zone_colors)]
-                
-                # Draw zone polygon
-                cv2.polylines(
-                    annotated_frame,
-                    [polygons[zone_idx]],
-                    isClosed=True,
-                    color=(color.b, color.g, color.r),
-                    thickness=2,
-                )
+            if not pit_shot:
+                detections = sv.Detections.empty()
+            elif static_frame:
+                # Static scene: keep the previous frame's detections, and stop
+                # extrapolating them with the last keyframe's velocity
+                if detect_every_n > 1:
+                    extrapolator.hold(detections, frame_index)
+            elif run_detection:
+                # Run YOLO inference (on the zone ROI only when roi_crop is set)
+                if roi_crop:
+                    detect_input = np.ascontiguousarray(frame[roi_y1:roi_y2, roi_x1:roi_x2])
+                else:
+                    detect_input = frame
+                detections = detector.detect(
+                    [detect_input],
+                    conf=conf_threshold,
+                    iou=iou_threshold,
+                    imgsz=imgsz,
+                )[0]
                 
-                # Add zone name label
-                zone_name = zone_names[zone_idx] if zone_idx < len(zone_names) else f"Zone {zone_idx}"
-                centroid = polygons[zone_idx].mean(axis=0).astype(int)
-                cv2.putText(
-                    annotated_frame,
-                    zone_name,
-                    (centroid[0] - 30, centroid[1] - 10),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    0.5,
-                    (color.b, color.g, color.r),
-                    2,
-                )
-                
-                # Get detections in this zone
-                zone_mask = zone.trigger(detections)
-                detections_in_zone = detections[zone_mask]
+                # Map ROI boxes back to frame coordinates
+                if roi_crop and len(detections) > 0:
+                    detections.xyxy = detections.xyxy + np.array(
+                        [roi_x1, roi_y1, roi_x1, roi_y1], dtype=detections.xyxy.dtype
+                    )
                 
-                # Update timer for detections in zone
-                time_in_zone = timer.tick(detections_in_zone)
+                # Filter by classes if specified
+                if classes and len(classes) > 0 and len(detections) > 0:
+                    class_mask = np.isin(detections.class_id, classes)
+                    detections = detections[class_mask]
                 
-                # Draw time labels for detections in zone
-                if len(detections_in_zone) > 0 and detections_in_zone.tracker_id is not None:
-                    labels = []
-                    for tid in detections_in_zone.tracker_id:
-                        if tid is not None:
-                            tid = int(tid)
-                            time_sec = timer.get_time(tid)
-                            labels.append(format_time_label(tid, time_sec))
-                        else:
-                            labels.append("")
-                    
-                    annotated_frame = label_annotator.annotate(
-                        scene=annotated_frame,
-                        detections=detections_in_zone,
-                        labels=labels,
-                    )
+                # Update tracker
+                detections = object_tracker.update(detections)
+                if detect_every_n > 1:
+                    extrapolator.update(detections, frame_index)
+            else:
+                # Carry tracked boxes forward from the last keyframe
+                detections = extrapolator.predict(frame_index)
+            
+            # Zone membership and timers for all zones at once (warmup frames
+            # only establish tracks; nothing is timed or drawn yet)
+            membership = zone_mask.membership(detections)
+            if not warmup:
+                times = timers.tick(detections.tracker_id, membership)
             
-            # Write frame
-            if out:
-                out.write(annotated_frame)
+            if recorder and not warmup:
+                recorder.add(frame_index, detections)
+            
+            if frame_callback:
+                frame_callback(
+                    frame_index,
+                    detections,
+                    [detections[membership[:, z]] for z in range(zone_mask.num_zones)],
+                )
+            
+            # Hand off to render/encode stage with one time label per
+            # (zone, detection in zone), zone by zone
+            if renderer and not warmup:
+                label_rows, labels = time_labels(detections, membership, times)
+                renderer.submit((frame, detections, label_rows, labels, pit_shot))
             
             frames_processed += 1
             
             if frames_processed % 30 == 0:
                 print(f"  Processed {frames_processed}/{frames_to_process} frames")
+                if progress_cb and frames_to_process > 0:
+                    progress_cb(min(1.0, frames_processed / frames_to_process))
+        
+        if renderer:
+            renderer.close()
+        if out:
+            # Flush the encoder; raises if ffmpeg failed
+            out.close()
     
     finally:
-        cap.release()
+        if leased:
+            get_model_registry().checkin(detector)
+        frame_source.close()
+        if renderer:
+            renderer.close(reraise=False)
+        video.close()
         if out:
             out.release()
     
     print(f"\nDone! Processed {frames_processed} frames")
+    if motion_gate is not None:
+        print(
+            f"Motion gate skipped {motion_gate.frames_skipped}/{motion_gate.frames_checked} "
+            f"detection frames ({motion_gate.skip_ratio:.1%})"
+        )
+    if shot_gate is not None:
+        print(
+            f"Shot gate skipped {shot_gate.frames_skipped}/{shot_gate.frames_checked} frames "
+            f"({shot_gate.shots} shots)"
+        )
     
     # Build result summary
     zone_summaries = []
-    for zone_idx, (zone, timer, name) in enumerate(zip(zones, timers, zone_names)):
-        all_times = timer.get_all_times()
-        active_ids = list(timer._active_ids)
+    for zone_idx, name in enumerate(zone_names):
+        all_times = timers.get_all_times(zone_idx)
+        active_ids = timers.active_ids(zone_idx)
         max_time = max(all_times.values()) if all_times else 0.0
         
         zone_summaries.append(ZoneSummary(
@@ -397,9 +754,14 @@ def run_time_in_zone(
     
     result = TimeInZoneResult(
         zones=zone_summaries,
-        total_frames=frames_processed,
+        total_frames=max(0, frames_processed - warmup_frames),
         fps=fps,
         output_path=str(output_path) if output_path else None,
+        motion_skip_ratio=motion_gate.skip_ratio if motion_gate is not None else None,
+        skipped_ranges=(
+            shot_gate.skipped_ranges(start_frame + warmup_frames) if shot_gate is not None else None
+        ),
+        tracks=recorder.table() if recorder else None,
     )
     
     # Print summary
@@ -415,3 +777,120 @@ def run_time_in_zone(
     
     return result
 
+
+def render_time_in_zone(
+    video_path: Union[str, Path],
+    zone_config_path: Union[str, Path],
+    tracks: TrackTable,
+    output_path: Union[str, Path],
+    skipped_ranges: Optional[List[Tuple[int, int]]] = None,
+    decoder: str = "auto",
+    decoder_threads: int = 0,
+    encoder_threads: int = 0,
+    progress_cb: Optional[Callable[[float], None]] = None,
+    cancel_token: Optional[CancelToken] = None,
+) -> str:
+    """
+    Render the annotated video of a time-in-zone run from its stored tracks.
+    
+    Draws the same boxes, zones and time labels as run_time_in_zone() with
+    write_output_video=True, without running detection or tracking: the
+    boxes come from the track store and the timers are replayed from them.
+    Only the table's frame ranges are rendered, so an event-windowed run
+    gives the joined windows, like its inline output. Timers restart with
+    each window (as in the per-window runs); labels show the merged ids.
+    
+    Args:
+        video_path: Path to the input video of the run.
+        zone_config_path: Path to zone configuration JSON.
+        tracks: Stored tracks of the run (see track_store).
+        output_path: Path for the output video (browser-compatible H.264 MP4).
+        skipped_ranges: [start, end) frame ranges the shot gate skipped;
+            these frames are encoded without annotations.
+        decoder: Video decoder backend ("auto", "pyav", "opencv").
+        decoder_threads: PyAV decoder threads (0 = FFmpeg default).
+        encoder_threads: ffmpeg H.264 encoder threads (0 = one per core).
+        progress_cb: Optional callback with the fraction of frames rendered
+            (0.0-1.0), called every 30 frames.
+        cancel_token: Optional cancel token, checked every frame.
+        
+    Returns:
+        The output video path.
+    
+    Raises:
+        JobCancelledError: If cancel_token is cancelled during the render
+    """
+    video_path = Path(video_path)
+    output_path = Path(output_path)
+    if not video_path.exists():
+        raise FileNotFoundError(f"Video not found: {video_path}")
+    
+    polygons = load_polygons(zone_config_path)
+    zone_names = load_zone_names(zone_config_path)
+    
+    # Boxes are in the processed frame coordinates: decode at that size
+    video = open_video(video_path, tracks.frame_size, backend=decoder, threads=decoder_threads)
+    frame_ranges = tracks.frame_ranges()
+    frames_to_render = tracks.num_frames
+    
+    zone_mask = ZoneMask(polygons, tracks.frame_size)
+    timers = ZoneTimerBank(fps=tracks.fps, num_zones=len(polygons))
+    
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    out = H264PipeWriter(
+        str(output_path),
+        tracks.fps,
+        tracks.frame_size,
+        threads=encoder_threads,
+        cancel_token=cancel_token,
+    )
+    render_frame = ZoneFrameRenderer(out, polygons, zone_names, tracks.frame_size)
+    
+    frames_rendered = 0
+    try:
+        for range_start, range_end in frame_ranges:
+            video.seek(range_start)
+            timers.reset()
+            
+            # Row range of every frame in the (frame-ordered) table
+            row_bounds = np.searchsorted(tracks.frame, np.arange(range_start, range_end + 1))
+            skipped = np.zeros(range_end - range_start, dtype=bool)
+            for start, end in skipped_ranges or []:
+                skipped[max(0, start - range_start):max(0, end - range_start)] = True
+            
+            frame_source = prefetch(
+                video.read_frames(range_end - range_start),
+                maxsize=PIPELINE_QUEUE_SIZE,
+                name="tiz-decode",
+            )
+            try:
+                for offset, frame in enumerate(frame_source):
+                    if cancel_token is not None:
+                        cancel_token.check()
+                    
+                    lo, hi = row_bounds[offset], row_bounds[offset + 1]
+                    detections = sv.Detections(
+                        xyxy=tracks.xyxy[lo:hi],
+                        confidence=tracks.confidence[lo:hi],
+                        class_id=tracks.class_id[lo:hi].astype(int),
+                        tracker_id=tracks.tracker_id[lo:hi].astype(int),
+                    )
+                    membership = zone_mask.membership(detections)
+                    times = timers.tick(detections.tracker_id, membership)
+                    label_rows, labels = time_labels(detections, membership, times)
+                    render_frame((frame, detections, label_rows, labels, not skipped[offset]))
+                    
+                    frames_rendered += 1
+                    if progress_cb and frames_rendered % 30 == 0 and frames_to_render > 0:
+                        progress_cb(min(1.0, frames_rendered / frames_to_render))
+            finally:
+                frame_source.close()
+        
+        # Flush the encoder; raises if ffmpeg failed
+        out.close()
+    finally:
+        video.close()
+        out.release()
+    
+    print(f"Rendered {frames_rendered} frames from stored tracks to {output_path}")
+    return str(output_path)
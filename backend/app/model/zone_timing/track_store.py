@@ -0,0 +1,264 @@
+"""Per-frame track store for time-in-zone runs.
+
+run_time_in_zone() can record every tracked detection it times (frame
+index, tracker_id, class, confidence, box) into a TrackTable. The table is
+saved per job as a compressed columnar .npz file, so zone timings for a new
+or edited zone config can be recomputed from it without another YOLO pass.
+
+Zone membership only depends on each row's box, and a timer only counts the
+frames a tracker id is in a zone, so re-zoning is one zone-bitmask lookup
+over the whole table plus a bincount per zone - no per-frame loop.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import supervision as sv
+
+from .zones import ZoneMask
+
+if TYPE_CHECKING:
+    from .time_in_zone import TimeInZoneResult
+
+# Bumped when the on-disk layout changes (version 1 files have no frame ranges)
+TRACK_STORE_VERSION = 2
+
+
+@dataclass
+class TrackTable:
+    """
+    Columnar per-frame tracks of one time-in-zone run.
+
+    Boxes are in the coordinates of the processed frames (after target_size
+    resizing), i.e. the coordinates the zone polygons are defined in.
+    """
+    fps: float
+    frame_size: Tuple[int, int]
+    # Timed frame range [start_frame, end_frame)
+    start_frame: int
+    end_frame: int
+    frame: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int32))
+    tracker_id: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int32))
+    class_id: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int16))
+    confidence: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.float32))
+    xyxy: np.ndarray = field(default_factory=lambda: np.empty((0, 4), dtype=np.float32))
+    # Processed [start, end) ranges in order: several for event-windowed runs,
+    # None for one continuous range [start_frame, end_frame)
+    ranges: Optional[List[Tuple[int, int]]] = None
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def frame_ranges(self) -> List[Tuple[int, int]]:
+        """The processed [start, end) frame ranges, in order."""
+        if self.ranges is None:
+            return [(self.start_frame, self.end_frame)]
+        return list(self.ranges)
+
+    @property
+    def num_frames(self) -> int:
+        """Number of processed frames (gaps between windows excluded)."""
+        return sum(end - start for start, end in self.frame_ranges())
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Write the table as a compressed .npz file."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f,
+                version=np.int32(TRACK_STORE_VERSION),
+                fps=np.float64(self.fps),
+                frame_size=np.asarray(self.frame_size, dtype=np.int32),
+                frame_range=np.asarray([self.start_frame, self.end_frame], dtype=np.int64),
+                ranges=np.asarray(self.frame_ranges(), dtype=np.int64).reshape(-1, 2),
+                frame=self.frame,
+                tracker_id=self.tracker_id,
+                class_id=self.class_id,
+                confidence=self.confidence,
+                xyxy=self.xyxy,
+            )
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "TrackTable":
+        """Read a table written by save()."""
+        with np.load(str(path)) as data:
+            version = int(data["version"])
+            if version not in (1, TRACK_STORE_VERSION):
+                raise ValueError(f"Unsupported track store version {version}: {path}")
+            start_frame, end_frame = (int(v) for v in data["frame_range"])
+            ranges = None
+            if version >= 2:
+                ranges = [(int(start), int(end)) for start, end in data["ranges"]]
+            width, height = (int(v) for v in data["frame_size"])
+            return cls(
+                fps=float(data["fps"]),
+                frame_size=(width, height),
+                start_frame=start_frame,
+                end_frame=end_frame,
+                frame=data["frame"],
+                tracker_id=data["tracker_id"],
+                class_id=data["class_id"],
+                confidence=data["confidence"],
+                xyxy=data["xyxy"],
+                ranges=ranges,
+            )
+
+    @classmethod
+    def concatenate(cls, tables: List["TrackTable"]) -> "TrackTable":
+        """
+        Join tables of consecutive frame ranges in order.
+
+        Adjacent ranges (video segments) merge into one; gaps between them
+        (event windows) are kept as separate ranges.
+        """
+        first, last = tables[0], tables[-1]
+        ranges: List[Tuple[int, int]] = []
+        for table in tables:
+            for start, end in table.frame_ranges():
+                if ranges and start <= ranges[-1][1]:
+                    ranges[-1] = (ranges[-1][0], max(end, ranges[-1][1]))
+                else:
+                    ranges.append((start, end))
+        return cls(
+            fps=first.fps,
+            frame_size=first.frame_size,
+            start_frame=first.start_frame,
+            end_frame=last.end_frame,
+            frame=np.concatenate([t.frame for t in tables]),
+            tracker_id=np.concatenate([t.tracker_id for t in tables]),
+            class_id=np.concatenate([t.class_id for t in tables]),
+            confidence=np.concatenate([t.confidence for t in tables]),
+            xyxy=np.concatenate([t.xyxy for t in tables]),
+            ranges=ranges if len(ranges) > 1 else None,
+        )
+
+    def remap_ids(self, id_map: Dict[int, int]) -> "TrackTable":
+        """Copy of the table with tracker ids replaced through id_map."""
+        keys = np.array(sorted(id_map), dtype=np.int64)
+        values = np.array([id_map[k] for k in keys], dtype=np.int32)
+        ids = values[np.searchsorted(keys, self.tracker_id)] if len(keys) else self.tracker_id
+        return TrackTable(
+            fps=self.fps,
+            frame_size=self.frame_size,
+            start_frame=self.start_frame,
+            end_frame=self.end_frame,
+            frame=self.frame,
+            tracker_id=ids,
+            class_id=self.class_id,
+            confidence=self.confidence,
+            xyxy=self.xyxy,
+            ranges=self.ranges,
+        )
+
+
+class TrackRecorder:
+    """Accumulates tracked detections frame by frame into a TrackTable."""
+
+    def __init__(self, fps: float, frame_size: Tuple[int, int], start_frame: int = 0):
+        self.fps = fps
+        self.frame_size = frame_size
+        self.start_frame = start_frame
+        self.end_frame = start_frame
+        self._frames: List[np.ndarray] = []
+        self._tracker_ids: List[np.ndarray] = []
+        self._class_ids: List[np.ndarray] = []
+        self._confidences: List[np.ndarray] = []
+        self._boxes: List[np.ndarray] = []
+
+    def add(self, frame_index: int, detections: sv.Detections) -> None:
+        """Record the tracked detections of one timed frame."""
+        self.end_frame = frame_index + 1
+        if len(detections) == 0 or detections.tracker_id is None:
+            return
+
+        n = len(detections)
+        self._frames.append(np.full(n, frame_index, dtype=np.int32))
+        self._tracker_ids.append(detections.tracker_id.astype(np.int32))
+        self._class_ids.append(
+            detections.class_id.astype(np.int16)
+            if detections.class_id is not None
+            else np.zeros(n, dtype=np.int16)
+        )
+        self._confidences.append(
+            detections.confidence.astype(np.float32)
+            if detections.confidence is not None
+            else np.ones(n, dtype=np.float32)
+        )
+        self._boxes.append(detections.xyxy.astype(np.float32))
+
+    def table(self) -> TrackTable:
+        """The recorded rows as a TrackTable."""
+        table = TrackTable(
+            fps=self.fps,
+            frame_size=self.frame_size,
+            start_frame=self.start_frame,
+            end_frame=self.end_frame,
+        )
+        if self._frames:
+            table.frame = np.concatenate(self._frames)
+            table.tracker_id = np.concatenate(self._tracker_ids)
+            table.class_id = np.concatenate(self._class_ids)
+            table.confidence = np.concatenate(self._confidences)
+            table.xyxy = np.concatenate(self._boxes)
+        return table
+
+
+def rezone_tracks(
+    tracks: TrackTable,
+    polygons: List[np.ndarray],
+    zone_names: Optional[List[str]] = None,
+) -> TimeInZoneResult:
+    """
+    Recompute zone timings from stored tracks for a (new) set of zone polygons.
+
+    Gives the same per-zone tracker times as run_time_in_zone() with the
+    same tracks: a tracker accumulates one frame for every frame its box
+    is in the zone.
+
+    Args:
+        tracks: Stored tracks of a previous run.
+        polygons: Zone polygons in the tracks' frame coordinates.
+        zone_names: Optional names per polygon (default "zone_<i>").
+
+    Returns:
+        TimeInZoneResult without an output video.
+    """
+    # Imported here: time_in_zone records tracks with this module
+    from .time_in_zone import TimeInZoneResult, ZoneSummary
+
+    zone_names = list(zone_names or [])
+    zone_names += [f"zone_{i}" for i in range(len(zone_names), len(polygons))]
+
+    membership = ZoneMask(polygons, tracks.frame_size).membership_xyxy(tracks.xyxy)
+    last_frame = tracks.end_frame - 1
+    in_last_frame = tracks.frame == last_frame
+
+    # Dense tracker indices so per-zone counts are a single bincount
+    unique_ids, dense_ids = np.unique(tracks.tracker_id, return_inverse=True)
+
+    zone_summaries = []
+    for zone_idx, name in enumerate(zone_names[:len(polygons)]):
+        in_zone = membership[:, zone_idx]
+        counts = np.bincount(dense_ids[in_zone], minlength=len(unique_ids))
+        present = np.nonzero(counts)[0]
+        times = {int(unique_ids[i]): counts[i] / tracks.fps for i in present}
+        active = sorted({int(t) for t in tracks.tracker_id[in_zone & in_last_frame]})
+
+        zone_summaries.append(ZoneSummary(
+            zone_id=zone_idx,
+            zone_name=name,
+            active_tracker_ids=active,
+            tracker_times=times,
+            max_time_sec=max(times.values()) if times else 0.0,
+            total_unique_trackers=len(times),
+        ))
+
+    return TimeInZoneResult(
+        zones=zone_summaries,
+        total_frames=tracks.num_frames,
+        fps=tracks.fps,
+    )
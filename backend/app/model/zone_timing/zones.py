@@ -2,14 +2,19 @@
 
 This module provides functions to:
 - Load polygon zones from a JSON configuration file
+- Locate the pit camera reference frame the zones were drawn on
+- Compute the region of interest covered by the zones
+- Rasterize the zones into a per-pixel bitmask for vectorized membership tests
+- Pre-render the static zone layer (outlines and names) once for video output
 - Draw zones onto video frames using supervision
 """
 from __future__ import annotations
 
 import json
 from pathlib import Path
-from typing import List, Union
+from typing import List, Optional, Tuple, Union
 
+import cv2
 import numpy as np
 import supervision as sv
 
@@ -47,7 +52,17 @@ def load_polygons(zone_configuration_path: Union[str, Path]) -> List[np.ndarray]
     with open(config_path, "r") as f:
         config = json.load(f)
     
-    if "zones" not in config:
+    return polygons_from_config(config)
+
+
+def polygons_from_config(config: dict) -> List[np.ndarray]:
+    """
+    Polygon zones from a parsed zone configuration (see load_polygons).
+    
+    Raises:
+        ValueError: If the configuration format is invalid.
+    """
+    if not isinstance(config, dict) or "zones" not in config:
         raise ValueError("Zone configuration must contain a 'zones' key")
     
     polygons = []
@@ -64,6 +79,190 @@ def load_polygons(zone_configuration_path: Union[str, Path]) -> List[np.ndarray]
     return polygons
 
 
+def reference_frame_path(zone_configuration_path: Union[str, Path]) -> Optional[Path]:
+    """
+    Pit camera reference frame of a zone configuration, if it names one.
+    
+    The optional top-level "reference_frame" key holds an image path,
+    relative to the configuration file unless absolute:
+    {"reference_frame": "pit_cam.jpg", "zones": [...]}
+    """
+    config_path = Path(zone_configuration_path)
+    with open(config_path, "r") as f:
+        config = json.load(f)
+    
+    reference = config.get("reference_frame") if isinstance(config, dict) else None
+    if not reference:
+        return None
+    reference = Path(reference)
+    return reference if reference.is_absolute() else config_path.parent / reference
+
+
+def zones_roi(
+    polygons: List[np.ndarray],
+    frame_size: Tuple[int, int],
+    padding: int = 32,
+) -> Tuple[int, int, int, int]:
+    """
+    Compute the padded bounding box of the union of all zone polygons.
+    
+    Args:
+        polygons: List of polygon vertices as (N, 2) arrays in frame coordinates.
+        frame_size: (width, height) of the frame the polygons refer to.
+        padding: Pixels added on every side so objects straddling a zone
+            edge are still fully visible to the detector.
+        
+    Returns:
+        (x1, y1, x2, y2) clipped to the frame, with x2/y2 exclusive.
+        The whole frame if there are no polygons.
+    """
+    width, height = frame_size
+    if not polygons:
+        return 0, 0, width, height
+    
+    points = np.concatenate(polygons, axis=0)
+    x1, y1 = points.min(axis=0) - padding
+    x2, y2 = points.max(axis=0) + padding + 1
+    
+    return (
+        int(max(0, x1)),
+        int(max(0, y1)),
+        int(min(width, x2)),
+        int(min(height, y2)),
+    )
+
+
+class ZoneMask:
+    """
+    Zone polygons rasterized once into a per-pixel bitmask.
+    
+    Pixel (y, x) holds one bit per zone (packed into bytes, so overlapping
+    zones and any number of zones are supported). Membership of all
+    detections in all zones is then a single fancy-indexing lookup of their
+    anchor points, instead of one PolygonZone.trigger() call per zone.
+    
+    Matches sv.PolygonZone's default trigger: a detection is in a zone when
+    the bottom-center of its box, rounded to the nearest pixel, is inside.
+    Anchors outside the frame are in no zone.
+    """
+    
+    def __init__(self, polygons: List[np.ndarray], frame_size: Tuple[int, int]):
+        """
+        Args:
+            polygons: Zone polygons as (N, 2) arrays in frame coordinates.
+            frame_size: (width, height) of the frames the detections are in.
+        """
+        width, height = frame_size
+        self.frame_size = (int(width), int(height))
+        self.num_zones = len(polygons)
+        
+        self._bits = np.zeros((height, width, max(1, (self.num_zones + 7) // 8)), dtype=np.uint8)
+        layer = np.zeros((height, width), dtype=np.uint8)
+        for zone_idx, polygon in enumerate(polygons):
+            layer.fill(0)
+            cv2.fillPoly(layer, [polygon.astype(np.int32)], 1)
+            self._bits[:, :, zone_idx // 8] |= layer << (zone_idx % 8)
+    
+    def membership_xyxy(self, xyxy: np.ndarray) -> np.ndarray:
+        """
+        Zone membership of boxes.
+        
+        Args:
+            xyxy: (n, 4) boxes in frame coordinates.
+            
+        Returns:
+            (n, num_zones) boolean matrix; [i, z] is True if box i is in zone z.
+        """
+        if len(xyxy) == 0 or self.num_zones == 0:
+            return np.zeros((len(xyxy), self.num_zones), dtype=bool)
+        
+        width, height = self.frame_size
+        x = np.rint((xyxy[:, 0] + xyxy[:, 2]) / 2).astype(np.int64)
+        y = np.rint(xyxy[:, 3]).astype(np.int64)
+        in_frame = (x >= 0) & (y >= 0) & (x < width) & (y < height)
+        
+        packed = self._bits[np.clip(y, 0, height - 1), np.clip(x, 0, width - 1)]
+        packed[~in_frame] = 0
+        return np.unpackbits(packed, axis=1, count=self.num_zones, bitorder="little").astype(bool)
+    
+    def membership(self, detections: sv.Detections) -> np.ndarray:
+        """(n_detections, num_zones) boolean zone membership of detections."""
+        return self.membership_xyxy(detections.xyxy)
+
+
+class ZoneOverlay:
+    """
+    Zone outlines and names pre-rendered once and pasted onto frames in place.
+    
+    The zone layer is identical on every frame, so it is drawn once into an
+    overlay plus a coverage mask; each frame then only blends the covered
+    pixels, instead of redrawing every polygon and name with OpenCV. Fully
+    covered pixels are copied with one masked copy over the zones' bounding
+    rectangle; anti-aliased edge pixels are alpha-blended in integer math.
+    """
+    
+    def __init__(
+        self,
+        polygons: List[np.ndarray],
+        zone_names: List[str],
+        frame_size: Tuple[int, int],
+        colors: List[sv.Color],
+        thickness: int = 2,
+    ):
+        """
+        Args:
+            polygons: Zone polygons as (N, 2) arrays in frame coordinates.
+            zone_names: Name drawn near each zone's centroid.
+            frame_size: (width, height) of the frames to draw on.
+            colors: Zone colors, cycled if there are more zones than colors.
+            thickness: Outline and text thickness in pixels.
+        """
+        width, height = frame_size
+        layer = np.zeros((height, width, 3), dtype=np.uint8)
+        mask = np.zeros((height, width), dtype=np.uint8)
+        
+        for zone_idx, polygon in enumerate(polygons):
+            color = colors[zone_idx % len(colors)]
+            bgr = (color.b, color.g, color.r)
+            name = zone_names[zone_idx] if zone_idx < len(zone_names) else f"Zone {zone_idx}"
+            centroid = polygon.mean(axis=0).astype(int)
+            origin = (int(centroid[0]) - 30, int(centroid[1]) - 10)
+            
+            # Same drawing on the layer (in color) and the mask (coverage)
+            for target, value in ((layer, bgr), (mask, 255)):
+                cv2.polylines(target, [polygon], isClosed=True, color=value, thickness=thickness)
+                cv2.putText(target, name, origin, cv2.FONT_HERSHEY_SIMPLEX, 0.5, value, thickness)
+        
+        # Fully covered pixels, restricted to their bounding rectangle
+        solid = np.where(mask == 255, 255, 0).astype(np.uint8)
+        x, y, w, h = cv2.boundingRect(solid)
+        self._rect = (slice(y, y + h), slice(x, x + w))
+        self._solid_layer = np.ascontiguousarray(layer[self._rect])
+        self._solid_mask = np.ascontiguousarray(solid[self._rect])
+        
+        # Partially covered (anti-aliased) pixels, as flat byte offsets into a
+        # BGR frame. The layer holds color * alpha there:
+        # out = (pixel * (255 - alpha) + layer * 255) / 255
+        edge = np.flatnonzero((mask > 0) & (mask < 255))
+        self._edge_offsets = (edge[:, None] * 3 + np.arange(3)).ravel()
+        alpha = np.repeat(mask.reshape(-1)[edge].astype(np.uint32), 3)
+        self._edge_keep = 255 - alpha
+        self._edge_add = layer.reshape(-1)[self._edge_offsets].astype(np.uint32) * 255 + 127
+    
+    def apply(self, frame: np.ndarray) -> np.ndarray:
+        """Blend the zone layer onto a BGR frame in place; returns frame."""
+        # Flat offsets need a C-contiguous buffer (decoded frames already are)
+        target = frame if frame.flags.c_contiguous else np.ascontiguousarray(frame)
+        if len(self._edge_offsets):
+            flat = target.reshape(-1)
+            pixels = flat[self._edge_offsets].astype(np.uint32)
+            flat[self._edge_offsets] = (pixels * self._edge_keep + self._edge_add) // 255
+        cv2.copyTo(self._solid_layer, self._solid_mask, target[self._rect])
+        if target is not frame:
+            frame[...] = target
+        return frame
+
+
 def draw_zones(frame: np.ndarray, polygons: List[np.ndarray]) -> np.ndarray:
     """
     Draw polygon zones onto a frame using supervision.
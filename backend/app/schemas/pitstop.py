@@ -1,18 +1,33 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from uuid import UUID
 
 from pydantic import BaseModel, Field
 
+from app import settings
 from app.db.models import JobStatus
 
 
+def _render_pending(job) -> bool:
+    """Analysis is complete and the annotated video is still to be rendered (retries left)."""
+    return (
+        job.status == JobStatus.COMPLETE
+        and job.output_path is None
+        and getattr(job, 'mode', 'classic') == "time_in_zone"
+        and (getattr(job, 'render_attempts', 0) or 0) < settings.PITSTOP_RENDER_MAX_ATTEMPTS
+    )
+
+
 class OutputInfo(BaseModel):
     available: bool
     filename: Optional[str] = None
     size_bytes: Optional[int] = None
+    # Analysis is complete but the annotated video has not been rendered yet
+    render_pending: bool = False
+    # Last deferred render error (rendering is retried until PITSTOP_RENDER_MAX_ATTEMPTS failures)
+    render_error: Optional[str] = None
 
 
 class PitstopJobCreate(BaseModel):
@@ -31,6 +46,12 @@ class PitstopJobResponse(BaseModel):
     stage: str
     progress: float = Field(ge=0.0, le=1.0)
     mode: str = "classic"
+    tracker: Optional[str] = None
+    # Scheduling lane ("interactive" or "batch") and estimated cost (1080p-frame equivalents)
+    lane: str = "batch"
+    cost: Optional[float] = None
+    # Cancellation requested; the job stops at its next frame and becomes CANCELLED
+    cancel_requested: bool = False
     series: Optional[str]
     race: Optional[str]
     notes: Optional[str]
@@ -39,6 +60,10 @@ class PitstopJobResponse(BaseModel):
     logs: List[str] = []
     output: OutputInfo
     error_message: Optional[str] = None
+    # Fraction of detection frames skipped by the motion gate (None if the gate was off)
+    motion_skip_ratio: Optional[float] = None
+    # Ranges the shot gate skipped as other cameras (None if the gate was off)
+    skipped_ranges: Optional[List[Dict[str, Any]]] = None
     created_at: datetime
     updated_at: datetime
 
@@ -51,6 +76,8 @@ class PitstopJobResponse(BaseModel):
             available=job.status == JobStatus.COMPLETE and job.output_path is not None,
             filename=job.output_filename,
             size_bytes=job.output_size_bytes,
+            render_pending=_render_pending(job),
+            render_error=getattr(job, 'render_error', None) if job.output_path is None else None,
         )
         return cls(
             job_id=job.id,
@@ -58,6 +85,10 @@ class PitstopJobResponse(BaseModel):
             stage=job.stage,
             progress=job.progress,
             mode=getattr(job, 'mode', 'classic'),
+            tracker=getattr(job, 'tracker', None),
+            lane=getattr(job, 'lane', None) or "batch",
+            cost=getattr(job, 'cost', None),
+            cancel_requested=bool(getattr(job, 'cancel_requested', False)),
             series=job.series,
             race=job.race,
             notes=job.notes,
@@ -66,6 +97,8 @@ class PitstopJobResponse(BaseModel):
             logs=job.get_logs_tail(200),
             output=output,
             error_message=getattr(job, 'error_message', None),
+            motion_skip_ratio=getattr(job, 'motion_skip_ratio', None),
+            skipped_ranges=getattr(job, 'skipped_ranges', None),
             created_at=job.created_at,
             updated_at=job.updated_at,
         )
@@ -84,6 +117,8 @@ class PitstopJobListItem(BaseModel):
     input_filename: str
     input_size_bytes: int
     has_output: bool
+    # Analysis is complete but the annotated video has not been rendered yet
+    render_pending: bool = False
     created_at: datetime
     updated_at: datetime
 
@@ -102,6 +137,7 @@ class PitstopJobListItem(BaseModel):
             input_filename=job.input_filename,
             input_size_bytes=job.input_size_bytes,
             has_output=job.output_path is not None,
+            render_pending=_render_pending(job),
             created_at=job.created_at,
             updated_at=job.updated_at,
         )
@@ -168,3 +204,51 @@ class PitstopRunMetricsOut(BaseModel):
             driver_out_time_s=summary.driver_out_time_s,
             driver_in_time_s=summary.driver_in_time_s,
         )
+
+
+class ZoneIn(BaseModel):
+    """A zone polygon in processed-frame coordinates (PITSTOP_TARGET_WIDTH x HEIGHT)."""
+
+    name: Optional[str] = None
+    points: List[List[int]] = Field(..., min_length=3)
+
+
+class ZoneConfigIn(BaseModel):
+    """Zone configuration, same format as the ZONE_CONFIG_PATH JSON file."""
+
+    zones: List[ZoneIn]
+
+    def to_config(self) -> dict:
+        """Convert to the dict format read by the zone timing module."""
+        return self.model_dump(exclude_none=True)
+
+
+class ZoneTimingOut(BaseModel):
+    """Timings for one zone."""
+
+    zone_id: int
+    zone_name: str
+    active_trackers: List[int]
+    tracker_times: Dict[str, float]
+    max_time_sec: float
+    total_unique_trackers: int
+
+
+class PitstopRezoneResponse(BaseModel):
+    """Response for re-zoning a job from its stored tracks."""
+
+    job_id: UUID
+    zones: List[ZoneTimingOut]
+    total_frames: int
+    fps: float
+    persisted: bool = False
+
+    @classmethod
+    def from_summary(cls, zone_summary: dict, job_id: UUID, persisted: bool) -> "PitstopRezoneResponse":
+        return cls(
+            job_id=job_id,
+            zones=[ZoneTimingOut(**zone) for zone in zone_summary["zones"]],
+            total_frames=zone_summary["total_frames"],
+            fps=zone_summary["fps"],
+            persisted=persisted,
+        )
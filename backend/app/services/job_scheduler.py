@@ -0,0 +1,157 @@
+"""
+Cost-aware job scheduling and admission control.
+
+Every upload is probed for its cost: frames x resolution x mode, in
+1080p-frame equivalents. Jobs up to PITSTOP_INTERACTIVE_MAX_COST go to the
+interactive lane (a 10-second clip a race engineer needs now), longer ones to
+the batch lane (a 30-minute 4K master):
+
+- Interactive jobs are always started first.
+- Batch jobs never occupy more than PITSTOP_BATCH_SLOTS of a process's job
+  slots, so a free slot is kept for interactive work.
+- Each lane holds at most PITSTOP_MAX_QUEUE_DEPTH QUEUED jobs; further
+  uploads to that lane are rejected with QueueFullError (HTTP 429) and a
+  Retry-After estimated from the lane's queued cost.
+
+The same lanes apply to the local queue (LaneScheduler in the API process)
+and the Postgres queue (workers claim interactive jobs first and leave
+batch jobs alone while their batch slots are full).
+"""
+from __future__ import annotations
+
+import asyncio
+import math
+import uuid
+from collections import deque
+from pathlib import Path
+from typing import Awaitable, Callable, Deque, Dict, Optional, Set, Union
+
+LANES = ("interactive", "batch")
+
+# Cost unit: one 1920x1080 frame
+REFERENCE_PIXELS = 1920 * 1080
+
+# Relative per-frame cost of the processing modes (tracking and zone timing on top of detection)
+MODE_COST_WEIGHTS = {"classic": 1.0, "time_in_zone": 1.5}
+
+# Rough throughput of one job slot in cost units per second, for Retry-After estimates
+ESTIMATED_COST_PER_SECOND = 30.0
+
+# Retry-After bounds (seconds)
+MIN_RETRY_AFTER_S = 5
+MAX_RETRY_AFTER_S = 600
+
+
+class QueueFullError(Exception):
+    """A lane's queue is at its maximum depth; the job was not admitted."""
+
+    def __init__(self, lane: str, depth: int, retry_after_s: int):
+        self.lane = lane
+        self.depth = depth
+        self.retry_after_s = retry_after_s
+        super().__init__(
+            f"The {lane} queue is full ({depth} jobs waiting). Retry in {retry_after_s}s."
+        )
+
+
+def estimate_job_cost(video_path: Union[str, Path], mode: str) -> Optional[float]:
+    """
+    Cost of processing a video, in 1080p-frame equivalents.
+
+    Returns None if the video cannot be probed (it will fail later with a
+    proper error; until then it is scheduled as batch work).
+    """
+    from app.utils.video_decode import open_video
+
+    try:
+        with open_video(video_path) as video:
+            info = video.info
+    except Exception:
+        return None
+    if info.frame_count <= 0:
+        return None
+    pixels = info.width * info.height / REFERENCE_PIXELS
+    return info.frame_count * pixels * MODE_COST_WEIGHTS.get(mode, 1.0)
+
+
+def job_lane(cost: Optional[float], interactive_max_cost: float) -> str:
+    """Lane for a job cost (unknown cost = "batch")."""
+    if cost is not None and cost <= interactive_max_cost:
+        return "interactive"
+    return "batch"
+
+
+def batch_slots(slots: int, configured: int = 0) -> int:
+    """Job slots batch jobs may use (configured 0 = all but one)."""
+    if configured > 0:
+        return min(configured, slots)
+    return max(1, slots - 1)
+
+
+def retry_after_seconds(queued_cost: float, lane_slots: int) -> int:
+    """Seconds until a lane has likely drained enough to admit a job."""
+    seconds = queued_cost / (ESTIMATED_COST_PER_SECOND * max(1, lane_slots))
+    return int(min(MAX_RETRY_AFTER_S, max(MIN_RETRY_AFTER_S, math.ceil(seconds))))
+
+
+class LaneScheduler:
+    """
+    Starts queued jobs in the API process (PITSTOP_JOB_QUEUE=local).
+
+    Interactive jobs go first; batch jobs only take a slot while fewer than
+    batch_slots batch jobs run. Runs on the event loop (not thread-safe).
+    """
+
+    def __init__(
+        self,
+        run: Callable[[uuid.UUID], Awaitable[None]],
+        slots: int,
+        batch_slots: int,
+    ):
+        """
+        Args:
+            run: Coroutine function processing one job.
+            slots: Jobs running at once.
+            batch_slots: Of those, at most this many batch jobs.
+        """
+        self._run = run
+        self.slots = max(1, int(slots))
+        self.batch_slots = max(1, min(int(batch_slots), self.slots))
+        self._pending: Dict[str, Deque[uuid.UUID]] = {lane: deque() for lane in LANES}
+        self._running: Dict[str, int] = {lane: 0 for lane in LANES}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def submit(self, job_id: uuid.UUID, lane: str) -> None:
+        """Queue a job in its lane and start jobs while slots are free."""
+        self._pending[lane if lane in LANES else "batch"].append(job_id)
+        self._dispatch()
+
+    def _next_lane(self) -> Optional[str]:
+        if self._pending["interactive"]:
+            return "interactive"
+        if self._pending["batch"] and self._running["batch"] < self.batch_slots:
+            return "batch"
+        return None
+
+    def _dispatch(self) -> None:
+        while sum(self._running.values()) < self.slots:
+            lane = self._next_lane()
+            if lane is None:
+                return
+            job_id = self._pending[lane].popleft()
+            self._running[lane] += 1
+            task = asyncio.create_task(self._run(job_id))
+            self._tasks.add(task)
+            task.add_done_callback(lambda t, lane=lane: self._finished(t, lane))
+
+    def _finished(self, task: asyncio.Task, lane: str) -> None:
+        self._tasks.discard(task)
+        self._running[lane] -= 1
+        self._dispatch()
+
+    def stats(self) -> dict:
+        """Pending and running jobs per lane (for logs/diagnostics)."""
+        return {
+            lane: {"pending": len(self._pending[lane]), "running": self._running[lane]}
+            for lane in LANES
+        }
@@ -7,9 +7,10 @@ Separates DB logic from routes and business logic.
 from __future__ import annotations
 
 import uuid
-from typing import Any, Dict, Optional
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-from sqlalchemy import select
+from sqlalchemy import case, func, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models import JobStatus, PitstopBreakdownSummary, PitstopJob
@@ -20,6 +21,9 @@ async def create_job(
     input_filename: str,
     input_path: str,
     mode: str = "classic",
+    tracker: Optional[str] = None,
+    cost: Optional[float] = None,
+    lane: str = "batch",
     input_size_bytes: int = 0,
     series: Optional[str] = None,
     race: Optional[str] = None,
@@ -34,6 +38,9 @@ async def create_job(
         input_filename: Original filename of uploaded video
         input_path: Storage path/key for the input file
         mode: Processing mode ('classic' or 'time_in_zone')
+        tracker: Time-in-zone tracker ('bytetrack' or 'iou'); None uses PITSTOP_TRACKER
+        cost: Estimated processing cost (1080p-frame equivalents), None if unknown
+        lane: Scheduling lane ('interactive' or 'batch')
         input_size_bytes: Size of input file in bytes
         series: Optional racing series name
         race: Optional race name
@@ -49,6 +56,9 @@ async def create_job(
         stage="UPLOAD",
         progress=0.0,
         mode=mode,
+        tracker=tracker,
+        cost=cost,
+        lane=lane,
         input_filename=input_filename,
         input_path=input_path,
         input_size_bytes=input_size_bytes,
@@ -120,6 +130,33 @@ async def get_job(
     return result.scalar_one_or_none()
 
 
+async def _get_owned_job(
+    db: AsyncSession,
+    job_id: uuid.UUID,
+    worker_id: Optional[str] = None,
+) -> Optional[PitstopJob]:
+    """
+    Get a job for an update by the worker running it.
+    
+    With worker_id the row is only returned (and locked until commit) while
+    that worker holds the job's lease, so a worker that lost its lease cannot
+    overwrite the job another worker now runs. None skips the check (local
+    queue: the job only ever runs in this process).
+    """
+    if worker_id is None:
+        return await get_job(db, job_id)
+    
+    result = await db.execute(
+        select(PitstopJob)
+        .where(PitstopJob.id == job_id, PitstopJob.worker_id == worker_id)
+        .with_for_update()
+    )
+    job = result.scalar_one_or_none()
+    if job is None:
+        await db.rollback()
+    return job
+
+
 async def get_summary_by_job_id(
     db: AsyncSession,
     job_id: uuid.UUID,
@@ -152,6 +189,9 @@ async def update_job_status(
     output_filename: Optional[str] = None,
     output_size_bytes: Optional[int] = None,
     error_message: Optional[str] = None,
+    motion_skip_ratio: Optional[float] = None,
+    skipped_ranges: Optional[List[Dict[str, Any]]] = None,
+    worker_id: Optional[str] = None,
 ) -> Optional[PitstopJob]:
     """
     Update job status and optional fields.
@@ -166,11 +206,14 @@ async def update_job_status(
         output_filename: Optional output filename
         output_size_bytes: Optional output file size
         error_message: Optional error message (for FAILED status)
+        motion_skip_ratio: Optional fraction of detection frames skipped by the motion gate
+        skipped_ranges: Optional ranges skipped by the shot gate
+        worker_id: Only update while this worker holds the job's lease
         
     Returns:
-        Updated PitstopJob if found, None otherwise
+        Updated PitstopJob if found (and owned), None otherwise
     """
-    job = await get_job(db, job_id)
+    job = await _get_owned_job(db, job_id, worker_id)
     if not job:
         return None
     
@@ -194,6 +237,12 @@ async def update_job_status(
     if error_message is not None:
         job.error_message = error_message
     
+    if motion_skip_ratio is not None:
+        job.motion_skip_ratio = motion_skip_ratio
+    
+    if skipped_ranges is not None:
+        job.skipped_ranges = skipped_ranges
+    
     await db.commit()
     await db.refresh(job)
     
@@ -291,6 +340,7 @@ async def update_job_progress(
     job_id: uuid.UUID,
     progress: float,
     stage: Optional[str] = None,
+    worker_id: Optional[str] = None,
 ) -> Optional[PitstopJob]:
     """
     Update job progress and optionally stage.
@@ -300,11 +350,12 @@ async def update_job_progress(
         job_id: UUID of the job
         progress: New progress value (0.0-1.0)
         stage: Optional new stage
+        worker_id: Only update while this worker holds the job's lease
         
     Returns:
-        Updated PitstopJob if found, None otherwise
+        Updated PitstopJob if found (and owned), None otherwise
     """
-    job = await get_job(db, job_id)
+    job = await _get_owned_job(db, job_id, worker_id)
     if not job:
         return None
     
@@ -318,3 +369,338 @@ async def update_job_progress(
     
     return job
 
+
+
+async def get_queue_stats(
+    db: AsyncSession,
+    lane: str,
+) -> Tuple[int, float]:
+    """
+    Depth and total estimated cost of a lane's QUEUED jobs.
+    
+    Args:
+        db: Database session
+        lane: Scheduling lane
+        
+    Returns:
+        Tuple of (queued job count, summed cost; jobs without a cost count as 0)
+    """
+    result = await db.execute(
+        select(func.count(), func.coalesce(func.sum(PitstopJob.cost), 0.0))
+        .where(PitstopJob.status == JobStatus.QUEUED, PitstopJob.lane == lane)
+    )
+    depth, cost = result.one()
+    return int(depth), float(cost)
+
+
+async def claim_next_job(
+    db: AsyncSession,
+    worker_id: str,
+    lease_seconds: float,
+    lanes: Optional[Sequence[str]] = None,
+) -> Optional[PitstopJob]:
+    """
+    Claim the next QUEUED job for a worker: interactive lane first, then oldest.
+    
+    The row is locked with SELECT ... FOR UPDATE SKIP LOCKED, so concurrent
+    workers never claim the same job and never wait on each other. The job
+    becomes PROCESSING with a lease of lease_seconds (database clock).
+    
+    Args:
+        db: Database session
+        worker_id: Identifier of the claiming worker
+        lease_seconds: Lease length; the worker must renew it before it expires
+        lanes: Only claim jobs in these lanes (None = any lane)
+        
+    Returns:
+        Claimed PitstopJob, or None if no job is queued
+    """
+    query = select(PitstopJob).where(PitstopJob.status == JobStatus.QUEUED)
+    if lanes is not None:
+        query = query.where(PitstopJob.lane.in_(list(lanes)))
+    result = await db.execute(
+        query
+        .order_by(case((PitstopJob.lane == "interactive", 0), else_=1), PitstopJob.created_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    job = result.scalar_one_or_none()
+    if job is None:
+        await db.rollback()
+        return None
+    
+    job.status = JobStatus.PROCESSING
+    job.worker_id = worker_id
+    job.lease_expires_at = func.now() + timedelta(seconds=lease_seconds)
+    job.attempts = (job.attempts or 0) + 1
+    job.append_log(f"INFO Claimed by worker {worker_id} (attempt {job.attempts})")
+    
+    await db.commit()
+    await db.refresh(job)
+    
+    return job
+
+
+async def renew_job_lease(
+    db: AsyncSession,
+    job_id: uuid.UUID,
+    worker_id: str,
+    lease_seconds: float,
+) -> Optional[bool]:
+    """
+    Extend a worker's lease on a PROCESSING job (heartbeat).
+    
+    Args:
+        db: Database session
+        job_id: UUID of the job
+        worker_id: Worker that claimed the job
+        lease_seconds: New lease length from now
+        
+    Returns:
+        The job's cancel_requested flag if the lease was renewed, None if the
+        worker no longer holds it (expired and re-queued, finished or deleted)
+    """
+    result = await db.execute(
+        update(PitstopJob)
+        .where(
+            PitstopJob.id == job_id,
+            PitstopJob.worker_id == worker_id,
+            PitstopJob.status == JobStatus.PROCESSING,
+        )
+        .values(lease_expires_at=func.now() + timedelta(seconds=lease_seconds))
+        .returning(PitstopJob.cancel_requested)
+    )
+    cancel_requested = result.scalar_one_or_none()
+    await db.commit()
+    return cancel_requested
+
+
+async def release_job_lease(
+    db: AsyncSession,
+    job_id: uuid.UUID,
+    worker_id: str,
+) -> None:
+    """
+    Clear a worker's lease on a job once it stopped working on it.
+    
+    Args:
+        db: Database session
+        job_id: UUID of the job
+        worker_id: Worker that claimed the job (leases of other workers are kept)
+    """
+    await db.execute(
+        update(PitstopJob)
+        .where(PitstopJob.id == job_id, PitstopJob.worker_id == worker_id)
+        .values(worker_id=None, lease_expires_at=None)
+    )
+    await db.commit()
+
+
+async def claim_job_render(
+    db: AsyncSession,
+    job_id: uuid.UUID,
+    owner_id: str,
+    lease_seconds: float,
+) -> bool:
+    """
+    Claim (or renew) the right to render a job's deferred output video.
+    
+    A COMPLETE job's lease columns are free once its analysis finished, so
+    renderers reuse them: the conditional UPDATE only succeeds while the job
+    still has no output and no other renderer holds a live lease, so API and
+    worker processes never render the same job at once. A renderer that dies
+    leaves its lease to expire, and a later request renders again.
+    
+    Args:
+        db: Database session
+        job_id: UUID of the job
+        owner_id: Identifier of the rendering process
+        lease_seconds: Lease length; the renderer must renew it before it expires
+        
+    Returns:
+        True if this renderer holds the lease, False otherwise
+    """
+    result = await db.execute(
+        update(PitstopJob)
+        .where(
+            PitstopJob.id == job_id,
+            PitstopJob.status == JobStatus.COMPLETE,
+            PitstopJob.output_path.is_(None),
+            or_(
+                PitstopJob.worker_id.is_(None),
+                PitstopJob.worker_id == owner_id,
+                PitstopJob.lease_expires_at < func.now(),
+            ),
+        )
+        .values(
+            worker_id=owner_id,
+            lease_expires_at=func.now() + timedelta(seconds=lease_seconds),
+        )
+        .returning(PitstopJob.id)
+    )
+    claimed = result.scalar_one_or_none() is not None
+    await db.commit()
+    return claimed
+
+
+async def record_render_failure(
+    db: AsyncSession,
+    job_id: uuid.UUID,
+    error_message: str,
+) -> Optional[PitstopJob]:
+    """
+    Count a failed deferred render of a job and keep its error.
+    
+    Args:
+        db: Database session
+        job_id: UUID of the job
+        error_message: Why the render failed
+        
+    Returns:
+        Updated PitstopJob if found, None otherwise
+    """
+    job = await get_job(db, job_id)
+    if not job:
+        return None
+    
+    job.render_attempts = (job.render_attempts or 0) + 1
+    job.render_error = error_message
+    job.append_log(f"ERROR Video rendering failed (attempt {job.render_attempts}): {error_message}")
+    
+    await db.commit()
+    await db.refresh(job)
+    
+    return job
+
+
+async def requeue_expired_jobs(
+    db: AsyncSession,
+    max_attempts: int,
+) -> List[PitstopJob]:
+    """
+    Re-queue PROCESSING jobs whose worker lease expired (worker crashed or hung).
+    
+    Jobs that already used max_attempts claims are failed instead. Rows
+    locked by another worker doing the same sweep are skipped.
+    
+    Args:
+        db: Database session
+        max_attempts: Claims after which an expired job fails
+        
+    Returns:
+        Jobs that were re-queued or failed
+    """
+    result = await db.execute(
+        select(PitstopJob)
+        .where(
+            PitstopJob.status == JobStatus.PROCESSING,
+            PitstopJob.lease_expires_at < func.now(),
+        )
+        .with_for_update(skip_locked=True)
+    )
+    jobs = list(result.scalars().all())
+    if not jobs:
+        await db.rollback()
+        return []
+    
+    for job in jobs:
+        lost_worker = job.worker_id
+        job.worker_id = None
+        job.lease_expires_at = None
+        if job.cancel_requested:
+            job.status = JobStatus.CANCELLED
+            job.stage = "CANCELLED"
+            job.append_log(f"WARNING Lease of worker {lost_worker} expired, job cancelled")
+        elif job.attempts >= max_attempts:
+            job.status = JobStatus.FAILED
+            job.stage = "FAILED"
+            job.error_message = (
+                f"Worker lease expired {job.attempts} times (last worker: {lost_worker})"
+            )
+            job.append_log(f"ERROR {job.error_message}")
+        else:
+            job.status = JobStatus.QUEUED
+            job.stage = "UPLOAD"
+            job.progress = 0.0
+            job.append_log(
+                f"WARNING Lease of worker {lost_worker} expired, job re-queued "
+                f"(attempt {job.attempts}/{max_attempts})"
+            )
+    
+    await db.commit()
+    
+    return jobs
+
+
+async def request_job_cancel(
+    db: AsyncSession,
+    job_id: uuid.UUID,
+) -> Optional[PitstopJob]:
+    """
+    Request cancellation of a job.
+    
+    A QUEUED job is CANCELLED at once. A PROCESSING job only gets
+    cancel_requested set: the process running it stops its frame loop and
+    marks it CANCELLED (see mark_job_cancelled). Finished jobs are unchanged.
+    
+    Args:
+        db: Database session
+        job_id: UUID of the job
+        
+    Returns:
+        The job if found (check its status), None otherwise
+    """
+    result = await db.execute(
+        select(PitstopJob).where(PitstopJob.id == job_id).with_for_update()
+    )
+    job = result.scalar_one_or_none()
+    if job is None:
+        await db.rollback()
+        return None
+    
+    if job.status == JobStatus.QUEUED:
+        job.cancel_requested = True
+        job.status = JobStatus.CANCELLED
+        job.stage = "CANCELLED"
+        job.append_log("WARNING Job cancelled before processing started")
+    elif job.status == JobStatus.PROCESSING and not job.cancel_requested:
+        job.cancel_requested = True
+        job.append_log("WARNING Cancellation requested")
+    
+    await db.commit()
+    await db.refresh(job)
+    
+    return job
+
+
+async def mark_job_cancelled(
+    db: AsyncSession,
+    job_id: uuid.UUID,
+    worker_id: Optional[str] = None,
+) -> Optional[PitstopJob]:
+    """
+    Mark a job whose processing stopped on a cancellation request as CANCELLED.
+    
+    Only jobs with cancel_requested set are changed, so a worker that lost its
+    lease (the job was re-queued to another worker) cannot cancel the new run.
+    
+    Args:
+        db: Database session
+        job_id: UUID of the job
+        worker_id: Only update while this worker holds the job's lease
+        
+    Returns:
+        Updated PitstopJob if it was cancelled, None otherwise
+    """
+    job = await _get_owned_job(db, job_id, worker_id)
+    if job is None or not job.cancel_requested or job.status == JobStatus.CANCELLED:
+        return None
+    
+    job.status = JobStatus.CANCELLED
+    job.stage = "CANCELLED"
+    job.append_log("WARNING Processing stopped: job cancelled")
+    
+    await db.commit()
+    await db.refresh(job)
+    
+    return job
@@ -7,10 +7,13 @@ Uses pitstop_persistence for database operations.
 from __future__ import annotations
 
 import asyncio
+import functools
 import os
+import socket
+import threading
 import uuid
 from concurrent.futures import ThreadPoolExecutor
-from typing import List, Optional, Set, Tuple
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Set, Tuple
 
 from sqlalchemy import desc, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -18,13 +21,86 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.models import JobStatus, PitstopJob, PitstopBreakdownSummary
 from app.db.session import async_session_maker
 from app.services import pitstop_persistence
+from app.services.job_scheduler import (
+    LANES,
+    LaneScheduler,
+    QueueFullError,
+    batch_slots,
+    estimate_job_cost,
+    job_lane,
+    retry_after_seconds,
+)
 from app.services.storage import get_storage
+from app.settings import PITSTOP_WORKER_CONCURRENCY
+from app.utils.cancellation import CancelToken, JobCancelledError
+from app.utils.cpu_budget import CpuLease, get_cpu_budget
 
-# Track running jobs to avoid duplicate processing
+if TYPE_CHECKING:
+    from app.model.pitstop_yolo_runner import RunResult
+
+# Track running jobs to avoid duplicate processing within this process (across worker
+# processes, the job queue's row locks and leases prevent it)
 _running_jobs: Set[uuid.UUID] = set()
 
+# Cancel tokens of the jobs running in this process
+_cancel_tokens: Dict[uuid.UUID, CancelToken] = {}
+
 # Thread pool for running YOLO inference (CPU/GPU bound) without blocking event loop
-_thread_pool = ThreadPoolExecutor(max_workers=2)
+_thread_pool = ThreadPoolExecutor(max_workers=max(1, PITSTOP_WORKER_CONCURRENCY))
+
+# Niceness added to deferred render threads so they yield CPU to analysis jobs
+RENDER_NICENESS = 10
+
+# Jobs whose deferred annotated video is being rendered in this process (across
+# processes, the render lease on the job row prevents it)
+_rendering_jobs: Set[uuid.UUID] = set()
+
+# Render tasks started by enqueue_render (the event loop keeps only weak references)
+_render_tasks: Set[asyncio.Task] = set()
+
+# Render lease owner id of this process (host name and pid)
+_RENDER_OWNER_ID = f"{socket.gethostname()}-{os.getpid()}"
+
+
+def _lower_thread_priority() -> None:
+    """Thread pool initializer: lower the OS priority of the current thread (Linux)."""
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), RENDER_NICENESS)
+    except (AttributeError, OSError):
+        pass
+
+
+# Single low-priority lane for deferred video rendering
+_render_pool = ThreadPoolExecutor(
+    max_workers=1,
+    thread_name_prefix="render",
+    initializer=_lower_thread_priority,
+)
+
+
+async def check_queue_capacity(db: AsyncSession) -> None:
+    """
+    Cheap admission pre-check, run before an upload's body is read.
+    
+    The lane of a job is only known once its upload is stored and probed, so this
+    rejects only when every lane is full; create_job still checks the job's own lane.
+    
+    Raises:
+        QueueFullError: If every lane holds PITSTOP_MAX_QUEUE_DEPTH queued jobs
+            (reported for the lane expected to free up first)
+    """
+    from app import settings
+    
+    if settings.PITSTOP_MAX_QUEUE_DEPTH <= 0:
+        return
+    
+    full: List[QueueFullError] = []
+    for lane in LANES:
+        depth, queued_cost = await pitstop_persistence.get_queue_stats(db, lane)
+        if depth < settings.PITSTOP_MAX_QUEUE_DEPTH:
+            return
+        full.append(QueueFullError(lane, depth, retry_after_seconds(queued_cost, _lane_slots(lane))))
+    raise min(full, key=lambda e: e.retry_after_s)
 
 
 async def create_job(
@@ -35,22 +111,30 @@ async def create_job(
     race: Optional[str] = None,
     notes: Optional[str] = None,
     mode: Optional[str] = None,
+    tracker: Optional[str] = None,
 ) -> PitstopJob:
     """
     Create a new pitstop job.
     
     1. Saves the uploaded file to storage
-    2. Creates a job record in the database (status=QUEUED)
-    3. Creates an empty breakdown summary for the job
-    4. Returns the job for the caller to enqueue
+    2. Estimates the job's cost and picks its lane (interactive or batch)
+    3. Rejects the job if its lane's queue is full (the file is deleted again)
+    4. Creates a job record in the database (status=QUEUED)
+    5. Creates an empty breakdown summary for the job
+    6. Returns the job for the caller to enqueue
+    
+    Raises:
+        QueueFullError: If the lane already holds PITSTOP_MAX_QUEUE_DEPTH queued jobs
     """
     from app import settings
     
     storage = get_storage()
     
-    # Use mode from settings if not provided
+    # Use mode and tracker from settings if not provided
     if mode is None:
         mode = settings.PITSTOP_MODE
+    if tracker is None:
+        tracker = settings.PITSTOP_TRACKER
     
     # Generate job ID first (needed for storage key)
     job_id = uuid.uuid4()
@@ -58,12 +142,29 @@ async def create_job(
     # Save the uploaded file using storage abstraction
     stored = await storage.save_input(file_content, original_filename, job_id)
     
+    # Probe the upload for its cost (off the event loop: opens the container)
+    loop = asyncio.get_running_loop()
+    cost = await loop.run_in_executor(
+        None, estimate_job_cost, str(settings.INPUT_DIR / stored.key), mode
+    )
+    lane = job_lane(cost, settings.PITSTOP_INTERACTIVE_MAX_COST)
+    
+    # Admission control: a full lane rejects the upload (the other lane is unaffected)
+    if settings.PITSTOP_MAX_QUEUE_DEPTH > 0:
+        depth, queued_cost = await pitstop_persistence.get_queue_stats(db, lane)
+        if depth >= settings.PITSTOP_MAX_QUEUE_DEPTH:
+            await storage.delete_file(stored.key, is_input=True)
+            raise QueueFullError(lane, depth, retry_after_seconds(queued_cost, _lane_slots(lane)))
+    
     # Create job record using persistence layer (pass pre-generated job_id)
     job = await pitstop_persistence.create_job(
         db=db,
         input_filename=stored.filename,
         input_path=stored.key,
         mode=mode,
+        tracker=tracker,
+        cost=cost,
+        lane=lane,
         input_size_bytes=stored.size_bytes,
         series=series,
         race=race,
@@ -75,6 +176,12 @@ async def create_job(
     job.append_log("INFO Job created, file uploaded successfully")
     job.append_log(f"INFO Input file: {original_filename} ({stored.size_bytes:,} bytes)")
     job.append_log(f"INFO Processing mode: {mode}")
+    if mode == "time_in_zone":
+        job.append_log(f"INFO Tracker: {tracker}")
+    if cost is None:
+        job.append_log(f"INFO Could not probe the video for its cost; scheduled in the {lane} lane")
+    else:
+        job.append_log(f"INFO Estimated cost: {cost:,.0f} (1080p-frame equivalents), {lane} lane")
     await db.commit()
     
     # Create empty breakdown summary immediately (placeholder)
@@ -128,12 +235,43 @@ async def list_jobs(
     return jobs, total
 
 
+async def cancel_job(db: AsyncSession, job_id: uuid.UUID) -> Optional[PitstopJob]:
+    """
+    Cancel a queued or running job.
+    
+    Queued jobs are CANCELLED at once. Running jobs are flagged in the
+    database and, if they run in this process, their cancel token is set:
+    the frame loop stops within a frame, ffmpeg is killed and the job ends
+    CANCELLED. Jobs running in a worker process (PITSTOP_JOB_QUEUE=postgres)
+    see the flag on their next heartbeat. Finished jobs are returned unchanged.
+    
+    Returns:
+        The job if found, None otherwise
+    """
+    job = await pitstop_persistence.request_job_cancel(db, job_id)
+    if job is not None and job.cancel_requested:
+        cancel_running_job(job_id)
+    return job
+
+
+def cancel_running_job(job_id: uuid.UUID) -> bool:
+    """Set the cancel token of a job running in this process; False if it isn't running here."""
+    token = _cancel_tokens.get(job_id)
+    if token is None:
+        return False
+    token.cancel()
+    return True
+
+
 async def delete_job(db: AsyncSession, job_id: uuid.UUID) -> bool:
-    """Delete a job and its associated files from storage."""
+    """Delete a job and its associated files from storage (a running job is stopped first)."""
     job = await get_job(db, job_id)
     if not job:
         return False
     
+    # Stop the frame loop instead of letting it run on for a deleted job
+    cancel_running_job(job_id)
+    
     storage = get_storage()
     
     # Delete input file from storage
@@ -144,6 +282,11 @@ async def delete_job(db: AsyncSession, job_id: uuid.UUID) -> bool:
     if job.output_path:
         await storage.delete_file(job.output_path, is_input=False)
     
+    # Delete stored tracks
+    tracks_path = _tracks_path(job_id)
+    if os.path.exists(tracks_path):
+        os.remove(tracks_path)
+    
     # Delete job record (cascade will delete breakdown_summary)
     await db.delete(job)
     await db.commit()
@@ -151,22 +294,32 @@ async def delete_job(db: AsyncSession, job_id: uuid.UUID) -> bool:
     return True
 
 
+def _tracks_path(job_id: uuid.UUID) -> str:
+    """Local path of a job's per-frame track store."""
+    from app import settings
+    
+    return str(settings.TRACKS_DIR / f"{job_id}_tracks.npz")
+
+
 async def _update_job_state(
     job_id: uuid.UUID,
     status: JobStatus,
     stage: str,
     progress: float,
     log_message: str,
+    worker_id: Optional[str] = None,
 ) -> None:
-    """Update job state in database (uses new session)."""
+    """Update job state in database (uses new session; worker_id fences it to the lease holder)."""
     async with async_session_maker() as db:
-        await pitstop_persistence.update_job_status(
+        job = await pitstop_persistence.update_job_status(
             db, job_id,
             status=status,
             stage=stage,
             progress=progress,
+            worker_id=worker_id,
         )
-        await pitstop_persistence.append_job_log(db, job_id, log_message)
+        if job:
+            await pitstop_persistence.append_job_log(db, job_id, log_message)
 
 
 async def _append_log(job_id: uuid.UUID, log_message: str) -> None:
@@ -175,10 +328,17 @@ async def _append_log(job_id: uuid.UUID, log_message: str) -> None:
         await pitstop_persistence.append_job_log(db, job_id, log_message)
 
 
-async def _update_progress(job_id: uuid.UUID, progress: float, stage: str) -> None:
-    """Update job progress (uses new session)."""
+async def _update_progress(
+    job_id: uuid.UUID,
+    progress: float,
+    stage: str,
+    worker_id: Optional[str] = None,
+) -> None:
+    """Update job progress (uses new session; worker_id fences it to the lease holder)."""
     async with async_session_maker() as db:
-        await pitstop_persistence.update_job_progress(db, job_id, progress, stage)
+        await pitstop_persistence.update_job_progress(
+            db, job_id, progress, stage, worker_id=worker_id
+        )
 
 
 async def _finalize_job(
@@ -188,12 +348,36 @@ async def _finalize_job(
     output_filename: Optional[str] = None,
     output_size: Optional[int] = None,
     error_message: Optional[str] = None,
-) -> None:
-    """Finalize job with output file info or error."""
+    motion_skip_ratio: Optional[float] = None,
+    skipped_ranges: Optional[List[dict]] = None,
+    worker_id: Optional[str] = None,
+) -> bool:
+    """
+    Finalize job with output file info (and run statistics) or error.
+    
+    With worker_id the row is only written while that worker holds the job's
+    lease (Postgres queue). Returns whether the job was updated.
+    """
     async with async_session_maker() as db:
-        if status == JobStatus.COMPLETE and output_key:
+        if status == JobStatus.COMPLETE and not output_key:
+            # Analysis-only success: the video is rendered later
+            job = await pitstop_persistence.update_job_status(
+                db, job_id,
+                status=JobStatus.COMPLETE,
+                stage="COMPLETE",
+                progress=1.0,
+                motion_skip_ratio=motion_skip_ratio,
+                skipped_ranges=skipped_ranges,
+                worker_id=worker_id,
+            )
+            if not job:
+                return False
+            await pitstop_persistence.append_job_log(
+                db, job_id, "INFO Analysis complete (annotated video rendering deferred)"
+            )
+        elif status == JobStatus.COMPLETE and output_key:
             # Success case
-            await pitstop_persistence.update_job_status(
+            job = await pitstop_persistence.update_job_status(
                 db, job_id,
                 status=JobStatus.COMPLETE,
                 stage="COMPLETE",
@@ -201,7 +385,12 @@ async def _finalize_job(
                 output_path=output_key,
                 output_filename=output_filename,
                 output_size_bytes=output_size,
+                motion_skip_ratio=motion_skip_ratio,
+                skipped_ranges=skipped_ranges,
+                worker_id=worker_id,
             )
+            if not job:
+                return False
             await pitstop_persistence.append_job_log(
                 db, job_id, "INFO Output video generated successfully"
             )
@@ -210,21 +399,29 @@ async def _finalize_job(
             )
         elif status == JobStatus.FAILED:
             # Failure case
-            await pitstop_persistence.update_job_status(
+            job = await pitstop_persistence.update_job_status(
                 db, job_id,
                 status=JobStatus.FAILED,
                 stage="FAILED",
                 error_message=error_message,
+                worker_id=worker_id,
             )
+            if not job:
+                return False
             await pitstop_persistence.append_job_log(
                 db, job_id, f"ERROR {error_message}"
             )
+        elif status == JobStatus.CANCELLED:
+            # Processing stopped on a cancellation request
+            job = await pitstop_persistence.mark_job_cancelled(db, job_id, worker_id=worker_id)
         else:
             # Other status updates
-            await pitstop_persistence.update_job_status(
+            job = await pitstop_persistence.update_job_status(
                 db, job_id,
                 status=status,
+                worker_id=worker_id,
             )
+    return job is not None
 
 
 def _get_stage_from_progress(progress: float) -> str:
@@ -252,7 +449,35 @@ def _run_yolo_sync(
     zone_config_path: Optional[str] = None,
     iou_threshold: float = 0.5,
     target_size: Optional[Tuple[int, int]] = None,
-) -> Tuple[str, int, Optional[dict]]:
+    batch_size: Optional[int] = None,
+    device: Optional[str] = None,
+    engine: str = "ultralytics",
+    detect_every_n: int = 1,
+    motion_threshold: Optional[float] = None,
+    motion_max_skip_frames: int = 30,
+    roi_crop: bool = False,
+    roi_padding: int = 32,
+    segment_workers: int = 1,
+    segment_overlap_frames: int = 60,
+    min_segment_seconds: float = 30.0,
+    decoder: str = "auto",
+    decoder_threads: int = 0,
+    shared_inference: bool = False,
+    event_windowing: bool = False,
+    scan_fps: float = 2.0,
+    scan_width: int = 480,
+    event_padding_seconds: float = 3.0,
+    shot_filter: bool = False,
+    shot_reference: Optional[str] = None,
+    shot_match_threshold: float = 0.4,
+    tracker: str = "bytetrack",
+    render_video: bool = True,
+    tracks_path: Optional[str] = None,
+    executor: str = "thread",
+    timeout_seconds: float = 0.0,
+    cancel_token: Optional[CancelToken] = None,
+    worker_id: Optional[str] = None,
+) -> "RunResult":
     """
     Run YOLO inference synchronously in a thread pool.
     
@@ -263,8 +488,22 @@ def _run_yolo_sync(
     - "classic": Original bbox annotation
     - "time_in_zone": Supervision-based tracking with zone timing
     
+    The runner is cheap to construct: weights come warm from the process-wide
+    model registry, so only the first job (or one after best.pt changes) loads them.
+    
+    With render_video=False (time_in_zone only) no video is written and the
+    returned output_path is None. With tracks_path (time_in_zone only) the
+    per-frame tracks are saved there for re-zoning.
+    
+    With executor="process" the pipeline runs in a worker of the job process
+    pool instead of this thread (which then only relays logs and progress),
+    and is killed after timeout_seconds (0 = no limit).
+    
+    Cancelling cancel_token stops the frame loop (raises JobCancelledError).
+    Progress updates are fenced to worker_id's lease (see _finalize_job).
+    
     Returns:
-        Tuple of (output_path, frames_processed, zone_summary_dict or None)
+        The runner's RunResult (output path, frames, zone summary, gate statistics)
     """
     from app.model.pitstop_yolo_runner import PitstopYoloRunner
     
@@ -272,30 +511,140 @@ def _run_yolo_sync(
         """Log callback that schedules async log update."""
         asyncio.run_coroutine_threadsafe(_append_log(job_id, f"INFO {msg}"), loop)
     
-    def progress_callback(p: float) -> None:
-        """Progress callback that schedules async progress update."""
-        stage = _get_stage_from_progress(p)
-        asyncio.run_coroutine_threadsafe(_update_progress(job_id, p, stage), loop)
+    # This job's share of the CPU budget, rebalanced as other jobs start/finish
+    with get_cpu_budget().lease(f"job {job_id}") as cpu:
+        log_callback(_describe_cpu_share(cpu))
+        
+        def progress_callback(p: float) -> None:
+            """Progress callback that schedules async progress update."""
+            # Runs on the job thread: pick up a rebalanced CPU share (the process
+            # pool applies it to its worker instead)
+            if executor != "process":
+                cpu.checkpoint()
+            stage = _get_stage_from_progress(p)
+            asyncio.run_coroutine_threadsafe(_update_progress(job_id, p, stage, worker_id), loop)
+        
+        runner_kwargs = dict(
+            weights_path=weights_path,
+            threshold=threshold,
+            mode=mode,
+            zone_config_path=zone_config_path,
+            iou_threshold=iou_threshold,
+            target_size=target_size,
+            batch_size=batch_size,
+            device=device,
+            engine=engine,
+            detect_every_n=detect_every_n,
+            motion_threshold=motion_threshold,
+            motion_max_skip_frames=motion_max_skip_frames,
+            roi_crop=roi_crop,
+            roi_padding=roi_padding,
+            segment_workers=segment_workers,
+            segment_overlap_frames=segment_overlap_frames,
+            min_segment_seconds=min_segment_seconds,
+            decoder=decoder,
+            shared_inference=shared_inference,
+            event_windowing=event_windowing,
+            scan_fps=scan_fps,
+            scan_width=scan_width,
+            event_padding_seconds=event_padding_seconds,
+            shot_filter=shot_filter,
+            shot_reference=shot_reference,
+            shot_match_threshold=shot_match_threshold,
+            tracker=tracker,
+            **_cpu_thread_options(cpu, decoder_threads),
+        )
+        process_kwargs = dict(
+            input_path=input_path,
+            output_path=output_path,
+            render_video=render_video,
+            tracks_path=tracks_path,
+        )
+        
+        if executor == "process":
+            # Frame loop runs in a pool worker process; this thread only relays its messages
+            from app.model.job_process_pool import get_job_process_pool, process_video_job
+            
+            return get_job_process_pool().run(
+                process_video_job,
+                dict(runner_kwargs=runner_kwargs, process_kwargs=process_kwargs),
+                log_cb=log_callback,
+                progress_cb=progress_callback,
+                timeout=timeout_seconds or None,
+                cpu=cpu,
+                cancel_token=cancel_token,
+            )
+        
+        runner = PitstopYoloRunner(**runner_kwargs)
+        result = runner.process_video(
+            log_cb=log_callback,
+            progress_cb=progress_callback,
+            cancel_token=cancel_token,
+            **process_kwargs,
+        )
     
-    runner = PitstopYoloRunner(
-        weights_path=weights_path,
-        threshold=threshold,
-        mode=mode,
-        zone_config_path=zone_config_path,
-        iou_threshold=iou_threshold,
-        target_size=target_size,
-    )
-    result = runner.process_video(
-        input_path=input_path,
-        output_path=output_path,
-        log_cb=log_callback,
-        progress_cb=progress_callback,
+    return result
+
+
+def _describe_cpu_share(cpu: CpuLease) -> str:
+    """Log line for a job's CPU budget share."""
+    share = f"CPU budget: {cpu.threads} threads"
+    if cpu.cpus is not None:
+        share += f" pinned to cores {cpu.cpus}"
+    return share
+
+
+def _cpu_thread_options(cpu: CpuLease, decoder_threads: int = 0) -> dict:
+    """Runner thread counts for a job's CPU budget share (explicit decoder threads win)."""
+    return dict(
+        decoder_threads=decoder_threads or cpu.threads,
+        encoder_threads=cpu.threads,
+        cpu_threads=cpu.threads,
     )
+
+
+def _processing_options(mode: str, tracker: Optional[str] = None) -> dict:
+    """
+    Runner options from settings for a processing mode (shared by analysis and rendering).
+    
+    tracker is the job's own tracker choice; None uses PITSTOP_TRACKER.
+    """
+    from app import settings
     
-    return result.output_path, result.frames_processed, result.zone_summary
+    time_in_zone = mode == "time_in_zone"
+    return dict(
+        mode=mode,
+        zone_config_path=settings.ZONE_CONFIG_PATH if time_in_zone else None,
+        iou_threshold=settings.PITSTOP_IOU_THRESHOLD,
+        target_size=(
+            (settings.PITSTOP_TARGET_WIDTH, settings.PITSTOP_TARGET_HEIGHT) if time_in_zone else None
+        ),
+        batch_size=settings.PITSTOP_BATCH_SIZE,
+        device=settings.PITSTOP_DEVICE,
+        engine=settings.PITSTOP_DETECTOR_ENGINE,
+        detect_every_n=settings.PITSTOP_DETECT_EVERY_N,
+        motion_threshold=settings.PITSTOP_MOTION_THRESHOLD,
+        motion_max_skip_frames=settings.PITSTOP_MOTION_MAX_SKIP_FRAMES,
+        roi_crop=settings.PITSTOP_ROI_CROP,
+        roi_padding=settings.PITSTOP_ROI_PADDING,
+        segment_workers=settings.PITSTOP_SEGMENT_WORKERS,
+        segment_overlap_frames=settings.PITSTOP_SEGMENT_OVERLAP_FRAMES,
+        min_segment_seconds=settings.PITSTOP_MIN_SEGMENT_SECONDS,
+        decoder=settings.PITSTOP_DECODER,
+        decoder_threads=settings.PITSTOP_DECODER_THREADS,
+        shared_inference=settings.PITSTOP_INFERENCE_SERVER,
+        event_windowing=settings.PITSTOP_EVENT_WINDOWING and time_in_zone,
+        scan_fps=settings.PITSTOP_SCAN_FPS,
+        scan_width=settings.PITSTOP_SCAN_WIDTH,
+        event_padding_seconds=settings.PITSTOP_EVENT_PADDING_SECONDS,
+        shot_filter=settings.PITSTOP_SHOT_FILTER,
+        shot_reference=settings.PITSTOP_SHOT_REFERENCE,
+        shot_match_threshold=settings.PITSTOP_SHOT_MATCH_THRESHOLD,
+        tracker=tracker or settings.PITSTOP_TRACKER,
+    )
 
 
-async def run_job_processing(job_id: uuid.UUID) -> None:
+async def run_job_processing(job_id: uuid.UUID, worker_id: Optional[str] = None) -> None:
     """
     Run actual YOLO model processing on the job.
     
@@ -307,7 +656,15 @@ async def run_job_processing(job_id: uuid.UUID) -> None:
     5. COMPLETE
     
     This runs as a background task using a ThreadPoolExecutor for the CPU-bound
-    YOLO inference work.
+    YOLO inference work: in the API process (PITSTOP_JOB_QUEUE=local) or in a
+    worker process that claimed the job (PITSTOP_JOB_QUEUE=postgres).
+    
+    A cancelled job (cancel_job) stops at its next frame and ends CANCELLED.
+    
+    worker_id is the claiming worker (Postgres queue): status, progress and
+    result writes only apply while it still holds the job's lease, and the
+    attempt's output video and tracks only replace the job's files after its
+    final status write succeeded.
     """
     from app import settings
     
@@ -315,6 +672,10 @@ async def run_job_processing(job_id: uuid.UUID) -> None:
         return
     
     _running_jobs.add(job_id)
+    # Registered before the job is read, so a cancel from here on reaches the frame loop
+    cancel_token = _cancel_tokens[job_id] = CancelToken()
+    attempt_path: Optional[str] = None
+    attempt_tracks_path: Optional[str] = None
     
     try:
         # Get input key and storage info from job
@@ -324,13 +685,23 @@ async def run_job_processing(job_id: uuid.UUID) -> None:
             job = await pitstop_persistence.get_job(db, job_id)
             if not job:
                 return
+            if job.status == JobStatus.CANCELLED:
+                # Cancelled while waiting in the local queue
+                return
+            if job.cancel_requested:
+                cancel_token.cancel()
             input_key = job.input_path
             job_mode = job.mode
+            job_tracker = job.tracker
 
         # Resolve full paths
         input_path = str(settings.INPUT_DIR / input_key)
         output_filename = f"{job_id}_output.mp4"
         output_path = str(settings.OUTPUT_DIR / output_filename)
+        # Each attempt writes its own files, renamed once its result is recorded: a worker
+        # that lost its lease never touches the files of the worker the job was re-queued to
+        attempt_id = uuid.uuid4().hex[:8]
+        attempt_path = str(settings.OUTPUT_DIR / f"{job_id}_output.{attempt_id}.part.mp4")
         
         # Check if weights file exists
         weights_path = settings.PITSTOP_YOLO_WEIGHTS_PATH
@@ -339,73 +710,121 @@ async def run_job_processing(job_id: uuid.UUID) -> None:
                 job_id,
                 JobStatus.FAILED,
                 error_message=f"YOLO weights not found at: {weights_path}. Please place best.pt in backend/model_weights/",
+                worker_id=worker_id,
             )
             return
         
         # Update to PROCESSING status
         await _update_job_state(
             job_id, JobStatus.PROCESSING, "DETECTING", 0.05,
-            "INFO Starting YOLO model processing..."
+            "INFO Starting YOLO model processing...",
+            worker_id=worker_id,
         )
         
-        # Get processing mode and zone config (use job's stored mode)
+        # Get processing mode (use job's stored mode)
         mode = job_mode or settings.PITSTOP_MODE
-        zone_config_path = settings.ZONE_CONFIG_PATH if mode == "time_in_zone" else None
-        iou_threshold = settings.PITSTOP_IOU_THRESHOLD
-        target_size = (settings.PITSTOP_TARGET_WIDTH, settings.PITSTOP_TARGET_HEIGHT) if mode == "time_in_zone" else None
+        
+        # Time-in-zone jobs can finish after the analysis and render the video later
+        render_video = mode != "time_in_zone" or settings.PITSTOP_RENDER_MODE == "inline"
+        
+        # Per-frame tracks let zone timings be recomputed later without inference
+        if mode == "time_in_zone" and settings.PITSTOP_STORE_TRACKS:
+            attempt_tracks_path = str(settings.TRACKS_DIR / f"{job_id}_tracks.{attempt_id}.part.npz")
         
         await _append_log(job_id, f"INFO Loading YOLO weights from: {weights_path}")
         await _append_log(job_id, f"INFO Processing mode: {mode}")
+        await _append_log(job_id, f"INFO Detector engine: {settings.PITSTOP_DETECTOR_ENGINE}")
         await _append_log(job_id, f"INFO Processing input: {input_key}")
         
         # Run YOLO inference in thread pool (blocking operation)
         loop = asyncio.get_running_loop()
         
         try:
-            output_result_path, frames_processed, zone_summary = await loop.run_in_executor(
+            result = await loop.run_in_executor(
                 _thread_pool,
-                _run_yolo_sync,
-                job_id,
-                input_path,
-                output_path,
-                weights_path,
-                settings.PITSTOP_YOLO_THRESHOLD,
-                loop,
-                mode,
-                zone_config_path,
-                iou_threshold,
-                target_size,
+                functools.partial(
+                    _run_yolo_sync,
+                    job_id,
+                    input_path,
+                    attempt_path,
+                    weights_path,
+                    settings.PITSTOP_YOLO_THRESHOLD,
+                    loop,
+                    render_video=render_video,
+                    tracks_path=attempt_tracks_path,
+                    executor=settings.PITSTOP_EXECUTOR,
+                    timeout_seconds=settings.PITSTOP_JOB_TIMEOUT_SECONDS,
+                    cancel_token=cancel_token,
+                    worker_id=worker_id,
+                    **_processing_options(mode, job_tracker),
+                ),
             )
             
-            # Get output file size
-            output_size = os.path.getsize(output_result_path)
+            output_result_path, zone_summary = result.output_path, result.zone_summary
+            await _append_log(job_id, f"INFO Processed {result.frames_processed} frames total")
             
-            await _append_log(job_id, f"INFO Processed {frames_processed} frames total")
+            if output_result_path:
+                # Finalize with success
+                finalized = await _finalize_job(
+                    job_id,
+                    JobStatus.COMPLETE,
+                    output_key=output_filename,
+                    output_filename=output_filename,
+                    output_size=os.path.getsize(output_result_path),
+                    motion_skip_ratio=result.motion_skip_ratio,
+                    skipped_ranges=result.skipped_ranges,
+                    worker_id=worker_id,
+                )
+            else:
+                finalized = await _finalize_job(
+                    job_id,
+                    JobStatus.COMPLETE,
+                    motion_skip_ratio=result.motion_skip_ratio,
+                    skipped_ranges=result.skipped_ranges,
+                    worker_id=worker_id,
+                )
             
-            # Finalize with success
-            await _finalize_job(
-                job_id,
-                JobStatus.COMPLETE,
-                output_key=output_filename,
-                output_filename=output_filename,
-                output_size=output_size,
-            )
+            if not finalized:
+                # Lease lost: the job belongs to another attempt now, keep its files
+                await _append_log(job_id, "WARNING Result discarded: job lease lost")
+                return
+            
+            if output_result_path:
+                os.replace(output_result_path, output_path)
+            if attempt_tracks_path and os.path.exists(attempt_tracks_path):
+                os.replace(attempt_tracks_path, _tracks_path(job_id))
             
             # If we have zone summary data, persist it
             if zone_summary and mode == "time_in_zone":
                 await _persist_zone_metrics(job_id, zone_summary)
             
+            if not output_result_path and settings.PITSTOP_RENDER_MODE == "background":
+                enqueue_render(job_id)
+            
+        except JobCancelledError:
+            # Only marks the job CANCELLED if cancellation was requested (not on a lost lease)
+            await _finalize_job(job_id, JobStatus.CANCELLED, worker_id=worker_id)
         except FileNotFoundError as e:
-            await _finalize_job(job_id, JobStatus.FAILED, error_message=str(e))
+            await _finalize_job(job_id, JobStatus.FAILED, error_message=str(e), worker_id=worker_id)
         except RuntimeError as e:
-            await _finalize_job(job_id, JobStatus.FAILED, error_message=str(e))
+            await _finalize_job(job_id, JobStatus.FAILED, error_message=str(e), worker_id=worker_id)
         except Exception as e:
-            await _finalize_job(job_id, JobStatus.FAILED, error_message=f"YOLO processing failed: {str(e)}")
+            await _finalize_job(
+                job_id, JobStatus.FAILED,
+                error_message=f"YOLO processing failed: {str(e)}",
+                worker_id=worker_id,
+            )
             
     except Exception as e:
-        await _finalize_job(job_id, JobStatus.FAILED, error_message=str(e))
+        await _finalize_job(job_id, JobStatus.FAILED, error_message=str(e), worker_id=worker_id)
     finally:
+        # A worker killed mid-job (timeout, cancel grace period) or a lost lease may leave
+        # this attempt's partial video and tracks
+        for path in (attempt_path, attempt_tracks_path):
+            if path and os.path.exists(path):
+                os.remove(path)
         _running_jobs.discard(job_id)
+        _cancel_tokens.pop(job_id, None)
 
 
 async def _persist_zone_metrics(job_id: uuid.UUID, zone_summary: dict) -> None:
@@ -451,6 +870,291 @@ async def _persist_zone_metrics(job_id: uuid.UUID, zone_summary: dict) -> None:
             )
 
 
-def enqueue_job(job_id: uuid.UUID) -> None:
-    """Enqueue a job for background processing."""
-    asyncio.create_task(run_job_processing(job_id))
+def _rezone_sync(tracks_path: str, zone_config: Optional[dict]) -> dict:
+    """Recompute zone timings from a track store (runs in a worker thread)."""
+    import json
+    
+    from app import settings
+    from app.model.zone_timing.time_in_zone import zone_names_from_config
+    from app.model.zone_timing.track_store import TrackTable, rezone_tracks
+    from app.model.zone_timing.zones import polygons_from_config
+    
+    if zone_config is None:
+        with open(settings.ZONE_CONFIG_PATH, "r") as f:
+            zone_config = json.load(f)
+    
+    polygons = polygons_from_config(zone_config)
+    zone_names = zone_names_from_config(zone_config)
+    result = rezone_tracks(TrackTable.load(tracks_path), polygons, zone_names)
+    return result.to_dict()
+
+
+async def rezone_job(
+    job_id: uuid.UUID,
+    zone_config: Optional[dict] = None,
+    persist: bool = False,
+) -> Optional[dict]:
+    """
+    Recompute a time_in_zone job's zone timings from its stored tracks.
+    
+    No detection or tracking is re-run, so this takes milliseconds.
+    
+    Args:
+        job_id: Job whose track store to use.
+        zone_config: Zone configuration ({"zones": [{"name", "points"}, ...]})
+            in the processed frame coordinates; None uses ZONE_CONFIG_PATH.
+        persist: Also write the new timings to the job's breakdown summary.
+        
+    Returns:
+        Zone summary dict (as TimeInZoneResult.to_dict()), or None if the
+        job has no stored tracks.
+        
+    Raises:
+        ValueError: If the zone configuration is invalid.
+    """
+    tracks_path = _tracks_path(job_id)
+    if not os.path.exists(tracks_path):
+        return None
+    
+    loop = asyncio.get_running_loop()
+    zone_summary = await loop.run_in_executor(
+        None, functools.partial(_rezone_sync, tracks_path, zone_config)
+    )
+    
+    if persist:
+        await _persist_zone_metrics(job_id, zone_summary)
+    
+    return zone_summary
+
+
+# Lane scheduler for jobs run in this process (PITSTOP_JOB_QUEUE=local), created on first use
+_scheduler: Optional[LaneScheduler] = None
+
+
+def _lane_slots(lane: str) -> int:
+    """Job slots per process a lane may use."""
+    from app import settings
+    
+    if lane == "batch":
+        return batch_slots(settings.PITSTOP_WORKER_CONCURRENCY, settings.PITSTOP_BATCH_SLOTS)
+    return settings.PITSTOP_WORKER_CONCURRENCY
+
+
+def enqueue_job(job_id: uuid.UUID, lane: str = "batch") -> None:
+    """
+    Enqueue a job for background processing in its lane.
+    
+    With PITSTOP_JOB_QUEUE=postgres the QUEUED row is the queue entry and a
+    worker process (app.worker) claims it, so nothing runs in this process.
+    """
+    from app import settings
+    
+    global _scheduler
+    
+    if settings.PITSTOP_JOB_QUEUE == "postgres":
+        return
+    if _scheduler is None:
+        _scheduler = LaneScheduler(
+            run_job_processing,
+            slots=settings.PITSTOP_WORKER_CONCURRENCY,
+            batch_slots=_lane_slots("batch"),
+        )
+    _scheduler.submit(job_id, lane)
+
+
+def is_render_pending(job: PitstopJob) -> bool:
+    """Whether a completed job's annotated video has not been rendered yet (and may still be)."""
+    return (
+        job.status == JobStatus.COMPLETE
+        and not job.output_path
+        and job.mode == "time_in_zone"
+        and not is_render_failed(job)
+    )
+
+
+def is_render_failed(job: PitstopJob) -> bool:
+    """Whether a job's deferred render failed PITSTOP_RENDER_MAX_ATTEMPTS times (no more retries)."""
+    from app import settings
+    
+    return not job.output_path and (job.render_attempts or 0) >= settings.PITSTOP_RENDER_MAX_ATTEMPTS
+
+
+def _render_sync(
+    job_id: uuid.UUID,
+    input_path: str,
+    output_path: str,
+    mode: str,
+    tracker: Optional[str],
+    skipped_ranges: Optional[List[dict]],
+    log_callback: Callable[[str], None],
+    cancel_token: CancelToken,
+) -> str:
+    """
+    Render a job's annotated video (runs in the render thread).
+    
+    With a track store the boxes and timers are replayed from it, so only
+    decoding, drawing and encoding run; jobs without stored tracks re-run
+    the full pipeline.
+    """
+    from app import settings
+    
+    tracks_path = _tracks_path(job_id)
+    
+    with get_cpu_budget().lease(f"render {job_id}") as cpu:
+        options = _processing_options(mode, tracker)
+        options.update(_cpu_thread_options(cpu, options.pop("decoder_threads")))
+        
+        if os.path.exists(tracks_path):
+            from app.model.zone_timing.time_in_zone import render_time_in_zone
+            from app.model.zone_timing.track_store import TrackTable
+            
+            log_callback("Rendering from stored tracks (no detection)")
+            return render_time_in_zone(
+                input_path,
+                options["zone_config_path"],
+                TrackTable.load(tracks_path),
+                output_path,
+                skipped_ranges=[(r["start_frame"], r["end_frame"]) for r in skipped_ranges or []],
+                decoder=options["decoder"],
+                decoder_threads=options["decoder_threads"],
+                encoder_threads=options["encoder_threads"],
+                progress_cb=lambda p: cpu.checkpoint(),
+                cancel_token=cancel_token,
+            )
+        
+        from app.model.pitstop_yolo_runner import PitstopYoloRunner
+        
+        log_callback("No stored tracks: re-running the pipeline")
+        runner = PitstopYoloRunner(
+            weights_path=settings.PITSTOP_YOLO_WEIGHTS_PATH,
+            threshold=settings.PITSTOP_YOLO_THRESHOLD,
+            **options,
+        )
+        result = runner.process_video(
+            input_path,
+            output_path,
+            log_cb=log_callback,
+            progress_cb=lambda p: cpu.checkpoint(),
+            cancel_token=cancel_token,
+        )
+        return result.output_path
+
+
+async def run_render(job_id: uuid.UUID) -> None:
+    """
+    Render the annotated video for a job that completed analysis-only.
+    
+    Runs in the low-priority render lane; the job stays COMPLETE throughout
+    and gains its output file when rendering finishes. The render holds a
+    lease on the job row (renewed while it runs), so only one process
+    renders a job at a time. Failures are counted on the job and leave it
+    without output: a later request retries, until
+    PITSTOP_RENDER_MAX_ATTEMPTS renders failed.
+    """
+    from app import settings
+    
+    if job_id in _rendering_jobs:
+        return
+    
+    _rendering_jobs.add(job_id)
+    render_path = None
+    cancel_token: Optional[CancelToken] = None
+    claimed = False
+    
+    try:
+        async with async_session_maker() as db:
+            job = await pitstop_persistence.get_job(db, job_id)
+            if not job or not is_render_pending(job):
+                return
+            input_key = job.input_path
+            mode = job.mode
+            tracker = job.tracker
+            skipped_ranges = job.skipped_ranges
+            
+            claimed = await pitstop_persistence.claim_job_render(
+                db, job_id, _RENDER_OWNER_ID, settings.PITSTOP_JOB_LEASE_SECONDS
+            )
+            if not claimed:
+                # Another process is rendering it
+                return
+        
+        input_path = str(settings.INPUT_DIR / input_key)
+        output_filename = f"{job_id}_output.mp4"
+        output_path = str(settings.OUTPUT_DIR / output_filename)
+        # Encoded to its own file and moved into place when done
+        render_path = str(settings.OUTPUT_DIR / f"{job_id}_output.{uuid.uuid4().hex[:8]}.part.mp4")
+        
+        await _append_log(job_id, "INFO Rendering annotated video...")
+        
+        loop = asyncio.get_running_loop()
+        # Registered like a job's token, so deleting the job stops the render
+        cancel_token = CancelToken()
+        _cancel_tokens.setdefault(job_id, cancel_token)
+        
+        def log_callback(msg: str) -> None:
+            asyncio.run_coroutine_threadsafe(_append_log(job_id, f"INFO [render] {msg}"), loop)
+        
+        render = loop.run_in_executor(
+            _render_pool,
+            functools.partial(
+                _render_sync,
+                job_id, input_path, render_path, mode, tracker, skipped_ranges,
+                log_callback, cancel_token,
+            ),
+        )
+        
+        # Renew the render lease while rendering; stop if another process took it over
+        heartbeat_s = max(1.0, settings.PITSTOP_JOB_LEASE_SECONDS / 3)
+        while True:
+            done, _ = await asyncio.wait({render}, timeout=heartbeat_s)
+            if done:
+                break
+            async with async_session_maker() as db:
+                if not await pitstop_persistence.claim_job_render(
+                    db, job_id, _RENDER_OWNER_ID, settings.PITSTOP_JOB_LEASE_SECONDS
+                ):
+                    cancel_token.cancel()
+        
+        output_result_path = await render
+        # The job may have been deleted while the encoder finished
+        cancel_token.check()
+        os.replace(output_result_path, output_path)
+        
+        async with async_session_maker() as db:
+            await pitstop_persistence.update_job_status(
+                db, job_id,
+                status=JobStatus.COMPLETE,
+                output_path=output_filename,
+                output_filename=output_filename,
+                output_size_bytes=os.path.getsize(output_path),
+            )
+            await pitstop_persistence.append_job_log(
+                db, job_id, f"INFO Output video rendered: {output_filename}"
+            )
+    
+    except JobCancelledError:
+        # Job deleted, or render lease lost to another process
+        await _append_log(job_id, "WARNING Video rendering stopped")
+    except Exception as e:
+        async with async_session_maker() as db:
+            await pitstop_persistence.record_render_failure(db, job_id, str(e))
+    finally:
+        _rendering_jobs.discard(job_id)
+        if cancel_token is not None and _cancel_tokens.get(job_id) is cancel_token:
+            del _cancel_tokens[job_id]
+        if render_path and os.path.exists(render_path):
+            os.remove(render_path)
+        if claimed:
+            try:
+                async with async_session_maker() as db:
+                    await pitstop_persistence.release_job_lease(db, job_id, _RENDER_OWNER_ID)
+            except Exception:
+                pass  # The lease expires on its own
+
+
+def enqueue_render(job_id: uuid.UUID) -> None:
+    """Queue deferred rendering of a job's annotated video (no-op if already rendering)."""
+    if job_id not in _rendering_jobs:
+        task = asyncio.create_task(run_render(job_id))
+        _render_tasks.add(task)
+        task.add_done_callback(_render_tasks.discard)
@@ -7,6 +7,7 @@ STORAGE_DIR = BASE_DIR / "storage"
 INPUT_DIR = STORAGE_DIR / "input"
 OUTPUT_DIR = STORAGE_DIR / "output"
 LOGS_DIR = STORAGE_DIR / "logs"
+TRACKS_DIR = STORAGE_DIR / "tracks"
 
 # Model weights directory
 MODEL_WEIGHTS_DIR = BASE_DIR / "model_weights"
@@ -15,6 +16,7 @@ MODEL_WEIGHTS_DIR = BASE_DIR / "model_weights"
 INPUT_DIR.mkdir(parents=True, exist_ok=True)
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 LOGS_DIR.mkdir(parents=True, exist_ok=True)
+TRACKS_DIR.mkdir(parents=True, exist_ok=True)
 MODEL_WEIGHTS_DIR.mkdir(parents=True, exist_ok=True)
 
 # YOLO model configuration
@@ -24,20 +26,145 @@ PITSTOP_YOLO_WEIGHTS_PATH = os.getenv(
 )
 PITSTOP_YOLO_THRESHOLD = float(os.getenv("PITSTOP_YOLO_THRESHOLD", "0.5"))
 
+# Inference device (e.g. "cpu", "cuda:0"); empty lets Ultralytics choose
+PITSTOP_DEVICE = os.getenv("PITSTOP_DEVICE", "") or None
+
+# Detector engine: "ultralytics" (PyTorch), "onnx" (ONNX Runtime), "onnx_int8" (quantized ONNX Runtime),
+# "openvino" or "opencv" (cv2.dnn).
+# Non-ultralytics engines export best.pt once and cache the result in PITSTOP_EXPORT_DIR.
+PITSTOP_DETECTOR_ENGINE = os.getenv("PITSTOP_DETECTOR_ENGINE", "ultralytics")
+PITSTOP_EXPORT_DIR = Path(os.getenv("PITSTOP_EXPORT_DIR", str(MODEL_WEIGHTS_DIR / "exported")))
+PITSTOP_EXPORT_IMGSZ = int(os.getenv("PITSTOP_EXPORT_IMGSZ", "640"))
+
+# INT8 quantization (PITSTOP_DETECTOR_ENGINE=onnx_int8): calibration frames are sampled from
+# storage/input; the INT8 model is only used if per-zone timings on the reference clip stay
+# within the tolerance of the FP32 model.
+PITSTOP_INT8_CALIBRATION_FRAMES = int(os.getenv("PITSTOP_INT8_CALIBRATION_FRAMES", "200"))
+PITSTOP_INT8_REFERENCE_CLIP = os.getenv("PITSTOP_INT8_REFERENCE_CLIP", "")
+PITSTOP_INT8_TOLERANCE_SEC = float(os.getenv("PITSTOP_INT8_TOLERANCE_SEC", "0.5"))
+
+# Memory budget for warm YOLO models kept loaded across jobs (LRU-evicted beyond this)
+PITSTOP_MODEL_CACHE_MB = int(os.getenv("PITSTOP_MODEL_CACHE_MB", "2048"))
+
 # Processing mode: "classic" (bbox annotate) or "time_in_zone" (supervision-based tracking)
 PITSTOP_MODE = os.getenv("PITSTOP_MODE", "time_in_zone")
 
+# Annotated video rendering for time_in_zone jobs:
+# "inline" (render before the job completes), "background" (complete after analysis, then render
+# in a low-priority lane) or "on_demand" (render on the first GET /pitstop/jobs/{id}/output)
+PITSTOP_RENDER_MODE = os.getenv("PITSTOP_RENDER_MODE", "inline").lower()
+# Failed deferred renders after which a job's output request returns an error instead of
+# starting another render
+PITSTOP_RENDER_MAX_ATTEMPTS = int(os.getenv("PITSTOP_RENDER_MAX_ATTEMPTS", "3"))
+
 # Zone configuration for time_in_zone mode
 ZONE_CONFIG_PATH = os.getenv(
     "ZONE_CONFIG_PATH",
     str(BASE_DIR / "app" / "model" / "zone_timing" / "sample_zones.json")
 )
 
+# Time-in-zone: save per-frame tracks of each job (TRACKS_DIR) so zone timings can be
+# recomputed for edited zones via POST /pitstop/jobs/{id}/rezone without re-running YOLO
+PITSTOP_STORE_TRACKS = os.getenv("PITSTOP_STORE_TRACKS", "true").lower() in ("1", "true", "yes")
+
 # Time-in-zone settings
 PITSTOP_IOU_THRESHOLD = float(os.getenv("PITSTOP_IOU_THRESHOLD", "0.5"))
 PITSTOP_TARGET_WIDTH = int(os.getenv("PITSTOP_TARGET_WIDTH", "1020"))
 PITSTOP_TARGET_HEIGHT = int(os.getenv("PITSTOP_TARGET_HEIGHT", "500"))
 
+# Classic mode inference batch size (frames per model call; 0 = size from available memory)
+PITSTOP_BATCH_SIZE = int(os.getenv("PITSTOP_BATCH_SIZE", "0"))
+
+# Run detection on every n-th frame only; boxes are carried forward in between (1 = every frame)
+PITSTOP_DETECT_EVERY_N = int(os.getenv("PITSTOP_DETECT_EVERY_N", "1"))
+
+# Motion gate: reuse previous detections when the mean gray-level change (0-255) since the
+# last inferred frame is below this threshold. Empty disables the gate.
+PITSTOP_MOTION_THRESHOLD = (
+    float(os.getenv("PITSTOP_MOTION_THRESHOLD")) if os.getenv("PITSTOP_MOTION_THRESHOLD") else None
+)
+PITSTOP_MOTION_MAX_SKIP_FRAMES = int(os.getenv("PITSTOP_MOTION_MAX_SKIP_FRAMES", "30"))
+
+# Time-in-zone tracker default for jobs that don't choose one: "bytetrack" (supervision ByteTrack)
+# or "iou" (greedy NumPy IoU/centroid tracker, much cheaper in fixed-camera pit-box scenes)
+PITSTOP_TRACKER = os.getenv("PITSTOP_TRACKER", "bytetrack").lower()
+
+# Time-in-zone: detect only on the padded bounding box of the zone polygons
+PITSTOP_ROI_CROP = os.getenv("PITSTOP_ROI_CROP", "false").lower() in ("1", "true", "yes")
+PITSTOP_ROI_PADDING = int(os.getenv("PITSTOP_ROI_PADDING", "32"))
+
+# Video decoder: "auto" (PyAV if installed, else OpenCV), "pyav" (threaded FFmpeg decode that
+# scales to the analysis size inside the decoder) or "opencv" (cv2.VideoCapture + cv2.resize).
+# PITSTOP_DECODER_THREADS caps PyAV decoder threads (0 = FFmpeg default).
+PITSTOP_DECODER = os.getenv("PITSTOP_DECODER", "auto").lower()
+PITSTOP_DECODER_THREADS = int(os.getenv("PITSTOP_DECODER_THREADS", "0"))
+
+# CPU budget shared by concurrently running jobs: torch/OpenCV/ffmpeg thread counts of each job
+# are set to an even share of PITSTOP_CPU_BUDGET cores (0 = all cores) and rebalanced as jobs
+# start and finish. PITSTOP_CPU_AFFINITY additionally pins each job to its own cores (Linux).
+PITSTOP_CPU_BUDGET = int(os.getenv("PITSTOP_CPU_BUDGET", "0"))
+PITSTOP_CPU_AFFINITY = os.getenv("PITSTOP_CPU_AFFINITY", "false").lower() in ("1", "true", "yes")
+
+# Shot gate for broadcast feeds: skip inference on shots that don't match a reference frame of the
+# pit camera (track cameras, graphics, replays). PITSTOP_SHOT_REFERENCE is the reference image;
+# time_in_zone falls back to the zone config's "reference_frame". Lower thresholds match stricter.
+PITSTOP_SHOT_FILTER = os.getenv("PITSTOP_SHOT_FILTER", "false").lower() in ("1", "true", "yes")
+PITSTOP_SHOT_REFERENCE = os.getenv("PITSTOP_SHOT_REFERENCE", "") or None
+PITSTOP_SHOT_MATCH_THRESHOLD = float(os.getenv("PITSTOP_SHOT_MATCH_THRESHOLD", "0.4"))
+
+# Cross-job inference server: running jobs send frames to one shared warm model that batches
+# them (up to PITSTOP_SERVER_MAX_BATCH frames, waiting at most PITSTOP_SERVER_MAX_LATENCY_MS
+# for a batch to fill), instead of each job running its own model instance on single frames.
+PITSTOP_INFERENCE_SERVER = os.getenv("PITSTOP_INFERENCE_SERVER", "false").lower() in ("1", "true", "yes")
+PITSTOP_SERVER_MAX_BATCH = int(os.getenv("PITSTOP_SERVER_MAX_BATCH", "8"))
+PITSTOP_SERVER_MAX_LATENCY_MS = float(os.getenv("PITSTOP_SERVER_MAX_LATENCY_MS", "10"))
+
+# Time-in-zone: split long videos into segments processed by this many worker processes
+# (1 = serial). Segments re-process PITSTOP_SEGMENT_OVERLAP_FRAMES frames before their start
+# to stitch tracks, and are never shorter than PITSTOP_MIN_SEGMENT_SECONDS.
+PITSTOP_SEGMENT_WORKERS = int(os.getenv("PITSTOP_SEGMENT_WORKERS", "1"))
+PITSTOP_SEGMENT_OVERLAP_FRAMES = int(os.getenv("PITSTOP_SEGMENT_OVERLAP_FRAMES", "60"))
+PITSTOP_MIN_SEGMENT_SECONDS = float(os.getenv("PITSTOP_MIN_SEGMENT_SECONDS", "30"))
+
+# Time-in-zone event windowing: a cheap scan (PITSTOP_SCAN_FPS frames per second of video, decoded
+# PITSTOP_SCAN_WIDTH pixels wide) finds where a car occupies the pit_box zone; only those windows,
+# padded by PITSTOP_EVENT_PADDING_SECONDS, get full-rate detection, tracking and timing.
+# Takes precedence over PITSTOP_SEGMENT_WORKERS.
+PITSTOP_EVENT_WINDOWING = os.getenv("PITSTOP_EVENT_WINDOWING", "false").lower() in ("1", "true", "yes")
+PITSTOP_SCAN_FPS = float(os.getenv("PITSTOP_SCAN_FPS", "2"))
+PITSTOP_SCAN_WIDTH = int(os.getenv("PITSTOP_SCAN_WIDTH", "480"))
+PITSTOP_EVENT_PADDING_SECONDS = float(os.getenv("PITSTOP_EVENT_PADDING_SECONDS", "3"))
+
+# Job queue: "local" (the API process runs jobs itself, at most PITSTOP_WORKER_CONCURRENCY at a
+# time) or "postgres" (the API only inserts QUEUED rows; `python -m app.worker` processes claim
+# them with SELECT ... FOR UPDATE SKIP LOCKED and can run on any node sharing the database and
+# storage). Claimed jobs hold a PITSTOP_JOB_LEASE_SECONDS lease renewed by heartbeats; jobs whose
+# lease expires are re-queued, and failed after PITSTOP_JOB_MAX_ATTEMPTS claims.
+PITSTOP_JOB_QUEUE = os.getenv("PITSTOP_JOB_QUEUE", "local").lower()
+PITSTOP_WORKER_CONCURRENCY = int(os.getenv("PITSTOP_WORKER_CONCURRENCY", "2"))
+PITSTOP_JOB_LEASE_SECONDS = float(os.getenv("PITSTOP_JOB_LEASE_SECONDS", "60"))
+PITSTOP_JOB_MAX_ATTEMPTS = int(os.getenv("PITSTOP_JOB_MAX_ATTEMPTS", "3"))
+PITSTOP_WORKER_POLL_SECONDS = float(os.getenv("PITSTOP_WORKER_POLL_SECONDS", "2"))
+
+# Scheduling: uploads are probed for their cost (frames x resolution x mode, in 1080p-frame
+# equivalents). Jobs up to PITSTOP_INTERACTIVE_MAX_COST (about 2 minutes of 1080p30 video in
+# classic mode) run in the interactive lane, which always goes first; batch jobs use at most
+# PITSTOP_BATCH_SLOTS of a process's job slots (0 = all but one). Each lane admits at most
+# PITSTOP_MAX_QUEUE_DEPTH queued jobs (0 = unlimited); further uploads get HTTP 429.
+PITSTOP_INTERACTIVE_MAX_COST = float(os.getenv("PITSTOP_INTERACTIVE_MAX_COST", "3600"))
+PITSTOP_BATCH_SLOTS = int(os.getenv("PITSTOP_BATCH_SLOTS", "0"))
+PITSTOP_MAX_QUEUE_DEPTH = int(os.getenv("PITSTOP_MAX_QUEUE_DEPTH", "20"))
+
+# Executor for the YOLO pipeline: "thread" (a thread of the API/worker process) or "process"
+# (long-lived worker processes that preload the model, so the frame loop's Python work doesn't
+# hold the GIL of the process serving requests). Process workers are recycled after
+# PITSTOP_WORKER_MAX_JOBS jobs or once above PITSTOP_WORKER_MAX_RSS_MB (0 = never), and a job
+# running longer than PITSTOP_JOB_TIMEOUT_SECONDS is killed with its worker (0 = no timeout).
+PITSTOP_EXECUTOR = os.getenv("PITSTOP_EXECUTOR", "thread").lower()
+PITSTOP_WORKER_MAX_JOBS = int(os.getenv("PITSTOP_WORKER_MAX_JOBS", "20"))
+PITSTOP_WORKER_MAX_RSS_MB = int(os.getenv("PITSTOP_WORKER_MAX_RSS_MB", "4096"))
+PITSTOP_JOB_TIMEOUT_SECONDS = float(os.getenv("PITSTOP_JOB_TIMEOUT_SECONDS", "0"))
+
 # Database
 DATABASE_URL = os.getenv(
     "DATABASE_URL",
@@ -1,7 +1,13 @@
 """Utility modules for the CodeFx backend."""
+from app.utils.cancellation import CancelToken, JobCancelledError
+from app.utils.cpu_budget import CpuBudget, CpuLease, get_cpu_budget
+from app.utils.pipeline import BackgroundWorker, prefetch
 from app.utils.range_stream import parse_range_header, iter_file_range, RangeNotSatisfiable
+from app.utils.video_decode import VideoDecoder, VideoInfo, open_video
 from app.utils.video_transcode import (
     ensure_browser_mp4,
+    concat_videos,
+    H264PipeWriter,
     cleanup_temp_file,
     check_ffmpeg_installed,
     FFmpegNotFoundError,
@@ -9,10 +15,22 @@ from app.utils.video_transcode import (
 )
 
 __all__ = [
+    "CancelToken",
+    "JobCancelledError",
+    "CpuBudget",
+    "CpuLease",
+    "get_cpu_budget",
+    "BackgroundWorker",
+    "prefetch",
     "parse_range_header",
     "iter_file_range",
     "RangeNotSatisfiable",
+    "VideoDecoder",
+    "VideoInfo",
+    "open_video",
     "ensure_browser_mp4",
+    "concat_videos",
+    "H264PipeWriter",
     "cleanup_temp_file",
     "check_ffmpeg_installed",
     "FFmpegNotFoundError",
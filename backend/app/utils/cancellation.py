@@ -0,0 +1,84 @@
+"""
+Cooperative cancellation for running jobs.
+
+A CancelToken is created per job and handed down to the frame loops, which
+call check() every frame and stop with JobCancelledError once the job is
+cancelled. Blocking work that does not poll the token (an ffmpeg process
+finalizing a video, a pool of segment workers) registers an on_cancel()
+callback that stops it from the cancelling thread.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, List, Optional
+
+
+class JobCancelledError(Exception):
+    """Raised inside a job when its cancel token is set."""
+    pass
+
+
+class CancelToken:
+    """
+    Thread-safe cancellation flag with callbacks.
+
+    Backed by a threading.Event by default; pass a multiprocessing Event to
+    share the flag with child processes (callbacks only run in the process
+    that calls cancel()).
+    """
+
+    def __init__(self, event: Optional[Any] = None):
+        """
+        Args:
+            event: Object with is_set()/set() holding the flag (default: a new threading.Event).
+        """
+        self._event = event if event is not None else threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        """True once cancel() was called (here or, for a shared event, in another process)."""
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        """Set the flag and run the registered callbacks (once)."""
+        with self._lock:
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass  # Best effort: the frame loops still see the flag
+
+    def check(self) -> None:
+        """
+        Raises:
+            JobCancelledError: If the token is cancelled
+        """
+        if self._event.is_set():
+            raise JobCancelledError("Job cancelled")
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        Run callback when the token is cancelled (at once if it already is).
+
+        Returns:
+            Function removing the callback again (call it when the guarded work ends).
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                registered = True
+            else:
+                registered = False
+        if not registered:
+            callback()
+
+        def remove() -> None:
+            with self._lock:
+                if callback in self._callbacks:
+                    self._callbacks.remove(callback)
+
+        return remove
@@ -0,0 +1,183 @@
+"""
+Process-wide CPU thread budget shared by concurrently running jobs.
+
+torch's intra-op pool, OpenCV's parallel_for pool and ffmpeg all default to
+one thread per core, so two jobs on the job pool each try to use every core
+and throughput drops as concurrency rises. The coordinator splits a
+configured core budget evenly across the running jobs and rebalances
+whenever a job starts or finishes:
+
+- torch applies its thread count per calling thread, so each job applies
+  its share from its own thread: on entry and at checkpoints in the frame
+  loop (CpuLease.checkpoint() is a no-op unless the share changed).
+  OpenCV's setting is process-wide and gets the same per-job share.
+- ffmpeg threads (PyAV decoder, H.264 encoder) are fixed when the decoder
+  or encoder process starts, so they use the share at job start.
+- Optionally each job's thread is pinned to its own slice of the cores
+  (sched_setaffinity, Linux). Threads and processes it starts afterwards
+  (torch/OpenCV workers, ffmpeg) inherit the mask.
+
+Usage:
+    with get_cpu_budget().lease(f"job {job_id}") as lease:
+        runner.process_video(..., progress_cb=lambda p: lease.checkpoint())
+"""
+from __future__ import annotations
+
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+
+
+def available_cpus() -> List[int]:
+    """Cores this process may run on (respects cgroup/taskset restrictions)."""
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:  # Not available on macOS/Windows
+        return list(range(os.cpu_count() or 1))
+
+
+def set_torch_threads(num_threads: int) -> None:
+    """Set torch's intra-op thread count for the calling thread (if torch is installed)."""
+    try:
+        import torch
+        torch.set_num_threads(num_threads)
+    except ImportError:
+        pass
+
+
+def set_library_threads(num_threads: int) -> None:
+    """Set torch and OpenCV thread counts for the calling thread."""
+    cv2.setNumThreads(num_threads)
+    set_torch_threads(num_threads)
+
+
+class CpuLease:
+    """One job's share of the CPU budget. Use as a context manager."""
+
+    def __init__(self, budget: "CpuBudget", name: str):
+        self.name = name
+        self._budget = budget
+        self._applied_version = -1
+
+    @property
+    def threads(self) -> int:
+        """Current thread share of this job."""
+        return self._budget.share(self)[0]
+
+    @property
+    def cpus(self) -> Optional[List[int]]:
+        """Cores this job is pinned to, or None if affinity is disabled."""
+        return self._budget.share(self)[1]
+
+    def checkpoint(self) -> bool:
+        """
+        Apply the current share to the calling thread if it changed.
+
+        Must be called from the job's own thread. Cheap enough to call per
+        frame. Returns True if thread counts (or affinity) were updated.
+        """
+        threads, cpus, version = self._budget.share(self)
+        if version == self._applied_version:
+            return False
+        self._applied_version = version
+
+        set_library_threads(threads)
+        if cpus is not None:
+            try:
+                os.sched_setaffinity(0, cpus)
+            except (AttributeError, OSError):
+                pass
+        return True
+
+    def release(self) -> None:
+        """Return the share to the budget; the remaining jobs grow at their next checkpoint."""
+        self._budget.release(self)
+
+    def __enter__(self) -> "CpuLease":
+        self.checkpoint()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+class CpuBudget:
+    """Thread-safe coordinator that splits a core budget across active leases."""
+
+    def __init__(self, cores: int = 0, pin_affinity: bool = False):
+        """
+        Args:
+            cores: Cores to share between jobs (0 = all available cores).
+            pin_affinity: Pin each job's thread to a disjoint slice of cores.
+        """
+        cpus = available_cpus()
+        self.cores = min(int(cores), len(cpus)) if cores and cores > 0 else len(cpus)
+        self.pin_affinity = bool(pin_affinity)
+        self._cpus = cpus[: self.cores]
+        self._lock = threading.Lock()
+        # Active leases in start order
+        self._leases: Dict[int, CpuLease] = {}
+        # Bumped on every start/finish so leases know when to re-apply
+        self._version = 0
+
+    def lease(self, name: str = "job") -> CpuLease:
+        """Register a running job and rebalance the shares."""
+        lease = CpuLease(self, name)
+        with self._lock:
+            self._leases[id(lease)] = lease
+            self._version += 1
+        return lease
+
+    def release(self, lease: CpuLease) -> None:
+        with self._lock:
+            if self._leases.pop(id(lease), None) is not None:
+                self._version += 1
+
+    def share(self, lease: CpuLease) -> Tuple[int, Optional[List[int]], int]:
+        """(threads, pinned cores or None, version) of a lease."""
+        with self._lock:
+            order = list(self._leases)
+            if id(lease) not in self._leases:
+                return self.cores, None, self._version
+            position = order.index(id(lease))
+            count = len(order)
+            version = self._version
+
+        # Even split; the first jobs take the remainder so the whole budget is used
+        base, extra = divmod(self.cores, count)
+        threads = max(1, base + (1 if position < extra else 0))
+
+        cpus = None
+        if self.pin_affinity:
+            start = position * base + min(position, extra)
+            cpus = [self._cpus[(start + i) % self.cores] for i in range(threads)]
+        return threads, cpus, version
+
+    def stats(self) -> List[dict]:
+        """Snapshot of the current shares (for logs/diagnostics)."""
+        with self._lock:
+            leases = list(self._leases.values())
+        return [
+            {"name": lease.name, "threads": lease.threads, "cpus": lease.cpus}
+            for lease in leases
+        ]
+
+
+# Singleton budget instance
+_budget_instance: Optional[CpuBudget] = None
+_budget_lock = threading.Lock()
+
+
+def get_cpu_budget() -> CpuBudget:
+    """Get the process-wide CPU budget (created on first use)."""
+    global _budget_instance
+    with _budget_lock:
+        if _budget_instance is None:
+            from app.settings import PITSTOP_CPU_AFFINITY, PITSTOP_CPU_BUDGET
+            _budget_instance = CpuBudget(
+                cores=PITSTOP_CPU_BUDGET,
+                pin_affinity=PITSTOP_CPU_AFFINITY,
+            )
+        return _budget_instance
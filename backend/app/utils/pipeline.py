@@ -0,0 +1,139 @@
+"""
+Threaded pipeline stages for frame processing loops.
+
+Video loops alternate between decode, inference and encode. Decode and
+encode are mostly native code that releases the GIL, so running them on
+their own threads lets them overlap with inference. Stages are connected
+with bounded queues to cap memory, and items stay in submission order.
+
+- prefetch(): run an iterator (e.g. a frame decoder) on a background thread
+- BackgroundWorker: hand items to a function (e.g. render + write) on a background thread
+
+Errors raised on a background thread are re-raised in the calling thread.
+"""
+from __future__ import annotations
+
+import queue
+import threading
+from typing import Callable, Generic, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+# How often blocked queue operations wake up to check for shutdown
+_POLL_INTERVAL_S = 0.1
+
+_END = object()
+
+
+def _put(q: "queue.Queue", item: object, stop: threading.Event) -> bool:
+    """Put item on a bounded queue, giving up if stop is set. Returns False if stopped."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=_POLL_INTERVAL_S)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def prefetch(source: Iterable[T], maxsize: int = 8, name: str = "prefetch") -> Iterator[T]:
+    """
+    Iterate `source` on a background thread, yielding items in order.
+
+    At most `maxsize` items are buffered ahead of the consumer. Closing the
+    returned generator (or breaking out of the loop) stops the producer thread.
+
+    Args:
+        source: Iterable to consume, e.g. a frame reader generator.
+        maxsize: Maximum number of items buffered ahead of the consumer.
+        name: Thread name (shows up in debuggers and thread dumps).
+
+    Raises:
+        Any exception raised by `source`, re-raised in the consuming thread.
+    """
+    q: "queue.Queue" = queue.Queue(maxsize=max(1, maxsize))
+    stop = threading.Event()
+    error: list = []
+
+    def produce() -> None:
+        try:
+            for item in source:
+                if not _put(q, item, stop):
+                    return
+        except BaseException as e:  # re-raised in consumer
+            error.append(e)
+        finally:
+            _put(q, _END, stop)
+
+    thread = threading.Thread(target=produce, name=name, daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            item = q.get()
+            if item is _END:
+                break
+            yield item
+        if error:
+            raise error[0]
+    finally:
+        stop.set()
+        thread.join()
+
+
+class BackgroundWorker(Generic[T]):
+    """
+    Apply a function to submitted items on a background thread, in order.
+
+    Usage:
+        writer = BackgroundWorker(render_and_write, maxsize=8)
+        for item in items:
+            writer.submit(item)
+        writer.close()  # drains the queue and re-raises any worker error
+    """
+
+    def __init__(self, fn: Callable[[T], None], maxsize: int = 8, name: str = "worker"):
+        self._fn = fn
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, maxsize))
+        self._stop = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _END:
+                return
+            if self._error is not None:
+                # Keep draining so submitters never block on a dead worker
+                continue
+            try:
+                self._fn(item)
+            except BaseException as e:  # re-raised in submitter
+                self._error = e
+                self._stop.set()
+
+    def _raise_if_failed(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    def submit(self, item: T) -> None:
+        """Queue an item, blocking while the queue is full."""
+        self._raise_if_failed()
+        if not _put(self._queue, item, self._stop):
+            self._raise_if_failed()
+
+    def close(self, reraise: bool = True) -> None:
+        """
+        Wait for all queued items to be processed, then re-raise any worker error.
+
+        Pass reraise=False from cleanup paths that are already handling an exception.
+        """
+        if not self._closed:
+            self._closed = True
+            self._queue.put(_END)
+            self._thread.join()
+        if reraise:
+            self._raise_if_failed()
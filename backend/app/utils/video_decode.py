@@ -0,0 +1,304 @@
+"""
+Video decoding for the processing pipelines.
+
+cv2.VideoCapture decodes on a single thread at full source resolution, and
+every frame is then shrunk with cv2.resize. For 4K broadcast masters that
+decode cost can exceed inference. VideoDecoder hides the backend:
+
+- "pyav": FFmpeg through PyAV with frame/slice-threaded decoding. swscale
+  scales each frame straight to the analysis resolution and converts it to
+  BGR in the same pass; the returned array is a view on the scaled frame,
+  so no full-resolution BGR frame is ever materialized. Frame count and
+  duration come from the container instead of OpenCV's estimate.
+- "opencv": cv2.VideoCapture + cv2.resize (fallback when PyAV is missing).
+
+open_video() picks the backend; "auto" prefers PyAV when it is installed.
+"""
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+DECODER_BACKENDS = ("auto", "pyav", "opencv")
+
+# Frame rate assumed when the container does not report one
+DEFAULT_FPS = 30.0
+
+# swscale algorithm for in-decoder scaling (matches cv2.resize's INTER_LINEAR)
+SCALE_INTERPOLATION = "BILINEAR"
+
+
+@dataclass
+class VideoInfo:
+    """Source stream properties."""
+    width: int
+    height: int
+    fps: float
+    frame_count: int
+    duration_s: float
+    # False if fps was not reported and DEFAULT_FPS is assumed
+    fps_detected: bool = True
+
+
+class VideoDecoder(ABC):
+    """
+    Decodes BGR frames, optionally scaled to target_size.
+
+    Implementations:
+        - PyAVDecoder: threaded FFmpeg decode with swscale scaling
+        - OpenCVDecoder: cv2.VideoCapture + cv2.resize
+    """
+
+    #: Backend name as used in PITSTOP_DECODER
+    backend: str = ""
+
+    def __init__(self, path: Union[str, Path], target_size: Optional[Tuple[int, int]] = None):
+        self.path = str(path)
+        self.target_size = tuple(target_size) if target_size else None
+        self.info: VideoInfo
+
+    @property
+    def frame_size(self) -> Tuple[int, int]:
+        """(width, height) of the decoded frames."""
+        return self.target_size or (self.info.width, self.info.height)
+
+    @abstractmethod
+    def seek(self, frame_index: int) -> None:
+        """Make the next frame read the one at frame_index."""
+
+    @abstractmethod
+    def read_frames(self, max_frames: Optional[int] = None, step: int = 1) -> Iterator[np.ndarray]:
+        """
+        Yield contiguous BGR frames.
+
+        Args:
+            max_frames: Source frames to read (all remaining if None).
+            step: Yield every step-th frame only; frames in between are
+                decoded (inter frames depend on them) but never scaled or
+                converted to BGR.
+        """
+
+    def close(self) -> None:
+        """Release the decoder."""
+
+    def __enter__(self) -> "VideoDecoder":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class OpenCVDecoder(VideoDecoder):
+    """cv2.VideoCapture decoding, resized with cv2.resize."""
+
+    backend = "opencv"
+
+    def __init__(self, path: Union[str, Path], target_size: Optional[Tuple[int, int]] = None):
+        super().__init__(path, target_size)
+        self._cap = cv2.VideoCapture(self.path)
+        if not self._cap.isOpened():
+            raise RuntimeError(f"Could not open video: {self.path}")
+
+        reported_fps = self._cap.get(cv2.CAP_PROP_FPS) or 0
+        fps = reported_fps if reported_fps > 1e-6 else DEFAULT_FPS
+        frame_count = int(self._cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        self.info = VideoInfo(
+            width=int(self._cap.get(cv2.CAP_PROP_FRAME_WIDTH) or 0),
+            height=int(self._cap.get(cv2.CAP_PROP_FRAME_HEIGHT) or 0),
+            fps=fps,
+            frame_count=frame_count,
+            duration_s=frame_count / fps,
+            fps_detected=reported_fps > 1e-6,
+        )
+
+    def seek(self, frame_index: int) -> None:
+        self._cap.set(cv2.CAP_PROP_POS_FRAMES, int(frame_index))
+
+    def read_frames(self, max_frames: Optional[int] = None, step: int = 1) -> Iterator[np.ndarray]:
+        step = max(1, int(step))
+        frames_read = 0
+        while max_frames is None or frames_read < max_frames:
+            if frames_read % step:
+                # grab() decodes without the BGR conversion of retrieve()
+                if not self._cap.grab():
+                    break
+                frames_read += 1
+                continue
+
+            ok, frame = self._cap.read()
+            if not ok:
+                break
+
+            if self.target_size:
+                frame = cv2.resize(frame, self.target_size)
+
+            yield frame
+            frames_read += 1
+
+    def close(self) -> None:
+        self._cap.release()
+
+
+class PyAVDecoder(VideoDecoder):
+    """Threaded FFmpeg decoding via PyAV, scaled and converted by swscale."""
+
+    backend = "pyav"
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        target_size: Optional[Tuple[int, int]] = None,
+        threads: int = 0,
+    ):
+        """
+        Args:
+            path: Video file to decode.
+            target_size: Optional (width, height) to scale frames to.
+            threads: Decoder threads (0 lets FFmpeg choose from the CPU count).
+        """
+        super().__init__(path, target_size)
+        try:
+            import av
+            from av.video.reformatter import VideoReformatter
+        except ImportError as e:
+            raise RuntimeError(
+                "PyAV is required for PITSTOP_DECODER=pyav. Install it with: pip install av"
+            ) from e
+
+        try:
+            self._container = av.open(self.path)
+        except av.error.FFmpegError as e:
+            raise RuntimeError(f"Could not open video: {self.path} ({e})") from e
+        if not self._container.streams.video:
+            self._container.close()
+            raise RuntimeError(f"No video stream in: {self.path}")
+
+        self._stream = self._container.streams.video[0]
+        # Frame + slice threading; this is the main win over cv2.VideoCapture
+        self._stream.thread_type = "AUTO"
+        self._stream.codec_context.thread_count = max(0, int(threads))
+        # Reused across frames so the swscale context is only set up once
+        self._reformatter = VideoReformatter()
+
+        stream = self._stream
+        rate = stream.average_rate or stream.guessed_rate
+        fps = float(rate) if rate else DEFAULT_FPS
+        time_base = float(stream.time_base) if stream.time_base else 0.0
+        if stream.duration and time_base:
+            duration_s = stream.duration * time_base
+        elif self._container.duration:
+            duration_s = self._container.duration / av.time_base
+        else:
+            duration_s = 0.0
+        # nb_frames from the container header; estimate from duration if absent
+        frame_count = int(stream.frames) or int(round(duration_s * fps))
+
+        self.info = VideoInfo(
+            width=stream.codec_context.width,
+            height=stream.codec_context.height,
+            fps=fps,
+            frame_count=frame_count,
+            duration_s=duration_s,
+            fps_detected=bool(rate),
+        )
+        self._time_base = time_base
+        self._start_pts = stream.start_time or 0
+        self._skip_to: Optional[int] = None
+
+    def seek(self, frame_index: int) -> None:
+        frame_index = max(0, int(frame_index))
+        if frame_index == 0 or not self._time_base:
+            self._skip_to = frame_index or None
+            return
+        # Land on the keyframe at or before the target, then decode forward
+        pts = self._start_pts + int(frame_index / self.info.fps / self._time_base)
+        self._container.seek(pts, stream=self._stream, backward=True, any_frame=False)
+        self._skip_to = frame_index
+
+    def _frame_index(self, frame) -> Optional[int]:
+        if frame.pts is None or not self._time_base:
+            return None
+        return int(round((frame.pts - self._start_pts) * self._time_base * self.info.fps))
+
+    def read_frames(self, max_frames: Optional[int] = None, step: int = 1) -> Iterator[np.ndarray]:
+        width, height = self.frame_size
+        step = max(1, int(step))
+        frames_read = 0
+        skip_to, self._skip_to = self._skip_to, None
+        skipped = 0
+
+        for frame in self._container.decode(self._stream):
+            if max_frames is not None and frames_read >= max_frames:
+                break
+
+            if skip_to is not None:
+                # Drop frames between the keyframe and the seek target
+                index = self._frame_index(frame)
+                if index is None:
+                    index = skipped
+                    skipped += 1
+                if index < skip_to:
+                    continue
+                skip_to = None
+
+            if frames_read % step:
+                frames_read += 1
+                continue
+
+            scaled = self._reformatter.reformat(
+                frame,
+                width=width,
+                height=height,
+                format="bgr24",
+                interpolation=SCALE_INTERPOLATION,
+            )
+            # View on the scaled frame; copied only if swscale padded the rows
+            yield np.ascontiguousarray(scaled.to_ndarray())
+            frames_read += 1
+
+    def close(self) -> None:
+        self._container.close()
+
+
+def pyav_available() -> bool:
+    """Check if PyAV can be imported."""
+    try:
+        import av  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def open_video(
+    path: Union[str, Path],
+    target_size: Optional[Tuple[int, int]] = None,
+    backend: str = "auto",
+    threads: int = 0,
+) -> VideoDecoder:
+    """
+    Open a video with the requested decoder backend.
+
+    Args:
+        path: Video file to decode.
+        target_size: Optional (width, height) to scale frames to.
+        backend: "auto" (PyAV if installed, else OpenCV), "pyav" or "opencv".
+        threads: Decoder threads for the PyAV backend (0 = FFmpeg default).
+
+    Raises:
+        ValueError: If the backend name is unknown
+        RuntimeError: If the video cannot be opened or PyAV is missing for "pyav"
+    """
+    backend = (backend or "auto").lower()
+    if backend not in DECODER_BACKENDS:
+        raise ValueError(
+            f"Unknown decoder '{backend}'. Choose from: {', '.join(DECODER_BACKENDS)}"
+        )
+
+    if backend == "pyav" or (backend == "auto" and pyav_available()):
+        return PyAVDecoder(path, target_size, threads=threads)
+    return OpenCVDecoder(path, target_size)
@@ -2,17 +2,40 @@
 Video transcoding utilities for browser-compatible MP4 output.
 
 OpenCV's mp4v codec produces files that many browsers cannot decode.
-This module uses ffmpeg to transcode to H.264 with faststart for web playback.
+This module uses ffmpeg to produce H.264 with faststart for web playback:
+H264PipeWriter encodes rendered frames directly (one encode, no temp file),
+ensure_browser_mp4() transcodes an existing MP4. H264PipeWriter and
+concat_videos() take an optional CancelToken that kills their ffmpeg
+process as soon as the job is cancelled.
 """
 from __future__ import annotations
 
 import os
 import shutil
 import subprocess
-from typing import Callable, Optional
+import threading
+from collections import deque
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from app.utils.cancellation import CancelToken, JobCancelledError
 
 LogCB = Optional[Callable[[str], None]]
 
+# Seconds to wait for ffmpeg to flush and finalize after the last frame
+FINALIZE_TIMEOUT_S = 600
+
+# Encoder settings shared by H264PipeWriter and ensure_browser_mp4()
+H264_OUTPUT_ARGS = [
+    "-c:v", "libx264",         # H.264 codec
+    "-pix_fmt", "yuv420p",     # Browser-compatible pixel format
+    "-movflags", "+faststart", # Move moov atom for streaming
+    "-preset", "veryfast",     # Fast encoding
+    "-crf", "23",              # Quality level
+    "-an",                     # No audio
+]
+
 
 class FFmpegNotFoundError(RuntimeError):
     """Raised when ffmpeg is not installed or not in PATH."""
@@ -24,6 +47,15 @@ class TranscodeError(RuntimeError):
     pass
 
 
+FFMPEG_INSTALL_HINT = (
+    "ffmpeg is required to generate browser-compatible MP4. "
+    "Please install ffmpeg:\n"
+    "  macOS: brew install ffmpeg\n"
+    "  Ubuntu/Debian: sudo apt-get install -y ffmpeg\n"
+    "  Windows: Download from https://ffmpeg.org/download.html"
+)
+
+
 def check_ffmpeg_installed() -> bool:
     """Check if ffmpeg is available in PATH."""
     return shutil.which("ffmpeg") is not None
@@ -65,13 +97,7 @@ def ensure_browser_mp4(
     
     # Check ffmpeg is installed
     if not check_ffmpeg_installed():
-        raise FFmpegNotFoundError(
-            "ffmpeg is required to generate browser-compatible MP4. "
-            "Please install ffmpeg:\n"
-            "  macOS: brew install ffmpeg\n"
-            "  Ubuntu/Debian: sudo apt-get install -y ffmpeg\n"
-            "  Windows: Download from https://ffmpeg.org/download.html"
-        )
+        raise FFmpegNotFoundError(FFMPEG_INSTALL_HINT)
     
     log("ffmpeg found, checking input file...")
     
@@ -94,12 +120,7 @@ def ensure_browser_mp4(
         "ffmpeg",
         "-y",                      # Overwrite output
         "-i", input_mp4_path,      # Input file
-        "-c:v", "libx264",         # H.264 codec
-        "-pix_fmt", "yuv420p",     # Browser-compatible pixel format
-        "-movflags", "+faststart", # Move moov atom for streaming
-        "-preset", "veryfast",     # Fast encoding
-        "-crf", "23",              # Quality level
-        "-an",                     # No audio
+        *H264_OUTPUT_ARGS,
         output_mp4_path,
     ]
     
@@ -141,6 +162,299 @@ def ensure_browser_mp4(
         raise FFmpegNotFoundError(f"ffmpeg command failed: {e}")
 
 
+def concat_videos(
+    input_paths: List[str],
+    output_path: str,
+    log_cb: LogCB = None,
+    cancel_token: Optional[CancelToken] = None,
+) -> None:
+    """
+    Concatenate videos with identical codec parameters without re-encoding.
+    
+    Used to join the per-segment H.264 outputs of segment-parallel
+    processing; the result is written with faststart like a single-pass output.
+    
+    Raises:
+        FFmpegNotFoundError: If ffmpeg is not installed
+        TranscodeError: If concatenation fails
+        JobCancelledError: If cancel_token is cancelled (ffmpeg is killed)
+    """
+    if not input_paths:
+        raise ValueError("No videos to concatenate")
+    if not check_ffmpeg_installed():
+        raise FFmpegNotFoundError("ffmpeg is required to concatenate video segments")
+    
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    
+    # concat demuxer list file; paths are quoted per ffmpeg's escaping rules
+    list_path = output_path + ".concat.txt"
+    with open(list_path, "w") as f:
+        for path in input_paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+    
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-f", "concat",
+        "-safe", "0",
+        "-i", list_path,
+        "-c", "copy",
+        "-movflags", "+faststart",
+        output_path,
+    ]
+    
+    if log_cb:
+        log_cb(f"Concatenating {len(input_paths)} segments...")
+    
+    remove_cancel = None
+    try:
+        proc = subprocess.Popen(
+            cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+        )
+        if cancel_token is not None:
+            remove_cancel = cancel_token.on_cancel(proc.kill)
+        try:
+            _, stderr = proc.communicate(timeout=600)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+            raise TranscodeError("ffmpeg concatenation timed out after 10 minutes")
+    except OSError as e:
+        raise FFmpegNotFoundError(f"ffmpeg command failed: {e}")
+    finally:
+        if remove_cancel is not None:
+            remove_cancel()
+        cleanup_temp_file(list_path)
+    
+    if cancel_token is not None and cancel_token.cancelled:
+        cleanup_temp_file(output_path)
+        raise JobCancelledError("Job cancelled while concatenating segments")
+    
+    if proc.returncode != 0:
+        stderr_lines = stderr.strip().split("\n") if stderr else []
+        error_tail = "\n".join(stderr_lines[-20:]) if stderr_lines else "No error output"
+        raise TranscodeError(
+            f"ffmpeg concatenation failed (exit code {proc.returncode}):\n{error_tail}"
+        )
+
+
+class H264PipeWriter:
+    """
+    Encode BGR frames to a browser-compatible H.264 MP4 in a single pass.
+    
+    Raw frames are streamed over stdin into one ffmpeg process (libx264,
+    yuv420p, faststart), replacing cv2.VideoWriter + ensure_browser_mp4():
+    no intermediate mp4v file is written and no frame is encoded twice.
+    Encoding runs in the ffmpeg process concurrently with the caller.
+    
+    Mirrors the cv2.VideoWriter methods used by the pipelines (write,
+    isOpened, release). Call close() after the last frame to finalize the
+    file and surface encoder errors; release() on its own (e.g. in a
+    finally block after a failure) kills ffmpeg and removes the partial file.
+    With a cancel_token, cancelling the job kills ffmpeg at once (also while
+    close() waits for it to finalize) and write()/close() raise JobCancelledError.
+    
+    Raises:
+        FFmpegNotFoundError: If ffmpeg is not installed
+        TranscodeError: If ffmpeg exits early or fails to finalize the file
+        JobCancelledError: If cancel_token is cancelled while encoding
+    """
+    
+    def __init__(
+        self,
+        output_path: str,
+        fps: float,
+        frame_size: Tuple[int, int],
+        log_cb: LogCB = None,
+        threads: int = 0,
+        cancel_token: Optional[CancelToken] = None,
+    ):
+        """
+        Args:
+            output_path: Path for the encoded MP4
+            fps: Output frame rate
+            frame_size: (width, height) of every frame written
+            log_cb: Optional callback for logging progress
+            threads: Encoder threads (0 = one per core, the libx264 default)
+            cancel_token: Optional job cancel token; cancelling kills ffmpeg
+        """
+        if not check_ffmpeg_installed():
+            raise FFmpegNotFoundError(FFMPEG_INSTALL_HINT)
+        
+        self.output_path = str(output_path)
+        self.frame_size = (int(frame_size[0]), int(frame_size[1]))
+        self.frames_written = 0
+        self._log_cb = log_cb
+        self._closed = False
+        
+        output_dir = os.path.dirname(self.output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        
+        width, height = self.frame_size
+        cmd = [
+            "ffmpeg",
+            "-y",                      # Overwrite output
+            "-loglevel", "error",
+            "-f", "rawvideo",          # Raw frames on stdin
+            "-pix_fmt", "bgr24",       # OpenCV frame layout
+            "-s", f"{width}x{height}",
+            "-r", f"{fps:.6f}",
+            "-i", "pipe:0",
+            *H264_OUTPUT_ARGS,
+            "-threads", str(max(0, int(threads))),
+            self.output_path,
+        ]
+        
+        try:
+            self._proc = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+            )
+        except OSError as e:
+            raise FFmpegNotFoundError(f"ffmpeg command failed: {e}")
+        
+        # Drain stderr so ffmpeg never blocks on it; keep the tail for errors
+        self._stderr_tail: deque = deque(maxlen=20)
+        self._stderr_reader = threading.Thread(
+            target=self._read_stderr, name="ffmpeg-stderr", daemon=True
+        )
+        self._stderr_reader.start()
+        
+        self._cancel_token = cancel_token
+        self._remove_cancel = cancel_token.on_cancel(self._kill) if cancel_token else None
+        
+        self._log(f"Encoding H.264 via ffmpeg pipe: {width}x{height} @ {fps:.2f} fps")
+    
+    def _log(self, msg: str) -> None:
+        """Safe logging that won't fail."""
+        if self._log_cb:
+            try:
+                self._log_cb(msg)
+            except Exception:
+                pass  # Don't let logging failures break encoding
+    
+    def _read_stderr(self) -> None:
+        for line in iter(self._proc.stderr.readline, b""):
+            self._stderr_tail.append(line.decode(errors="replace").rstrip())
+    
+    def _kill(self) -> None:
+        """Kill ffmpeg (called from the cancelling thread)."""
+        try:
+            self._proc.kill()
+        except OSError:
+            pass  # Already exited
+    
+    def _cancelled(self) -> bool:
+        return self._cancel_token is not None and self._cancel_token.cancelled
+    
+    def _stop_cancel_watch(self) -> None:
+        if self._remove_cancel is not None:
+            self._remove_cancel()
+            self._remove_cancel = None
+    
+    def _error_tail(self) -> str:
+        self._stderr_reader.join(timeout=5)
+        return "\n".join(self._stderr_tail) or "No error output"
+    
+    def isOpened(self) -> bool:
+        """True while ffmpeg is running and accepting frames."""
+        return not self._closed and self._proc.poll() is None
+    
+    def write(self, frame: np.ndarray) -> None:
+        """Send one BGR frame (height x width x 3, uint8) to the encoder."""
+        height, width = frame.shape[:2]
+        if (width, height) != self.frame_size or frame.ndim != 3 or frame.shape[2] != 3:
+            raise ValueError(
+                f"Frame shape {frame.shape} does not match encoder size {self.frame_size}"
+            )
+        try:
+            self._proc.stdin.write(np.ascontiguousarray(frame, dtype=np.uint8).data)
+        except (BrokenPipeError, ValueError):
+            # ffmpeg exited (or the pipe was already closed)
+            returncode = self._proc.wait()
+            self.release()
+            if self._cancelled():
+                raise JobCancelledError("Job cancelled while encoding")
+            raise TranscodeError(
+                f"ffmpeg exited while encoding (exit code {returncode}):\n{self._error_tail()}"
+            )
+        self.frames_written += 1
+    
+    def close(self) -> None:
+        """
+        Finish encoding: flush ffmpeg, wait for it and verify the output file.
+        
+        Raises:
+            TranscodeError: If ffmpeg fails, times out or produces no file
+            JobCancelledError: If the job is cancelled before ffmpeg finishes
+        """
+        if self._closed:
+            return
+        self._closed = True
+        
+        if self._cancelled():
+            self._kill()
+        
+        try:
+            self._proc.stdin.close()
+        except BrokenPipeError:
+            pass  # Reported through the exit code below
+        
+        try:
+            returncode = self._proc.wait(timeout=FINALIZE_TIMEOUT_S)
+        except subprocess.TimeoutExpired:
+            self._proc.kill()
+            self._proc.wait()
+            cleanup_temp_file(self.output_path)
+            self._log("ffmpeg TIMEOUT")
+            raise TranscodeError("ffmpeg encoding timed out while finalizing the output")
+        finally:
+            self._stop_cancel_watch()
+        
+        if self._cancelled():
+            cleanup_temp_file(self.output_path)
+            self._log("ffmpeg stopped: job cancelled")
+            raise JobCancelledError("Job cancelled while encoding")
+        
+        self._log(f"ffmpeg exit code: {returncode}")
+        if returncode != 0:
+            error_tail = self._error_tail()
+            self._log(f"ffmpeg FAILED: {error_tail[:200]}")
+            cleanup_temp_file(self.output_path)
+            raise TranscodeError(
+                f"ffmpeg encoding failed (exit code {returncode}):\n{error_tail}"
+            )
+        
+        if not os.path.exists(self.output_path):
+            raise TranscodeError(f"ffmpeg did not produce output file: {self.output_path}")
+        
+        output_size = os.path.getsize(self.output_path)
+        self._log(
+            f"Encoded {self.frames_written} frames: {output_size:,} bytes (H.264 + faststart)"
+        )
+    
+    def release(self) -> None:
+        """Stop the encoder without finalizing; removes the partial output."""
+        if self._closed:
+            return
+        self._closed = True
+        self._stop_cancel_watch()
+        
+        self._proc.kill()
+        try:
+            self._proc.stdin.close()
+        except OSError:
+            pass
+        self._proc.wait()
+        cleanup_temp_file(self.output_path)
+
+
 def cleanup_temp_file(path: str, log_cb: LogCB = None) -> None:
     """Safely delete a temporary file."""
     try:
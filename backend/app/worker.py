@@ -0,0 +1,254 @@
+"""
+Standalone job worker for the Postgres job queue (PITSTOP_JOB_QUEUE=postgres).
+
+The API only inserts QUEUED rows into pitstop_jobs; any number of worker
+processes, on one node or many sharing the database and storage, process
+them:
+
+- Claim: the next QUEUED row (interactive lane first, then oldest) is locked with SELECT ... FOR UPDATE SKIP
+  LOCKED and marked PROCESSING with this worker's id and a lease, so no two
+  workers take the same job and none block on each other.
+- Heartbeat: while a job runs its lease is renewed every third of
+  PITSTOP_JOB_LEASE_SECONDS (or every PITSTOP_WORKER_POLL_SECONDS, if
+  shorter). The heartbeat also picks up cancellation requests from the API
+  and stops the job's frame loop; so does losing the lease (the job was
+  deleted, or re-queued to another worker).
+- Recovery: every poll also re-queues PROCESSING jobs whose lease expired
+  (worker killed, node lost), failing them after PITSTOP_JOB_MAX_ATTEMPTS
+  claims.
+
+Interactive-lane jobs are claimed first, and batch jobs only while fewer than
+PITSTOP_BATCH_SLOTS of this worker's slots run batch work. Up to
+PITSTOP_WORKER_CONCURRENCY jobs run at once per worker, sharing the
+process's CPU budget (PITSTOP_CPU_BUDGET); with PITSTOP_EXECUTOR=process each
+runs in its own child process of the worker. SIGINT/SIGTERM stop claiming and
+wait for running jobs; a second signal exits at once (their leases expire
+and the jobs are re-queued).
+
+Usage:
+    python -m app.worker [--concurrency N] [--worker-id NAME]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from app import settings
+from app.db.session import async_session_maker
+from app.services import pitstop_persistence, pitstop_service
+from app.services.job_scheduler import batch_slots
+
+
+def default_worker_id() -> str:
+    """Worker id unique per process: host name and pid."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class JobWorker:
+    """Claims queued jobs and runs them with leases and heartbeats."""
+
+    def __init__(
+        self,
+        worker_id: Optional[str] = None,
+        concurrency: int = settings.PITSTOP_WORKER_CONCURRENCY,
+        lease_seconds: float = settings.PITSTOP_JOB_LEASE_SECONDS,
+        max_attempts: int = settings.PITSTOP_JOB_MAX_ATTEMPTS,
+        poll_seconds: float = settings.PITSTOP_WORKER_POLL_SECONDS,
+    ):
+        """
+        Args:
+            worker_id: Id recorded on claimed jobs (default: host-pid).
+            concurrency: Jobs run at once by this worker.
+            lease_seconds: Lease length; renewed every lease_seconds / 3.
+            max_attempts: Claims after which a job with an expired lease fails.
+            poll_seconds: Wait between polls when no job is queued.
+        """
+        self.worker_id = worker_id or default_worker_id()
+        self.concurrency = max(1, int(concurrency))
+        self.lease_seconds = float(lease_seconds)
+        self.max_attempts = max(1, int(max_attempts))
+        self.poll_seconds = float(poll_seconds)
+        self.batch_slots = batch_slots(self.concurrency, settings.PITSTOP_BATCH_SLOTS)
+        self._running: Dict[uuid.UUID, asyncio.Task] = {}
+        # Lane of each running job
+        self._lanes: Dict[uuid.UUID, str] = {}
+        self._stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        """Stop claiming jobs; run() returns once running jobs finish."""
+        self._stopping.set()
+
+    async def _requeue_expired(self) -> None:
+        async with async_session_maker() as db:
+            jobs = await pitstop_persistence.requeue_expired_jobs(db, self.max_attempts)
+        for job in jobs:
+            print(f"[{self.worker_id}] Expired lease on job {job.id}: {job.status.value}", flush=True)
+
+    def _claimable_lanes(self) -> Optional[List[str]]:
+        """Lanes this worker may claim from: interactive only while its batch slots are full."""
+        running_batch = sum(1 for lane in self._lanes.values() if lane == "batch")
+        if running_batch >= self.batch_slots:
+            return ["interactive"]
+        return None
+
+    async def _claim(self) -> Optional[Tuple[uuid.UUID, str]]:
+        async with async_session_maker() as db:
+            job = await pitstop_persistence.claim_next_job(
+                db, self.worker_id, self.lease_seconds, lanes=self._claimable_lanes()
+            )
+        return (job.id, job.lane) if job else None
+
+    async def _heartbeat(self, job_id: uuid.UUID) -> None:
+        """
+        Renew the job's lease until the job ends; stop the job on cancel or lease loss.
+
+        Failed renewals (database unavailable etc.) are retried; the job is only
+        stopped once its last renewed lease has run out, since by then it may
+        have been re-queued to another worker.
+        """
+        loop = asyncio.get_running_loop()
+        interval = min(self.lease_seconds / 3, self.poll_seconds)
+        cancelled = False
+        # Local-clock bound of the lease (renewed leases end later on the database clock)
+        lease_deadline = loop.time() + self.lease_seconds
+        while True:
+            await asyncio.sleep(interval)
+            renew_started = loop.time()
+            try:
+                async with async_session_maker() as db:
+                    cancel_requested = await pitstop_persistence.renew_job_lease(
+                        db, job_id, self.worker_id, self.lease_seconds
+                    )
+            except Exception as e:
+                if loop.time() < lease_deadline:
+                    print(f"[{self.worker_id}] Lease renewal for job {job_id} failed: {e}", flush=True)
+                    continue
+                print(
+                    f"[{self.worker_id}] Lease on job {job_id} expired while renewals failed "
+                    f"({e}): stopping it",
+                    flush=True,
+                )
+                pitstop_service.cancel_running_job(job_id)
+                return
+            lease_deadline = renew_started + self.lease_seconds
+            if cancel_requested is None:
+                print(f"[{self.worker_id}] Lost lease on job {job_id}: stopping it", flush=True)
+                pitstop_service.cancel_running_job(job_id)
+                return
+            if cancel_requested and not cancelled:
+                print(f"[{self.worker_id}] Cancelling job {job_id}", flush=True)
+                cancelled = pitstop_service.cancel_running_job(job_id)
+
+    async def _run_job(self, job_id: uuid.UUID) -> None:
+        print(f"[{self.worker_id}] Processing job {job_id}", flush=True)
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        try:
+            await pitstop_service.run_job_processing(job_id, worker_id=self.worker_id)
+        finally:
+            heartbeat.cancel()
+            async with async_session_maker() as db:
+                await pitstop_persistence.release_job_lease(db, job_id, self.worker_id)
+            self._running.pop(job_id, None)
+            self._lanes.pop(job_id, None)
+            print(f"[{self.worker_id}] Finished job {job_id}", flush=True)
+
+    async def _fill_slots(self) -> None:
+        """Claim jobs until all slots are busy or the queue is empty."""
+        while len(self._running) < self.concurrency and not self._stopping.is_set():
+            claimed = await self._claim()
+            if claimed is None:
+                return
+            job_id, lane = claimed
+            self._lanes[job_id] = lane
+            self._running[job_id] = asyncio.create_task(self._run_job(job_id))
+
+    async def run(self) -> None:
+        """Poll the queue until stop() is called, then wait for running jobs."""
+        print(
+            f"[{self.worker_id}] Worker started (concurrency {self.concurrency}, "
+            f"lease {self.lease_seconds:g}s)",
+            flush=True,
+        )
+        while not self._stopping.is_set():
+            try:
+                await self._requeue_expired()
+                await self._fill_slots()
+            except Exception as e:
+                # Database unavailable etc.: keep running jobs alive and retry next poll
+                print(f"[{self.worker_id}] Queue poll failed: {e}", flush=True)
+
+            # Wake on stop, a finished job (free slot) or the poll interval
+            waiters = [asyncio.create_task(self._stopping.wait()), *self._running.values()]
+            await asyncio.wait(
+                waiters, timeout=self.poll_seconds, return_when=asyncio.FIRST_COMPLETED
+            )
+            waiters[0].cancel()
+
+        if self._running:
+            print(f"[{self.worker_id}] Waiting for {len(self._running)} running job(s)", flush=True)
+            await asyncio.gather(*self._running.values(), return_exceptions=True)
+        print(f"[{self.worker_id}] Worker stopped", flush=True)
+
+
+async def _main(worker: JobWorker) -> None:
+    loop = asyncio.get_running_loop()
+    signals = 0
+
+    def on_signal() -> None:
+        nonlocal signals
+        signals += 1
+        if signals > 1:
+            os._exit(1)
+        print(f"[{worker.worker_id}] Shutting down (signal again to exit now)", flush=True)
+        worker.stop()
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, on_signal)
+        except NotImplementedError:  # Windows
+            pass
+
+    # Spawn the job workers up front so they preload the model
+    if settings.PITSTOP_EXECUTOR == "process":
+        from app.model.job_process_pool import get_job_process_pool, shutdown_job_process_pool
+        get_job_process_pool()
+        try:
+            await worker.run()
+        finally:
+            shutdown_job_process_pool()
+    else:
+        await worker.run()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Pitstop job queue worker")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=settings.PITSTOP_WORKER_CONCURRENCY,
+        help=f"Jobs run at once (default: PITSTOP_WORKER_CONCURRENCY={settings.PITSTOP_WORKER_CONCURRENCY})",
+    )
+    parser.add_argument("--worker-id", default=None, help="Worker id (default: host-pid)")
+    args = parser.parse_args()
+
+    if settings.PITSTOP_JOB_QUEUE != "postgres":
+        raise SystemExit(
+            "PITSTOP_JOB_QUEUE must be 'postgres' for workers "
+            "(with 'local' the API process runs jobs itself)"
+        )
+    if args.concurrency > settings.PITSTOP_WORKER_CONCURRENCY:
+        raise SystemExit(
+            "--concurrency cannot exceed PITSTOP_WORKER_CONCURRENCY "
+            f"({settings.PITSTOP_WORKER_CONCURRENCY} inference threads)"
+        )
+
+    asyncio.run(_main(JobWorker(worker_id=args.worker_id, concurrency=args.concurrency)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Compare time-in-zone trackers on a clip.
+
+This script:
+- Runs YOLO detection once on a clip and keeps the detections of every frame
+- Replays the same detections through each tracker (bytetrack, iou)
+- Reports tracker throughput (tracking only, detection excluded)
+- Reports per-zone timing agreement with the first tracker (max time per zone
+  and unique tracker counts)
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import supervision as sv
+
+# Add backend to path for imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.model.model_registry import get_model_registry
+from app.model.trackers import TRACKERS, create_tracker
+from app.model.zone_timing.time_in_zone import ZoneTimerBank, load_zone_names
+from app.model.zone_timing.zones import ZoneMask, load_polygons
+from app.utils.video_decode import open_video
+
+
+def detect_clip(
+    video_path: Path,
+    model_path: Path,
+    target_size,
+    max_frames: int,
+    conf: float,
+    iou: float,
+    engine: str,
+):
+    """Detections of every frame of the clip (one model pass shared by all trackers)."""
+    detector = get_model_registry().checkout(str(model_path), None, engine)
+    detections: List[sv.Detections] = []
+    try:
+        with open_video(video_path, target_size) as video:
+            fps = video.info.fps
+            frame_size = video.frame_size
+            for frame in video.read_frames(max_frames or None):
+                detections.append(detector.detect([frame], conf=conf, iou=iou)[0])
+    finally:
+        get_model_registry().checkin(detector)
+    return detections, fps, frame_size
+
+
+def replay(
+    name: str,
+    detections: List[sv.Detections],
+    fps: float,
+    zone_mask: ZoneMask,
+    zone_names: List[str],
+) -> Dict[str, object]:
+    """Track the cached detections and time them in the zones."""
+    tracker = create_tracker(name, frame_rate=max(1, int(fps)))
+    timers = ZoneTimerBank(fps=fps, num_zones=zone_mask.num_zones)
+
+    tracking_s = 0.0
+    for frame_detections in detections:
+        start = time.perf_counter()
+        tracked = tracker.update(frame_detections)
+        tracking_s += time.perf_counter() - start
+        timers.tick(tracked.tracker_id, zone_mask.membership(tracked))
+
+    zones = {}
+    for zone_idx, zone_name in enumerate(zone_names):
+        times = timers.get_all_times(zone_idx)
+        zones[zone_name] = {
+            "max_time_sec": max(times.values()) if times else 0.0,
+            "unique_trackers": len(times),
+        }
+    return {
+        "tracking_s": tracking_s,
+        "fps": len(detections) / tracking_s if tracking_s > 0 else float("inf"),
+        "zones": zones,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare tracker throughput and zone timing agreement")
+    parser.add_argument("--input", required=True, help="Input video path")
+    parser.add_argument(
+        "--zones",
+        type=str,
+        default=None,
+        help="Zone config JSON path. If not provided, uses sample_zones.json",
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        default=None,
+        help="YOLO model path. If not provided, uses model_weights/best.pt",
+    )
+    parser.add_argument("--frames", type=int, default=900, help="Max frames (default: 900, 0 = all)")
+    parser.add_argument("--conf", type=float, default=0.5, help="Confidence threshold (default: 0.5)")
+    parser.add_argument("--iou", type=float, default=0.5, help="NMS IoU threshold (default: 0.5)")
+    parser.add_argument("--engine", default="ultralytics", help="Detector engine (default: ultralytics)")
+    parser.add_argument(
+        "--resize",
+        type=str,
+        default="1020x500",
+        help="Resize frames to WxH (default: 1020x500, use 'none' to skip)",
+    )
+    parser.add_argument(
+        "--trackers",
+        type=str,
+        default=",".join(TRACKERS),
+        help=f"Comma-separated trackers; the first is the reference (default: {','.join(TRACKERS)})",
+    )
+    args = parser.parse_args()
+
+    backend_dir = Path(__file__).resolve().parent.parent
+    zones_path = Path(args.zones) if args.zones else (
+        backend_dir / "app" / "model" / "zone_timing" / "sample_zones.json"
+    )
+    model_path = Path(args.model) if args.model else backend_dir / "model_weights" / "best.pt"
+
+    target_size = None
+    if args.resize.lower() != "none":
+        w, h = args.resize.split("x")
+        target_size = (int(w), int(h))
+
+    trackers = [t.strip() for t in args.trackers.split(",") if t.strip()]
+
+    print("Detecting (once, shared by all trackers)...")
+    start = time.perf_counter()
+    detections, fps, frame_size = detect_clip(
+        Path(args.input), model_path, target_size, args.frames, args.conf, args.iou, args.engine
+    )
+    detect_s = time.perf_counter() - start
+    print(f"  {len(detections)} frames in {detect_s:.1f}s ({len(detections) / max(detect_s, 1e-9):.1f} fps)")
+
+    polygons = load_polygons(zones_path)
+    zone_names = load_zone_names(zones_path)
+    zone_mask = ZoneMask(polygons, frame_size)
+
+    results = {name: replay(name, detections, fps, zone_mask, zone_names) for name in trackers}
+    reference = trackers[0]
+
+    print("\n=== Tracker throughput (tracking only) ===")
+    for name, result in results.items():
+        print(f"  {name:>10}: {result['fps']:10.1f} frames/s ({result['tracking_s'] * 1000:.1f} ms total)")
+
+    print(f"\n=== Zone timing agreement (reference: {reference}) ===")
+    for name in trackers[1:]:
+        diffs = []
+        for zone_name in zone_names:
+            ref_zone = results[reference]["zones"][zone_name]
+            zone = results[name]["zones"][zone_name]
+            diff = zone["max_time_sec"] - ref_zone["max_time_sec"]
+            diffs.append(abs(diff))
+            print(
+                f"  {name} {zone_name}: max {zone['max_time_sec']:.2f}s "
+                f"({diff:+.2f}s), {zone['unique_trackers']} trackers "
+                f"(reference {ref_zone['unique_trackers']})"
+            )
+        print(f"  {name}: largest per-zone difference {max(diffs, default=0.0):.2f}s "
+              f"(mean {np.mean(diffs) if diffs else 0.0:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -105,24 +105,60 @@ export function getOutputUrl(jobId: string): string {
   return `${PITSTOP_API_BASE}/api/pitstop/jobs/${jobId}/output`;
 }
 
+/** Fallback wait between output polls when the backend sends no Retry-After (seconds) */
+const OUTPUT_RETRY_AFTER_DEFAULT_S = 5;
+
+/** Longest time to wait for a pending render before giving up (seconds) */
+const OUTPUT_RENDER_MAX_WAIT_S = 600;
+
 /**
- * Download the output video as a blob and trigger browser download.
+ * Fetch the output video as a blob.
+ * 
+ * Jobs that completed analysis-only render their video on first request:
+ * the endpoint answers 202 with Retry-After until the render is done, so
+ * this keeps polling until the video itself (200) comes back, for at most
+ * OUTPUT_RENDER_MAX_WAIT_S. A render that keeps failing gets an error status.
  * 
  * @param jobId - The job ID
- * @param filename - The filename for the download
+ * @returns The output video blob
  */
-export async function downloadOutput(jobId: string, filename?: string): Promise<void> {
+export async function fetchOutputBlob(jobId: string): Promise<Blob> {
   const url = getOutputUrl(jobId);
-  const response = await fetch(url);
+  let waitedS = 0;
   
-  if (!response.ok) {
-    const errorData = await response.json().catch(() => ({}));
-    throw new Error(
-      errorData.detail || `Download failed: ${response.status} ${response.statusText}`
-    );
+  for (;;) {
+    const response = await fetch(url);
+    
+    if (response.status === 202) {
+      if (waitedS >= OUTPUT_RENDER_MAX_WAIT_S) {
+        throw new Error("Output video is still rendering. Try again later.");
+      }
+      const retryAfter = Number(response.headers.get("Retry-After"));
+      const waitS = retryAfter > 0 ? retryAfter : OUTPUT_RETRY_AFTER_DEFAULT_S;
+      await new Promise((resolve) => setTimeout(resolve, waitS * 1000));
+      waitedS += waitS;
+      continue;
+    }
+    
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({}));
+      throw new Error(
+        errorData.detail || `Failed to fetch output video: ${response.status} ${response.statusText}`
+      );
+    }
+    
+    return response.blob();
   }
+}
 
-  const blob = await response.blob();
+/**
+ * Download the output video as a blob and trigger browser download.
+ * 
+ * @param jobId - The job ID
+ * @param filename - The filename for the download
+ */
+export async function downloadOutput(jobId: string, filename?: string): Promise<void> {
+  const blob = await fetchOutputBlob(jobId);
   const blobUrl = URL.createObjectURL(blob);
   
   const a = document.createElement("a");
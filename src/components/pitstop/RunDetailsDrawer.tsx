@@ -23,7 +23,7 @@ import DonutLargeOutlinedIcon from "@mui/icons-material/DonutLargeOutlined";
 import AdjustOutlinedIcon from "@mui/icons-material/AdjustOutlined";
 import RadioButtonCheckedOutlinedIcon from "@mui/icons-material/RadioButtonCheckedOutlined";
 import type { PitstopJob, PitstopJobStatus, PitstopRunMetrics } from "../../types/pitstop";
-import { getJob, getOutputUrl, downloadOutput, getJobMetrics } from "../../api/pitstopClient";
+import { getJob, getOutputUrl, fetchOutputBlob, downloadOutput, getJobMetrics } from "../../api/pitstopClient";
 
 interface RunDetailsDrawerProps {
   open: boolean;
@@ -53,6 +53,8 @@ const getStatusColor = (status: PitstopJobStatus) => {
       return { bg: "rgba(61, 220, 151, 0.15)", color: "#3DDC97", label: "Complete" };
     case "FAILED":
       return { bg: "rgba(244, 67, 54, 0.15)", color: "#f44336", label: "Failed" };
+    case "CANCELLED":
+      return { bg: "rgba(255, 255, 255, 0.1)", color: "#9BB7A8", label: "Cancelled" };
     case "PROCESSING":
       return { bg: "rgba(47, 174, 142, 0.15)", color: "#2FAE8E", label: "Processing" };
     case "QUEUED":
@@ -232,17 +234,13 @@ const RunDetailsDrawer = ({ open, runId, onClose }: RunDetailsDrawerProps) => {
         const jobData = await getJob(runId);
         setJob(jobData);
         
-        // If job is complete and has output, fetch the video blob
-        if (jobData.status === "COMPLETE" && jobData.output?.available) {
+        // If job is complete and has (or is rendering) output, fetch the video blob
+        if (jobData.status === "COMPLETE" && (jobData.output?.available || jobData.output?.render_pending)) {
           setIsLoadingVideo(true);
           try {
-            const url = getOutputUrl(runId);
-            const res = await fetch(url);
-            if (res.ok) {
-              const blob = await res.blob();
-              const blobUrl = URL.createObjectURL(blob);
-              setOutputBlobUrl(blobUrl);
-            }
+            const blob = await fetchOutputBlob(runId);
+            const blobUrl = URL.createObjectURL(blob);
+            setOutputBlobUrl(blobUrl);
           } catch (err) {
             console.error("Failed to load video:", err);
           } finally {
@@ -496,7 +494,7 @@ const RunDetailsDrawer = ({ open, runId, onClose }: RunDetailsDrawerProps) => {
                 </Box>
 
                 {/* Output Video */}
-                {job.status === "COMPLETE" && job.output?.available && (
+                {job.status === "COMPLETE" && (job.output?.available || job.output?.render_pending) && (
                   <>
                     <Divider sx={{ borderColor: "rgba(255, 255, 255, 0.08)", mb: 3 }} />
                     
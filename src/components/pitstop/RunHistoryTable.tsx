@@ -43,6 +43,8 @@ const getStatusColor = (status: PitstopJobStatus) => {
       return { bg: "rgba(61, 220, 151, 0.15)", color: "#3DDC97", label: "Complete" };
     case "FAILED":
       return { bg: "rgba(244, 67, 54, 0.15)", color: "#f44336", label: "Failed" };
+    case "CANCELLED":
+      return { bg: "rgba(255, 255, 255, 0.1)", color: "#9BB7A8", label: "Cancelled" };
     case "PROCESSING":
       return { bg: "rgba(47, 174, 142, 0.15)", color: "#2FAE8E", label: "Processing" };
     case "QUEUED":
@@ -199,7 +201,7 @@ const RunHistoryTable = ({
                   const statusStyle = getStatusColor(job.status);
                   const isComplete = job.status === "COMPLETE";
                   const isCurrentlyLoading = loadingJobId === job.job_id;
-                  const canPlay = isComplete && job.has_output;
+                  const canPlay = isComplete && (job.has_output || job.render_pending);
                   
                   return (
                     <TableRow
@@ -269,6 +271,8 @@ const RunHistoryTable = ({
                           title={
                             !isComplete 
                               ? "Output not ready" 
+                              : job.render_pending
+                              ? "Load results (video renders on first view)"
                               : !job.has_output 
                               ? "No output available"
                               : "Load results"
@@ -13,7 +13,7 @@ import RunDetailsDrawer from "../components/pitstop/RunDetailsDrawer";
 import type { PitstopMetrics } from "../components/pitstop/MetricsPanel";
 import type { PitstopJob, PitstopJobListItem, UIJobStatus } from "../types/pitstop";
 import { mapBackendToUIStatus } from "../types/pitstop";
-import { createJob, getJob, getJobs, getJobMetrics, getOutputUrl, downloadOutput } from "../api/pitstopClient";
+import { createJob, getJob, getJobs, getJobMetrics, getOutputUrl, fetchOutputBlob, downloadOutput } from "../api/pitstopClient";
 
 const getStatusChipProps = (status: UIJobStatus) => {
   switch (status) {
@@ -201,15 +201,10 @@ const PitstopPage = () => {
   const fetchOutputAsBlob = useCallback(async (id: string) => {
     setIsLoadingOutput(true);
     try {
-      const url = getOutputUrl(id);
-      console.log("[Pitstop] Fetching output video as blob:", url);
+      console.log("[Pitstop] Fetching output video as blob:", getOutputUrl(id));
       
-      const res = await fetch(url);
-      if (!res.ok) {
-        throw new Error(`Failed to fetch output video: ${res.status} ${res.statusText}`);
-      }
-      
-      const blob = await res.blob();
+      // Waits out a pending render (202 + Retry-After) before the video arrives
+      const blob = await fetchOutputBlob(id);
       console.log("[Pitstop] Output blob received:", blob.size, "bytes, type:", blob.type);
       
       // Revoke old blob URL before setting new one
@@ -261,6 +256,9 @@ const PitstopPage = () => {
       } else if (jobData.status === "FAILED") {
         setError("Job processing failed. Check logs for details.");
         stopPolling();
+      } else if (jobData.status === "CANCELLED") {
+        setError("Job was cancelled.");
+        stopPolling();
       }
     } catch (err) {
       console.error("Error polling job status:", err);
@@ -382,9 +380,10 @@ const PitstopPage = () => {
 
   // Load a job from history
   const handleLoadJob = useCallback(async (historyJob: PitstopJobListItem) => {
-    console.log("handleLoadJob CALLED", historyJob.job_id, { status: historyJob.status, has_output: historyJob.has_output });
+    console.log("handleLoadJob CALLED", historyJob.job_id, { status: historyJob.status, has_output: historyJob.has_output, render_pending: historyJob.render_pending });
     
-    if (historyJob.status !== "COMPLETE" || !historyJob.has_output) {
+    // A pending render still loads: fetching the output starts and waits for it
+    if (historyJob.status !== "COMPLETE" || !(historyJob.has_output || historyJob.render_pending)) {
       console.log("handleLoadJob SKIPPED - job not complete or no output");
       return; // Can only load complete jobs with output
     }
@@ -3,7 +3,7 @@
  */
 
 /** Backend job status values */
-export type PitstopJobStatus = "QUEUED" | "PROCESSING" | "COMPLETE" | "FAILED";
+export type PitstopJobStatus = "QUEUED" | "PROCESSING" | "COMPLETE" | "FAILED" | "CANCELLED";
 
 /** Backend processing stages */
 export type PitstopStage = 
@@ -12,13 +12,26 @@ export type PitstopStage =
   | "TRACKING" 
   | "RENDERING" 
   | "COMPLETE" 
-  | "FAILED";
+  | "FAILED"
+  | "CANCELLED";
 
 /** Output file metadata from backend */
 export interface PitstopOutput {
   available: boolean;
   filename?: string | null;
   size_bytes?: number | null;
+  /** Analysis done, annotated video not rendered yet (GET output renders it) */
+  render_pending?: boolean;
+  /** Last deferred render error (no more retries once render_pending is false) */
+  render_error?: string | null;
+}
+
+/** Video range skipped by the shot gate (not the pit camera) */
+export interface PitstopSkippedRange {
+  start_frame: number;
+  end_frame: number;
+  start_sec: number;
+  end_sec: number;
 }
 
 /** Full job response from GET /api/pitstop/jobs/{job_id} */
@@ -34,6 +47,10 @@ export interface PitstopJob {
   input_size_bytes?: number;
   logs?: string[];
   output?: PitstopOutput;
+  /** Fraction of detection frames skipped by the motion gate (null if the gate was off) */
+  motion_skip_ratio?: number | null;
+  /** Ranges the shot gate skipped as other cameras (null if the gate was off) */
+  skipped_ranges?: PitstopSkippedRange[] | null;
   created_at?: string;
   updated_at?: string;
 }
@@ -59,6 +76,8 @@ export interface PitstopJobListItem {
   input_filename: string;
   input_size_bytes: number;
   has_output: boolean;
+  /** Analysis done, annotated video not rendered yet (loading it starts the render) */
+  render_pending?: boolean;
   created_at: string;
   updated_at: string;
 }
@@ -112,6 +131,7 @@ export function mapBackendToUIStatus(
     case "COMPLETE":
       return "complete";
     case "FAILED":
+    case "CANCELLED":
       return "failed";
     default:
       return "idle";
@@ -139,6 +159,7 @@ export function getStepFromBackend(
     case "COMPLETE":
       return 5; // Past the last step to show all complete
     case "FAILED":
+    case "CANCELLED":
       return -1;
     default:
       return -1;